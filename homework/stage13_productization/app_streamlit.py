@@ -1,73 +1,215 @@
 # app_streamlit.py
+"""
+Dashboard over the pipeline's processed price history and its model's predictions.
+
+    cd homework/stage13_productization && streamlit run app_streamlit.py
+
+The model and each symbol's history are cached as shared resources: they are
+loaded once per server process and reused by every session and rerun, so an
+interaction only slices what is already in memory. Charts are downsampled on
+the server with Largest-Triangle-Three-Buckets before being sent to the
+browser, so their cost depends on the chart width, not on the length of the
+history. Uploaded CSVs are predicted with one vectorized call.
+
+Configured through the environment:
+- PROCESSED_DATA_PATH: the processed dataset (a partitioned Parquet directory, a Parquet or a CSV file)
+- MODEL_PATH: a model registry, an artifact directory or a pickled model
+- MODEL_BANK_PATH: an optional per-symbol model bank, used for the symbols it holds
+"""
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
 
-import streamlit as st
-import pickle
 import numpy as np
 import pandas as pd
-import os
+import streamlit as st
+
+PROJECT_DIR = Path(__file__).resolve().parents[2] / 'project'
+# The pipeline's src/ and scripts/ packages
+sys.path.insert(0, str(PROJECT_DIR))
+
+from scripts.rendering import lttb
+from src.artifacts import MANIFEST_FILE, is_artifact, read_artifact
+from src.model_registry import CURRENT_FILE, open_model
+from src.storage import DATE_COLUMN, iter_df, read_df
+
+DATA_PATH = Path(os.environ.get('PROCESSED_DATA_PATH', PROJECT_DIR / 'data' / 'processed' / 'features'))
+MODEL_PATH = Path(os.environ.get('MODEL_PATH', PROJECT_DIR / 'models' / 'registry'))
+MODEL_BANK_PATH = Path(os.environ.get('MODEL_BANK_PATH', PROJECT_DIR / 'models' / 'model_bank'))
+# Points sent per chart line: a few per horizontal pixel
+MAX_CHART_POINTS = int(os.environ.get('MAX_CHART_POINTS', '2000'))
+# Symbol histories kept in memory, and how long before the dataset is re-read
+MAX_CACHED_SYMBOLS = int(os.environ.get('MAX_CACHED_SYMBOLS', '64'))
+DATA_TTL_S = int(os.environ.get('DATA_TTL_S', '600'))
+TABLE_ROWS = 500
 
 # --- Page Setup ---
 st.set_page_config(page_title="Model Prediction Dashboard", layout="wide")
-st.title("Simple Model Prediction Dashboard")
-st.write("This dashboard allows you to make predictions using a trained model.")
+st.title("Model Prediction Dashboard")
+st.write("Price history and next-day return predictions of the pipeline's model, by symbol and date range.")
 
-# --- Load Model ---
-MODEL_PATH = 'model/model.pkl'
-model = None
-
-# Load the pickled model with error handling
-if os.path.exists(MODEL_PATH):
-    try:
-        with open(MODEL_PATH, 'rb') as f:
-            model = pickle.load(f)
-    except Exception as e:
-        st.error(f"Error loading the model: {e}")
-else:
-    st.error(f"Model file not found at '{MODEL_PATH}'. Please train and save the model first.")
-
-# --- Sidebar for User Input ---
-st.sidebar.header("Input Features")
-st.sidebar.write("Enter values for the model to predict.")
-
-# Disable inputs if the model fails to load
-disable_inputs = model is None
+# --- Cached resources ---
+def model_token(path: Path) -> str:
+    """Changes whenever a new model is published at `path`, so the cached models are reloaded."""
+    if (path / CURRENT_FILE).is_file():
+        return (path / CURRENT_FILE).read_text().strip()
+    if is_artifact(path):
+        return str((path / MANIFEST_FILE).stat().st_mtime_ns)
+    return str(path.stat().st_mtime_ns) if path.exists() else ''
+
+@st.cache_resource(show_spinner="Loading model...")
+def load_models(model_path: str, bank_path: str, token: str):
+    """
+    The pipeline's model and the per-symbol bank (or None). Both are memory-mapped
+    artifacts, so they are loaded in milliseconds and share their pages with
+    any other process serving them.
+    """
+    model = open_model(model_path)
+    bank = read_artifact(bank_path) if is_artifact(bank_path) else None
+    return model, bank
+
+@st.cache_data(ttl=DATA_TTL_S, show_spinner=False)
+def list_symbols(data_path: str) -> list:
+    path = Path(data_path)
+    if path.is_dir():
+        # Partitioned dataset: one symbol=<ticker> directory per symbol, no file is read
+        return sorted(p.name.split('=', 1)[1] for p in path.glob('symbol=*'))
+    header = next(iter_df(path, chunksize=1)).columns
+    if 'symbol' in header:
+        return sorted(read_df(path, columns=['symbol'])['symbol'].astype(str).unique())
+    # Single-symbol file written by the pipeline: <symbol>_processed_<timestamp>.csv
+    return [path.name.split('_', 1)[0].upper()]
 
+def predictor_for(model, bank, symbol: str):
+    """The symbol's own model when the bank has one, else the pipeline's model."""
+    if bank is not None and symbol in (bank.symbols or ()):
+        return bank.predictor(symbol)
+    return model
+
+@st.cache_resource(ttl=DATA_TTL_S, max_entries=MAX_CACHED_SYMBOLS, show_spinner="Loading history...")
+def symbol_history(data_path: str, symbol: str, token: str) -> pd.DataFrame:
+    """
+    Full processed history of `symbol`, sorted by date, with the model's
+    prediction and the realized next-day return of every row. Only the
+    symbol's partitions are read, and all rows are predicted in one call.
+
+    Cached as a resource, so every session shares the frame instead of
+    receiving a copy: callers must not modify it.
+    """
+    model, bank = load_models(str(MODEL_PATH), str(MODEL_BANK_PATH), token)
+    df = read_df(data_path, symbols=[symbol]).sort_values(DATE_COLUMN, ignore_index=True)
+    predictor = predictor_for(model, bank, symbol)
+    X = df[predictor.feature_names].to_numpy(dtype=np.float64)
+    df['prediction'] = predictor.predict(X)
+    df['actual'] = df['close'].pct_change().shift(-1)
+    return df
+
+def date_window(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """Rows dated within [start, end], found by binary search on the sorted dates."""
+    dates = df[DATE_COLUMN].to_numpy()
+    lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side='left')
+    hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1)), side='left')
+    return df.iloc[lo:hi]
+
+def downsample(df: pd.DataFrame, columns: list, n_out: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    At most about `n_out` rows per column, indexed by date: the union of each
+    column's LTTB points, so every line keeps its own peaks and troughs.
+    """
+    df = df.dropna(subset=columns)
+    x = df[DATE_COLUMN].to_numpy().astype('datetime64[ns]').astype(np.int64)
+    keep = np.unique(np.concatenate([lttb(x, df[c].to_numpy(dtype=np.float64), n_out) for c in columns]))
+    return df.iloc[keep].set_index(DATE_COLUMN)[columns]
+
+@st.cache_data(max_entries=8, show_spinner="Predicting...")
+def predict_csv(data: bytes, token: str) -> pd.DataFrame:
+    """
+    Predictions for every row of an uploaded CSV, which needs the model's
+    feature columns. With a model bank and a `symbol` column each row is
+    predicted by its symbol's model; either way it is one vectorized call.
+    """
+    from io import BytesIO
+
+    model, bank = load_models(str(MODEL_PATH), str(MODEL_BANK_PATH), token)
+    df = pd.read_csv(BytesIO(data))
+    if bank is not None and 'symbol' in df.columns:
+        missing = [c for c in bank.features if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+        X = df[bank.features].to_numpy(dtype=np.float64)
+        predictions = bank.predict(X, df['symbol'].astype(str).tolist())
+    else:
+        missing = [c for c in model.feature_names if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+        predictions = model.predict(model.validate(df[model.feature_names]))
+    return df.assign(prediction=predictions)
+
+# --- Load Model ---
+if not MODEL_PATH.exists():
+    st.error(f"Model not found at '{MODEL_PATH}'. Run the pipeline (project/main.py) to train and publish one first.")
+    st.stop()
+token = model_token(MODEL_PATH) + '|' + model_token(MODEL_BANK_PATH)
 try:
-    feature1 = st.sidebar.number_input("Enter Feature 1", value=1.5, format="%.2f", disabled=disable_inputs)
-    feature2 = st.sidebar.number_input("Enter Feature 2", value=2.5, format="%.2f", disabled=disable_inputs)
+    model, bank = load_models(str(MODEL_PATH), str(MODEL_BANK_PATH), token)
 except Exception as e:
-    st.sidebar.error(f"Invalid input. Please enter valid numbers. Error: {e}")
-    disable_inputs = True
+    st.error(f"Error loading the model: {e}")
+    st.stop()
 
-# --- Prediction and Results ---
-if not disable_inputs:
-    st.subheader("Prediction")
+# --- Sidebar for the query ---
+st.sidebar.header("History")
+symbols = list_symbols(str(DATA_PATH)) if DATA_PATH.exists() else []
+if not symbols:
+    st.sidebar.warning(f"No processed data at '{DATA_PATH}'.")
+symbol = st.sidebar.selectbox("Symbol", symbols, disabled=not symbols)
 
-    if st.button("Get Prediction"):
-        try:
-            # Format features for the model (2D array)
-            features = np.array([[feature1, feature2]])
-            
-            # Predict using the loaded model
-            prediction = model.predict(features)
-            
-            st.metric(label="Predicted Value", value=f"{prediction[0]:.4f}")
-            st.success("Prediction successful!")
-            
-        except Exception as e:
-            st.error(f"An error occurred during prediction: {e}")
-else:
-    st.warning("Prediction is disabled because the model could not be loaded.")
+tab_history, tab_batch = st.tabs(["History", "Batch prediction"])
 
-# --- Bonus: Sample Data Visualization ---
-st.subheader("Sample Data Visualization")
-st.write("This is a simple chart displaying some sample data.")
+# --- Price and prediction history ---
+with tab_history:
+    if symbol is not None:
+        started = perf_counter()
+        history = symbol_history(str(DATA_PATH), symbol, token)
+        first, last = history[DATE_COLUMN].iloc[0].date(), history[DATE_COLUMN].iloc[-1].date()
+        dates = st.sidebar.date_input("Date range", value=(first, last), min_value=first, max_value=last)
+        # The widget holds a single date while the user is picking the range
+        start, end = (dates[0], dates[-1]) if isinstance(dates, (tuple, list)) and dates else (first, last)
+        window = date_window(history, start, end)
 
-# Create and display sample data
-sample_data = pd.DataFrame({
-    'x': np.arange(10),
-    'y': np.random.randn(10).cumsum()
-})
+        scored = window.dropna(subset=['actual'])
+        errors = scored['prediction'].to_numpy() - scored['actual'].to_numpy()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Rows", f"{len(window):,}")
+        col2.metric("MAE", f"{np.abs(errors).mean():.5f}" if len(errors) else "-")
+        col3.metric("RMSE", f"{np.sqrt((errors ** 2).mean()):.5f}" if len(errors) else "-")
+        col4.metric("Direction hit rate",
+                    f"{(np.sign(scored['prediction']) == np.sign(scored['actual'])).mean():.1%}" if len(errors) else "-")
 
-st.line_chart(sample_data)
-st.dataframe(sample_data)
\ No newline at end of file
+        if len(window):
+            st.subheader(f"{symbol} close price")
+            st.line_chart(downsample(window, ['close']))
+            st.subheader("Predicted vs. realized next-day return")
+            st.line_chart(downsample(window, ['actual', 'prediction']))
+            st.dataframe(window.tail(TABLE_ROWS), use_container_width=True)
+        else:
+            st.info("No rows in the selected date range.")
+        version = getattr(predictor_for(model, bank, symbol), 'version', None)
+        st.caption(f"Model version {version or 'n/a'}; {len(window):,} rows, charts limited to "
+                   f"{MAX_CHART_POINTS:,} points per line; query took {(perf_counter() - started) * 1000:.0f} ms.")
+
+# --- Batch predictions from an uploaded CSV ---
+with tab_batch:
+    st.write(f"Upload a CSV with the columns {', '.join(model.feature_names)}"
+             + (" and an optional `symbol` column to use each symbol's model." if bank is not None else "."))
+    upload = st.file_uploader("Feature CSV", type="csv")
+    if upload is not None:
+        try:
+            predicted = predict_csv(upload.getvalue(), token)
+        except (KeyError, ValueError) as e:
+            st.error(f"An error occurred during prediction: {e}")
+        else:
+            st.success(f"Predicted {len(predicted):,} rows.")
+            st.dataframe(predicted.head(TABLE_ROWS), use_container_width=True)
+            st.download_button("Download predictions", predicted.to_csv(index=False).encode(),
+                               file_name="predictions.csv", mime="text/csv")
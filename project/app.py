@@ -1,20 +1,103 @@
-from flask import Flask, request, jsonify
-import pickle
+from flask import Flask, Response, request, jsonify
+import os
+from pathlib import Path
+from time import perf_counter
+
+from src.metrics import CONTENT_TYPE, REGISTRY, RequestMetrics
+from src.model_registry import CURRENT_FILE, open_model
+from src.monitoring import MONITOR_FILENAME, DriftMonitor
+from src.serving import MicroBatcher
+
+APP_DIR = Path(__file__).resolve().parent
+# The pipeline (main.py) publishes memory-mappable versions to the registry. MODEL_PATH
+# overrides it with a registry, an artifact directory or a pickled model.
+REGISTRY_DIR = APP_DIR / 'models' / 'registry'
+DEFAULT_MODEL_PATH = REGISTRY_DIR if (REGISTRY_DIR / CURRENT_FILE).exists() else APP_DIR / 'models' / 'regression_model.pkl'
+MODEL_PATH = Path(os.environ.get('MODEL_PATH', DEFAULT_MODEL_PATH))
+# Drift monitor written next to the model by the pipeline's train stage
+MONITOR_PATH = Path(os.environ.get('MONITOR_PATH', MODEL_PATH.parent / MONITOR_FILENAME))
+# Single-row requests arriving within BATCH_WAIT_MS of each other share one predict call
+BATCH_WAIT_MS = float(os.environ.get('BATCH_WAIT_MS', '1'))
+BATCH_MAX_ROWS = int(os.environ.get('BATCH_MAX_ROWS', '256'))
 
 app = Flask(__name__)
 
-# Load the model
-with open('model/model.pkl', 'rb') as f:
-    model = pickle.load(f)
+# Memory-mapped: worker processes share one copy of the coefficients
+predictor = open_model(MODEL_PATH)
+batcher = MicroBatcher(predictor.predict, max_batch=BATCH_MAX_ROWS, max_wait=BATCH_WAIT_MS / 1000)
+metrics = RequestMetrics()
+# Served rows are counted into the monitor's rolling window (per worker process, like the metrics)
+monitor = DriftMonitor.load(MONITOR_PATH) if MONITOR_PATH.exists() else None
+if monitor is not None and monitor.features != predictor.feature_names:
+    # Built for another model
+    monitor = None
+
+def _error(endpoint: str, message: str, stamps: list, status: int = 400):
+    response = jsonify({'error': message}), status
+    stamps.append(perf_counter())
+    metrics.record(endpoint, predictor.version, status, stamps)
+    return response
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    data = request.get_json()
+    # Stage boundaries: start, parsed, validated, predicted, serialized
+    stamps = [perf_counter()]
+    data = request.get_json(silent=True) or {}
+    features = data.get('features', None)
+    stamps.append(perf_counter())
+    if features is None:
+        return _error('/predict', 'No features provided', stamps)
+    try:
+        row = predictor.validate(features)
+    except ValueError as e:
+        return _error('/predict', str(e), stamps)
+    if len(row) != 1:
+        return _error('/predict', 'Use /predict_batch for more than one row', stamps)
+    if monitor is not None:
+        monitor.observe(row)
+    stamps.append(perf_counter())
+    prediction = batcher.predict(row)
+    stamps.append(perf_counter())
+    response = jsonify({'prediction': prediction})
+    stamps.append(perf_counter())
+    metrics.record('/predict', predictor.version, 200, stamps, 1)
+    return response
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    stamps = [perf_counter()]
+    data = request.get_json(silent=True) or {}
     features = data.get('features', None)
+    stamps.append(perf_counter())
     if features is None:
-        return jsonify({'error': 'No features provided'}), 400
-    prediction = model.predict([features])
-    return jsonify({'prediction': prediction[0]})
+        return _error('/predict_batch', 'No features provided', stamps)
+    try:
+        X = predictor.validate(features)
+    except ValueError as e:
+        return _error('/predict_batch', str(e), stamps)
+    if monitor is not None:
+        monitor.observe(X)
+    stamps.append(perf_counter())
+    # Already a batch: one matrix-vector product, no need to queue
+    predictions = predictor.predict(X).tolist()
+    stamps.append(perf_counter())
+    response = jsonify({'predictions': predictions})
+    stamps.append(perf_counter())
+    metrics.record('/predict_batch', predictor.version, 200, stamps, len(predictions))
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    # Per worker process: Prometheus scrapes (or sums) each worker
+    return Response(REGISTRY.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+@app.route('/monitoring', methods=['GET'])
+def monitoring():
+    # Null rates and PSI of the served rows over the last 7 days, and their freshness
+    if monitor is None:
+        return jsonify({'error': f'No drift monitor at {MONITOR_PATH}'}), 404
+    return jsonify(monitor.check())
 
 if __name__ == '__main__':
-    app.run(port=5000)
+    # Development server only; see gunicorn.conf.py for production
+    app.run(port=int(os.environ.get('PORT', '5000')), threaded=True)
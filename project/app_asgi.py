@@ -0,0 +1,139 @@
+"""
+Async (ASGI) prediction server backed by the model registry.
+
+    cd project && uvicorn app_asgi:app --workers 4
+
+Every worker memory-maps the registry's current version, so N workers share
+one copy of the coefficients, and picks up versions published by the pipeline
+(main.py) without a restart. Endpoints match app.py: POST /predict,
+POST /predict_batch and GET /metrics, plus GET /health.
+"""
+import asyncio
+import json
+import os
+from pathlib import Path
+from time import perf_counter
+
+from src.metrics import CONTENT_TYPE, REGISTRY, RequestMetrics
+from src.model_registry import ModelRegistry
+from src.serving import AsyncMicroBatcher
+
+APP_DIR = Path(__file__).resolve().parent
+REGISTRY_DIR = Path(os.environ.get('MODEL_REGISTRY', APP_DIR / 'models' / 'registry'))
+RELOAD_INTERVAL_S = float(os.environ.get('RELOAD_INTERVAL_S', '1'))
+BATCH_WAIT_MS = float(os.environ.get('BATCH_WAIT_MS', '1'))
+BATCH_MAX_ROWS = int(os.environ.get('BATCH_MAX_ROWS', '256'))
+MAX_BODY_BYTES = 1 << 20
+
+registry = ModelRegistry(REGISTRY_DIR, poll_interval=RELOAD_INTERVAL_S)
+batcher = AsyncMicroBatcher(max_batch=BATCH_MAX_ROWS, max_wait=BATCH_WAIT_MS / 1000)
+metrics = RequestMetrics()
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+async def _read_json(receive) -> dict:
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise HTTPError(413, 'Request body too large')
+        if not message.get('more_body', False):
+            break
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, 'Body must be JSON') from None
+    if not isinstance(data, dict):
+        raise HTTPError(400, 'Body must be a JSON object')
+    return data
+
+async def _send(send, status: int, body: bytes, content_type: bytes = b'application/json') -> None:
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _send_json(send, status: int, payload: dict) -> None:
+    await _send(send, status, json.dumps(payload).encode())
+
+def _features(data: dict, predictor):
+    if predictor is None:
+        raise HTTPError(503, 'No model published yet')
+    features = data.get('features', None)
+    if features is None:
+        raise HTTPError(400, 'No features provided')
+    try:
+        return predictor.validate(features)
+    except ValueError as e:
+        raise HTTPError(400, str(e)) from None
+
+async def predict(data: dict, predictor, stamps: list) -> tuple:
+    row = _features(data, predictor)
+    if len(row) != 1:
+        raise HTTPError(400, 'Use /predict_batch for more than one row')
+    stamps.append(perf_counter())
+    prediction = await batcher.predict(predictor, row)
+    stamps.append(perf_counter())
+    return {'prediction': prediction, 'model_version': predictor.version}, 1
+
+async def predict_batch(data: dict, predictor, stamps: list) -> tuple:
+    X = _features(data, predictor)
+    stamps.append(perf_counter())
+    predictions = predictor.predict(X).tolist()
+    stamps.append(perf_counter())
+    return {'predictions': predictions, 'model_version': predictor.version}, len(predictions)
+
+ROUTES = {
+    ('POST', '/predict'): predict,
+    ('POST', '/predict_batch'): predict_batch,
+}
+
+async def _lifespan(receive, send) -> None:
+    watcher = None
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            registry.refresh()
+            watcher = asyncio.get_running_loop().create_task(registry.watch())
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if watcher is not None:
+                watcher.cancel()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    method, path = scope['method'], scope['path']
+    if method == 'GET' and path == '/health':
+        return await _send_json(send, 200, {'status': 'ok', 'model_version': registry.version})
+    if method == 'GET' and path == '/metrics':
+        return await _send(send, 200, REGISTRY.render().encode(), CONTENT_TYPE.encode())
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        return await _send_json(send, 404, {'error': f'No route for {method} {path}'})
+    # One snapshot per request: a reload mid-request does not affect it
+    predictor = registry.current
+    version = predictor.version if predictor is not None else None
+    # Stage boundaries: start, parsed, validated, predicted, serialized
+    stamps = [perf_counter()]
+    status, rows = 200, 0
+    try:
+        data = await _read_json(receive)
+        stamps.append(perf_counter())
+        payload, rows = await handler(data, predictor, stamps)
+    except HTTPError as e:
+        status, payload = e.status, {'error': str(e)}
+    body = json.dumps(payload).encode()
+    stamps.append(perf_counter())
+    metrics.record(path, version, status, stamps, rows)
+    await _send(send, status, body)
@@ -0,0 +1,359 @@
+"""
+Load test for the prediction servers.
+
+Trains a stand-in model from the AAPL sample data into a temporary directory,
+starts a server on it and drives an open-loop workload: requests are sent on a
+Poisson schedule at --rate per second whatever the server's response times,
+and latency is measured from each request's scheduled send time, so a slow
+server cannot hide queueing delay by slowing the client down. Prints (and
+optionally writes) a JSON report with throughput, latency percentiles per
+endpoint and resident memory per server process.
+
+    python project/benchmarks/load_test.py --target flask --rate 500 --duration 20
+    python project/benchmarks/load_test.py --target uvicorn --workers 4 --batch-fraction 0.2 --max-p95-ms 250
+    python project/benchmarks/load_test.py --target external --url http://127.0.0.1:8000
+
+Exits with status 1 if --max-p95-ms or --max-error-rate is exceeded.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_DIR))
+
+# Stage14 reflection: p95 latency target and tolerated error rate
+P95_TARGET_MS = 250
+ERROR_RATE_TARGET = 0.001
+# Server stderr, kept in the temporary model directory and shown if the server fails to start
+SERVER_LOG = "server.log"
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Open-loop load test for the prediction API.")
+    parser.add_argument("--target", choices=["flask", "gunicorn", "uvicorn", "external"], default="flask",
+                        help="Server to start: app.py on Flask's dev server or gunicorn, app_asgi.py on uvicorn, "
+                             "or an already running server at --url.")
+    parser.add_argument("--url", default=None, help="Base URL of the server for --target external.")
+    parser.add_argument("--raw-data-path", type=Path, default=PROJECT_DIR / "data" / "raw" / "api_aapl.csv",
+                        help="Data used to train the stand-in model and to draw request rows from.")
+    parser.add_argument("--rate", type=float, default=200.0, help="Mean request arrival rate (requests/s).")
+    parser.add_argument("--duration", type=float, default=10.0, help="Length of the measured run in seconds.")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of load before measuring starts.")
+    parser.add_argument("--connections", type=int, default=64, help="Client keep-alive connections.")
+    parser.add_argument("--batch-fraction", type=float, default=0.0,
+                        help="Share of requests sent to /predict_batch instead of /predict.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Rows per /predict_batch request.")
+    parser.add_argument("--workers", type=int, default=2, help="Server worker processes (gunicorn/uvicorn).")
+    parser.add_argument("--port", type=int, default=None, help="Port for the started server (default: a free one).")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Also write the JSON report here.")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="Fail if overall p95 latency exceeds this.")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Fail if the error rate exceeds this.")
+    return parser.parse_args()
+
+def train_stand_in_model(raw_data_path: Path, model_dir: Path) -> np.ndarray:
+    """
+    Trains the pipeline's regression on `raw_data_path` and saves it the way
+    main.py does (pickle, preprocessing, registry version). Returns the feature
+    rows to send in requests.
+    """
+    from src.storage import read_df
+    from src.cleaning import drop_missing
+    from src.outliers import Winsorizer
+    from src.serving import PREPROCESSING_FILENAME, LinearPredictor
+    from src.model_registry import publish_model
+    from scripts import feature_engineering, modeling
+
+    df = drop_missing(read_df(raw_data_path))
+    winsorizer = Winsorizer(lower=0.01, upper=0.99).fit(df, df.select_dtypes(include="number").columns)
+    df = feature_engineering.create_features(winsorizer.transform(df)).dropna()
+    model, X_test, _, _ = modeling.train_regression_model(df)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    with open(model_dir / "regression_model.pkl", "wb") as f:
+        pickle.dump(model, f)
+    with open(model_dir / PREPROCESSING_FILENAME, "wb") as f:
+        pickle.dump([winsorizer], f)
+    publish_model(LinearPredictor.from_model(model, [winsorizer]), model_dir / "registry")
+    return X_test.to_numpy(dtype=np.float64)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(args, model_dir: Path, port: int):
+    """
+    Launches the target server; returns (process, base_url, probe_path). Its
+    stderr goes to <model_dir>/server.log: a pipe nobody reads would fill up
+    with per-request log lines and block the server.
+    """
+    env = dict(os.environ,
+               # app.py memory-maps the registry's current version, as it does by default
+               MODEL_PATH=str(model_dir / "registry"),
+               MODEL_REGISTRY=str(model_dir / "registry"),
+               PORT=str(port),
+               BIND=f"127.0.0.1:{port}",
+               WEB_CONCURRENCY=str(args.workers),
+               PYTHONUNBUFFERED="1")
+    probe = "/metrics"
+    if args.target == "flask":
+        cmd = [sys.executable, "app.py"]
+    elif args.target == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "app_asgi:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(args.workers), "--no-access-log"]
+        probe = "/health"
+    with open(model_dir / SERVER_LOG, "wb") as log:
+        proc = subprocess.Popen(cmd, cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=log)
+    return proc, f"http://127.0.0.1:{port}", probe
+
+async def wait_ready(base_url: str, probe: str, proc, log_path: Path | None = None, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    host, port = _host_port(base_url)
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            log = log_path.read_text(errors="replace")[-2000:] if log_path is not None and log_path.exists() else ""
+            raise RuntimeError(f"Server exited with code {proc.returncode}: {log}")
+        try:
+            conn = await _Connection.open(host, port)
+            status, _ = await conn.request("GET", probe, None, 2.0)
+            conn.close()
+            if status < 500:
+                return
+        except (OSError, asyncio.TimeoutError, ConnectionError):
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} not ready after {timeout:.0f}s")
+
+def _host_port(base_url: str):
+    parts = urlsplit(base_url)
+    return parts.hostname, parts.port or 80
+
+class _Connection:
+    """Minimal HTTP/1.1 keep-alive client connection (no third-party client needed)."""
+
+    def __init__(self, host: str, reader, writer):
+        self.host = host
+        self.reader = reader
+        self.writer = writer
+        self.open = True
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "_Connection":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(host, reader, writer)
+
+    def close(self) -> None:
+        self.open = False
+        self.writer.close()
+
+    async def request(self, method: str, path: str, body, timeout: float):
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n\r\n").encode()
+        self.writer.write(head + payload)
+        return await asyncio.wait_for(self._response(), timeout)
+
+    async def _response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        version, status = status_line.split(b" ", 2)[:2]
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+        if "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            self.open = False
+        if headers.get("connection") == "close" or (version == b"HTTP/1.0" and headers.get("connection") != "keep-alive"):
+            self.close()
+        return int(status), body
+
+def _process_tree(pid: int) -> list:
+    """pid and all its descendants (e.g. gunicorn/uvicorn workers), from /proc."""
+    children = {}
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry.name))
+    tree, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        tree.append(p)
+        stack.extend(children.get(p, []))
+    return tree
+
+def _rss_bytes(pid: int) -> int | None:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+async def sample_memory(pid: int, peaks: dict, interval: float = 0.5) -> None:
+    while True:
+        for p in _process_tree(pid):
+            rss = _rss_bytes(p)
+            if rss is not None:
+                peaks[p] = max(peaks.get(p, 0), rss)
+        await asyncio.sleep(interval)
+
+async def run_load(args, base_url: str, rows: np.ndarray) -> list:
+    """
+    Open-loop workload. Returns (endpoint, scheduled_time, latency_s, status)
+    for every request scheduled after the warm-up.
+    """
+    rng = np.random.default_rng(args.seed)
+    host, port = _host_port(base_url)
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.connections):
+        pool.put_nowait(None)
+    results = []
+    start = time.perf_counter() + 0.1
+    measure_from = start + args.warmup
+
+    async def one(scheduled: float, batch: bool) -> None:
+        conn = await pool.get()
+        status = 0
+        try:
+            if conn is None or not conn.open:
+                conn = await _Connection.open(host, port)
+            if batch:
+                endpoint = "/predict_batch"
+                sample = rows[rng.integers(0, len(rows), args.batch_size)]
+                status, _ = await conn.request("POST", endpoint, {"features": sample.tolist()}, args.timeout)
+            else:
+                endpoint = "/predict"
+                status, _ = await conn.request("POST", endpoint, {"features": rows[rng.integers(0, len(rows))].tolist()}, args.timeout)
+        except (OSError, asyncio.TimeoutError, ConnectionError, ValueError):
+            endpoint = "/predict_batch" if batch else "/predict"
+            if conn is not None:
+                conn.close()
+            conn = None
+        finally:
+            pool.put_nowait(conn if conn is not None and conn.open else None)
+        if scheduled >= measure_from:
+            results.append((endpoint, scheduled, time.perf_counter() - scheduled, status))
+
+    tasks = []
+    t = start
+    end = measure_from + args.duration
+    while t < end:
+        delay = t - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(t, rng.random() < args.batch_fraction)))
+        t += rng.exponential(1.0 / args.rate)
+    await asyncio.gather(*tasks)
+    return results
+
+def summarize(results: list, args, memory: dict) -> dict:
+    def stats(items) -> dict:
+        lat = np.array([r[2] for r in items]) * 1000
+        ok = np.array([200 <= r[3] < 300 for r in items])
+        if not len(lat):
+            return {"requests": 0}
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        statuses = np.array([r[3] for r in items])
+        codes, counts = np.unique(statuses, return_counts=True)
+        return {
+            "requests": int(len(lat)),
+            "errors": int((~ok).sum()),
+            "error_rate": float((~ok).mean()),
+            # Status 0 is a transport error: refused/reset connection or timeout
+            "status_counts": {str(c): int(n) for c, n in zip(codes, counts)},
+            "throughput_rps": float(ok.sum() / args.duration),
+            "latency_ms": {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+                           "mean": float(lat.mean()), "max": float(lat.max())},
+        }
+
+    report = {
+        "target": args.target,
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "overall": stats(results),
+        "endpoints": {ep: stats([r for r in results if r[0] == ep]) for ep in sorted({r[0] for r in results})},
+        "server_memory": [{"pid": pid, "peak_rss_mb": round(rss / 2**20, 1)} for pid, rss in sorted(memory.items())],
+        "slo": {"p95_target_ms": P95_TARGET_MS, "error_rate_target": ERROR_RATE_TARGET},
+    }
+    overall = report["overall"]
+    if overall.get("requests"):
+        report["slo"]["p95_ok"] = overall["latency_ms"]["p95"] <= P95_TARGET_MS
+        report["slo"]["error_rate_ok"] = overall["error_rate"] <= ERROR_RATE_TARGET
+    return report
+
+async def main_async(args) -> dict:
+    proc = None
+    memory: dict = {}
+    with tempfile.TemporaryDirectory(prefix="load_test_") as tmp:
+        if args.target == "external":
+            if not args.url:
+                raise SystemExit("--target external needs --url")
+            base_url, probe = args.url.rstrip("/"), "/metrics"
+        # External servers are only sent rows; they serve their own model
+        # Keep stdout for the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            rows = train_stand_in_model(args.raw_data_path, Path(tmp))
+        if args.target != "external":
+            proc, base_url, probe = start_server(args, Path(tmp), args.port or _free_port())
+        sampler = None
+        try:
+            await wait_ready(base_url, probe, proc, Path(tmp) / SERVER_LOG)
+            if proc is not None:
+                sampler = asyncio.create_task(sample_memory(proc.pid, memory))
+            results = await run_load(args, base_url, rows)
+        finally:
+            if sampler is not None:
+                sampler.cancel()
+            if proc is not None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+    return summarize(results, args, memory)
+
+def main():
+    args = parse_arguments()
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text)
+    overall = report["overall"]
+    failed = False
+    if args.max_p95_ms is not None and overall.get("requests") and overall["latency_ms"]["p95"] > args.max_p95_ms:
+        print(f"FAIL: p95 {overall['latency_ms']['p95']:.1f} ms > {args.max_p95_ms} ms", file=sys.stderr)
+        failed = True
+    if args.max_error_rate is not None and overall.get("requests") and overall["error_rate"] > args.max_error_rate:
+        print(f"FAIL: error rate {overall['error_rate']:.4f} > {args.max_error_rate}", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
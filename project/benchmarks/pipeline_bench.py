@@ -0,0 +1,295 @@
+"""
+Benchmarks each pipeline stage on synthetic OHLCV data of growing size.
+
+For every scale the stages run in pipeline order on the previous stage's
+output: read_df, drop_missing, winsorize_df, create_features,
+train_regression_model, save_evaluation_metrics, run_eda and plot_predictions.
+Each stage is timed over --repeats runs on fresh inputs (the median is
+reported), then run once more under tracemalloc for its peak allocation and the growth
+of the process's peak RSS.
+
+    python project/benchmarks/pipeline_bench.py --scales 10k,100k,1M
+    python project/benchmarks/pipeline_bench.py --scales 10M --stages read_df,winsorize_df,create_features
+    python project/benchmarks/pipeline_bench.py --save-baseline       # record this machine's numbers
+    python project/benchmarks/pipeline_bench.py                       # compare against them
+
+Results compared with --baseline (when it exists) are flagged as regressions
+if time or peak memory grows by more than --tolerance / --memory-tolerance;
+the exit status is then 1. Baselines are machine-specific: record them on the
+machine that runs the comparison.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_DIR))
+
+from src.storage import read_df, write_df
+from src.cleaning import drop_missing
+from src.outliers import winsorize_df
+from scripts import eda, evaluation, feature_engineering, modeling, reporting
+
+DEFAULT_BASELINE = PROJECT_DIR / "benchmarks" / "baselines" / "pipeline.json"
+STAGES = [
+    "read_df",
+    "drop_missing",
+    "winsorize_df",
+    "create_features",
+    "train_regression_model",
+    "save_evaluation_metrics",
+    "run_eda",
+    "plot_predictions",
+]
+PLOT_STAGES = {"run_eda", "plot_predictions"}
+# Differences below this are timer noise, never a regression
+MIN_TIME_DELTA_S = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+
+def parse_scale(text: str) -> int:
+    text = text.strip().lower()
+    factor = {"k": 10**3, "m": 10**6, "b": 10**9}.get(text[-1], 1)
+    return int(float(text[:-1] if factor > 1 else text) * factor)
+
+def scale_label(n: int) -> str:
+    for suffix, factor in (("B", 10**9), ("M", 10**6), ("k", 10**3)):
+        if n >= factor and n % factor == 0:
+            return f"{n // factor}{suffix}"
+    return str(n)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic OHLCV data.")
+    parser.add_argument("--scales", default="10k,100k,1M",
+                        help="Comma-separated row counts, e.g. 10k,100k,1M,10M,100M (100M needs ~40 GB of RAM).")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of: " + ", ".join(STAGES))
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage (1 from 10M rows up).")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="parquet", help="File format read_df loads.")
+    parser.add_argument("--missing-rate", type=float, default=0.001, help="Share of rows with a missing value.")
+    parser.add_argument("--plot-max-rows", type=parse_scale, default=1_000_000,
+                        help="Skip the plotting stages above this many rows.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run (timing only).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Write the results JSON here.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per stage.")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="Allowed relative growth of peak memory.")
+    return parser.parse_args()
+
+def make_ohlcv(n_rows: int, missing_rate: float = 0.001, seed: int = 0) -> pd.DataFrame:
+    """
+    Minute bars from a geometric random walk with fat-tailed returns (so
+    winsorization has something to clip) and a few missing values.
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.standard_t(df=3, size=n_rows) * 0.001
+    close = 100.0 * np.exp(np.cumsum(returns))
+    spread = np.abs(rng.normal(0.0, 0.002, size=n_rows)) * close
+    open_ = close * (1.0 + rng.normal(0.0, 0.001, size=n_rows))
+    df = pd.DataFrame({
+        # Minute frequency keeps 100M rows inside pandas' Timestamp range
+        "date": pd.date_range("2000-01-01", periods=n_rows, freq="min"),
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 5_000_000, size=n_rows).astype(np.float64),
+    })
+    n_missing = int(n_rows * missing_rate)
+    if n_missing:
+        rows = rng.choice(n_rows, n_missing, replace=False)
+        cols = rng.integers(1, df.shape[1], n_missing)
+        for c in np.unique(cols):
+            df.iloc[rows[cols == c], c] = np.nan
+    return df
+
+def _proc_status_mb(key: str) -> float | None:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith(key + ":"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+def _reset_peak_rss() -> bool:
+    """Resets VmHWM (Linux); False where unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _stage_fns(data_path: Path, work_dir: Path):
+    """
+    Per stage: (setup, run). `setup(state)` builds fresh untimed inputs from
+    earlier stages' outputs; `run(*inputs)` is the timed call, whose result is
+    stored in `state` for the next stage.
+    """
+    def train(df):
+        # Silence the baseline print of train_regression_model
+        with contextlib.redirect_stdout(io.StringIO()):
+            return modeling.train_regression_model(df)
+
+    return {
+        "read_df": (lambda s: (data_path,), read_df),
+        "drop_missing": (lambda s: (s["read_df"],), drop_missing),
+        "winsorize_df": (lambda s: (s["drop_missing"], list(s["drop_missing"].select_dtypes("number").columns), 0.01, 0.99),
+                         winsorize_df),
+        # create_features adds columns in place, so every run gets its own copy
+        "create_features": (lambda s: (s["winsorize_df"].copy(),), feature_engineering.create_features),
+        "train_regression_model": (lambda s: (s["create_features"].dropna(),), train),
+        "save_evaluation_metrics": (lambda s: (s["train_regression_model"][2], s["train_regression_model"][3],
+                                               work_dir / "evaluation_metrics.txt"),
+                                    evaluation.save_evaluation_metrics),
+        "run_eda": (lambda s: (s["create_features"].dropna(), work_dir, "SYN"), eda.run_eda),
+        "plot_predictions": (lambda s: (s["train_regression_model"][2], s["train_regression_model"][3], work_dir),
+                             reporting.plot_predictions),
+    }
+
+def _shape(obj):
+    if isinstance(obj, pd.DataFrame):
+        return list(obj.shape)
+    if isinstance(obj, tuple) and obj and isinstance(obj[0], (pd.DataFrame, pd.Series, np.ndarray)):
+        return list(np.shape(obj[0]))
+    return None
+
+def bench_stage(setup, run, state: dict, repeats: int, memory: bool) -> tuple:
+    times, result = [], None
+    for _ in range(repeats):
+        inputs = setup(state)
+        gc.collect()
+        start = time.perf_counter()
+        result = run(*inputs)
+        times.append(time.perf_counter() - start)
+        del inputs
+    entry = {"time_s": statistics.median(times), "times_s": times}
+    if memory:
+        inputs = setup(state)
+        gc.collect()
+        # tracemalloc sees Python and NumPy allocations; the RSS high-water mark
+        # also covers native ones (e.g. Arrow buffers in read_df)
+        rss_before = _proc_status_mb("VmRSS")
+        hwm = _reset_peak_rss()
+        tracemalloc.start()
+        try:
+            run(*inputs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        entry["peak_mb"] = peak / 2**20
+        if hwm and rss_before is not None:
+            entry["peak_rss_delta_mb"] = _proc_status_mb("VmHWM") - rss_before
+    return entry, result
+
+def run_scale(n_rows: int, stages: list, args) -> dict:
+    results = {}
+    # Stages needed to produce the inputs of the selected ones also run, untimed if not selected
+    last = max(STAGES.index(s) for s in stages)
+    with tempfile.TemporaryDirectory(prefix="pipeline_bench_") as tmp:
+        tmp = Path(tmp)
+        data_path = tmp / f"ohlcv.{args.format}"
+        df = make_ohlcv(n_rows, args.missing_rate, args.seed)
+        write_df(df, data_path)
+        del df
+        fns = _stage_fns(data_path, tmp)
+        state: dict = {}
+        repeats = args.repeats if n_rows < 10_000_000 else 1
+        for name in STAGES[:last + 1]:
+            setup, run = fns[name]
+            if name in PLOT_STAGES and n_rows > args.plot_max_rows:
+                if name in stages:
+                    results[name] = {"skipped": f"more than {args.plot_max_rows} rows"}
+                continue
+            if name in stages:
+                entry, state[name] = bench_stage(setup, run, state, repeats, not args.no_memory)
+                entry["shape_out"] = _shape(state[name])
+                results[name] = entry
+                mem = f"  peak {entry['peak_mb']:9.1f} MB" if "peak_mb" in entry else ""
+                if "peak_rss_delta_mb" in entry:
+                    mem += f"  rss +{entry['peak_rss_delta_mb']:9.1f} MB"
+                print(f"  {scale_label(n_rows):>6} {name:<24} {entry['time_s']:9.4f} s{mem}", file=sys.stderr)
+            else:
+                state[name] = run(*setup(state))
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float, memory_tolerance: float) -> list:
+    """Stage measurements worse than the baseline beyond tolerance, as readable lines."""
+    regressions = []
+    for scale, stages in results["results"].items():
+        for stage, entry in stages.items():
+            base = baseline.get("results", {}).get(scale, {}).get(stage)
+            if not base or "time_s" not in base or "time_s" not in entry:
+                continue
+            t, bt = entry["time_s"], base["time_s"]
+            if t > bt * (1 + tolerance) and t - bt > MIN_TIME_DELTA_S:
+                regressions.append(f"{scale} {stage}: time {t:.4f} s vs baseline {bt:.4f} s (+{t / bt - 1:.0%})")
+            for key in ("peak_mb", "peak_rss_delta_mb"):
+                m, bm = entry.get(key), base.get(key)
+                if m is not None and bm is not None and m > bm * (1 + memory_tolerance) and m - bm > MIN_MEMORY_DELTA_MB:
+                    regressions.append(f"{scale} {stage}: {key} {m:.1f} MB vs baseline {bm:.1f} MB (+{m / bm - 1:.0%})")
+    return regressions
+
+def main():
+    args = parse_arguments()
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = sorted(set(stages) - set(STAGES))
+    if unknown:
+        raise SystemExit(f"Unknown stages: {', '.join(unknown)}")
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "format": args.format,
+            "repeats": args.repeats,
+        },
+        "results": {},
+    }
+    for n_rows in sorted(parse_scale(s) for s in args.scales.split(",")):
+        report["results"][scale_label(n_rows)] = run_scale(n_rows, stages, args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text)
+    print(text)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(text)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.", file=sys.stderr)
+        return
+    regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance, args.memory_tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
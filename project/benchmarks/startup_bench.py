@@ -0,0 +1,128 @@
+"""
+Measures the start-up cost of each main.py command with `python -X importtime`.
+
+Every command runs in a fresh interpreter, in pipeline order (clean, features,
+train, evaluate, report, each reading the previous one's outputs from a
+temporary --work-dir), followed by run-all and `--help`. For each the benchmark
+reports the wall time, the total time spent importing, and the top-level
+packages that cost the most. Stages run sequentially (--stage-workers 1),
+since -X importtime cannot attribute imports made by concurrent threads.
+
+    python project/benchmarks/startup_bench.py
+    python project/benchmarks/startup_bench.py --commands help,clean --top 10
+    python project/benchmarks/startup_bench.py --max-help-import-ms 50
+
+The exit status is 1 when parsing the command line alone (`--help`) imports
+for longer than --max-help-import-ms, i.e. when a heavy dependency has crept
+back into main.py's module-level imports.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+MAIN = PROJECT_DIR / "main.py"
+COMMANDS = ["clean", "features", "train", "evaluate", "report", "run-all", "help"]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Measure the import and start-up time of each main.py command.")
+    parser.add_argument("--commands", default=",".join(COMMANDS), help="Comma-separated subset of: " + ", ".join(COMMANDS))
+    parser.add_argument("--raw-data-path", type=Path, default=PROJECT_DIR / "data" / "raw" / "api_aapl.csv")
+    parser.add_argument("--top", type=int, default=5, help="Most expensive top-level imports listed per command.")
+    parser.add_argument("--max-help-import-ms", type=float, default=100.0,
+                        help="Fail when `main.py --help` spends longer than this importing.")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results JSON here.")
+    return parser.parse_args()
+
+def parse_importtime(stderr: str) -> list:
+    """(module, self_us, cumulative_us) for each top-level import in -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two more spaces per level
+        if not self_us.strip().isdigit() or name.startswith("  "):
+            continue
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+def run_command(command: str, args, work: Path) -> dict:
+    argv = [sys.executable, "-X", "importtime", str(MAIN)]
+    if command == "help":
+        argv.append("--help")
+    else:
+        argv += [
+            command,
+            "--raw-data-path", str(args.raw_data_path),
+            "--processed-format", "csv",
+            "--processed-data-dir", str(work / "processed"),
+            "--model-path", str(work / "models" / "regression_model.pkl"),
+            "--reports-dir", str(work / "reports"),
+            "--work-dir", str(work / "interim"),
+            "--no-cache",
+            # -X importtime cannot attribute imports made by concurrent threads
+            "--stage-workers", "1",
+        ]
+    started = time.perf_counter()
+    proc = subprocess.run(argv, capture_output=True, text=True, cwd=PROJECT_DIR.parent)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"{command} failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    imports = parse_importtime(proc.stderr)
+    top = sorted(imports, key=lambda i: i[2], reverse=True)[:args.top]
+    return {
+        "wall_ms": round(wall * 1000, 1),
+        "import_ms": round(sum(i[2] for i in imports) / 1000, 1),
+        "top_imports_ms": {name: round(cumulative / 1000, 1) for name, _, cumulative in top},
+    }
+
+def main():
+    args = parse_arguments()
+    commands = [c.strip() for c in args.commands.split(",") if c.strip()]
+    unknown = sorted(set(commands) - set(COMMANDS))
+    if unknown:
+        raise SystemExit(f"Unknown commands: {', '.join(unknown)}")
+
+    # Interpreter start-up alone, to tell the pipeline's share apart
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    interpreter_ms = (time.perf_counter() - started) * 1000
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "interpreter_ms": round(interpreter_ms, 1),
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for command in commands:
+            report["results"][command] = run_command(command, args, Path(tmp))
+            print(f"{command:<9} {report['results'][command]['wall_ms']:8.0f} ms wall "
+                  f"{report['results'][command]['import_ms']:8.0f} ms importing", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text)
+    print(text)
+
+    help_ms = report["results"].get("help", {}).get("import_ms")
+    if help_ms is not None and help_ms > args.max_help_import_ms:
+        print(f"REGRESSION main.py --help imports for {help_ms:.0f} ms (limit {args.max_help_import_ms:.0f} ms)",
+              file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# Production server for app.py:
+#   cd project && gunicorn app:app
+# Each worker process loads the model once and runs its own micro-batcher;
+# the threads of a worker are the concurrent requests it coalesces.
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', '32'))
+# Reuse connections from load balancers / clients instead of reconnecting per request
+keepalive = 5
+backlog = 2048
@@ -1,23 +1,50 @@
-import pandas as pd
 from pathlib import Path
 import pickle
 import argparse
+import json
+import os
+import sys
+import time
+import traceback
 from datetime import datetime # Import the datetime library
 
-# Import our custom modules
-from src.storage import read_df, write_df
-from src.cleaning import drop_missing
-from src.outliers import winsorize_df
+# Project modules, and with them pandas, scikit-learn and matplotlib, are
+# imported inside the functions that use them: parsing the command line stays
+# cheap, and a single-stage command only loads its own stage's dependencies.
 
-# Import pipeline stage scripts
-from scripts import eda, feature_engineering, modeling, evaluation, reporting
+# Batch mode's per-symbol coefficient matrix (scripts.modeling.ModelBank), saved as a src.artifacts directory
+MODEL_BANK_DIRNAME = "model_bank"
+# Per-run task checkpoints under the reports directory, kept only until the run succeeds
+CHECKPOINT_DIRNAME = ".checkpoints"
 
-def parse_arguments():
+COMMANDS = {
+    "run-all": "Run every stage (the default when no command is given).",
+    "ingest": "Append raw rows newer than each symbol's watermark to the processed dataset (as --incremental).",
+    "clean": "Load and clean the raw data and fit the winsorizer.",
+    "features": "Build features from the cleaned data and save the processed data.",
+    "train": "Train, save and publish the model with its drift monitor (and run the walk-forward backtest if requested).",
+    "evaluate": "Write the evaluation report for the trained model.",
+    "report": "Draw the EDA and prediction figures.",
+}
+# Pipeline tasks run by each single-stage command. Their results are kept under
+# --work-dir so the next command, e.g. in another cron job, can pick them up.
+STAGE_TASKS = {
+    "clean": ("clean",),
+    "features": ("features", "save_processed"),
+    "train": ("train", "save_model", "monitor", "walk_forward"),
+    "evaluate": ("evaluate",),
+    "report": ("eda", "report"),
+}
+TASK_COMMANDS = {task: command for command, tasks in STAGE_TASKS.items() for task in tasks}
+
+def parse_arguments(argv: list | None = None):
     """
-    Parses command-line arguments for the pipeline.
+    Parses command-line arguments for the pipeline. The first argument may name
+    a command (see COMMANDS); without one, run-all is assumed.
     """
-    parser = argparse.ArgumentParser(description="Run the end-to-end financial data pipeline.")
-    
+    # Every command accepts the same options and uses those relevant to its stages
+    parser = argparse.ArgumentParser(add_help=False)
+
     parser.add_argument(
         "--raw-data-path",
         type=Path,
@@ -29,7 +56,15 @@ def parse_arguments():
         "--processed-data-dir",
         type=Path,
         default=Path("project/data/processed"),
-        help="Directory to save the processed data with a timestamp."
+        help="Directory to save the processed data."
+    )
+    parser.add_argument(
+        "--processed-format",
+        choices=["dataset", "csv"],
+        default="dataset",
+        help="'dataset' writes to a symbol/year-partitioned Parquet dataset under <processed-data-dir>/features, "
+             "replacing the symbol's partitions from earlier runs; "
+             "'csv' writes a timestamped CSV per run."
     )
     parser.add_argument(
         "--model-path",
@@ -43,88 +78,1048 @@ def parse_arguments():
         default=Path("project/reports"),
         help="Directory to save reports and figures."
     )
-    
-    return parser.parse_args()
 
-def main():
+    parser.add_argument(
+        "--feature-spec",
+        type=str,
+        default=None,
+        help="Extra features as JSON or a path to a JSON file, e.g. "
+             "'{\"returns\": [1, 5, 20], \"sma\": [5, 20, 60], \"vol\": [5, 20], \"rsi\": [14], \"atr\": true}'. "
+             "They are computed in one vectorized pass and added to the model's features."
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="Memory-lean mode: downcast OHLCV columns to float32/int32 where lossless and clean/winsorize "
+             "in place instead of copying; prints the bytes saved per stage."
+    )
+    parser.add_argument(
+        "--walk-forward",
+        choices=["expanding", "rolling"],
+        default=None,
+        help="Also run a walk-forward backtest with an expanding or rolling training window and "
+             "save its out-of-sample predictions to <reports-dir>/walk_forward_predictions.csv."
+    )
+    parser.add_argument(
+        "--wf-train-size",
+        type=int,
+        default=252,
+        help="Walk-forward training window length in rows (the initial window for 'expanding')."
+    )
+    parser.add_argument(
+        "--wf-step",
+        type=int,
+        default=1,
+        help="Rows between walk-forward refits; each fit predicts the next --wf-step rows."
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Add N-resample bootstrap confidence intervals for R², RMSE and MAE to the evaluation report."
+    )
+    parser.add_argument(
+        "--bootstrap-method",
+        choices=["iid", "block", "stationary"],
+        default="stationary",
+        help="Resampling scheme; 'block' and 'stationary' keep runs of consecutive days together "
+             "to respect autocorrelation in returns."
+    )
+    parser.add_argument(
+        "--bootstrap-block-length",
+        type=int,
+        default=None,
+        help="(Mean) block length for block/stationary resampling (default: n ** (1/3))."
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run every stage under cProfile and save <reports-dir>/profiles/<timestamp>/<stage>.prof "
+             "plus a text summary of its top functions."
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Add each stage's tracemalloc peak to the stage log (slows allocation-heavy stages)."
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path("project/data/cache"),
+        help="Stage cache directory; stages whose input data, parameters and code are unchanged are "
+             "loaded from here instead of recomputed."
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=None,
+        help="Size limit of the stage cache (default: 2048); least recently used entries are evicted beyond it."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute every stage without reading or writing the stage cache."
+    )
+    parser.add_argument(
+        "--stage-workers",
+        type=int,
+        default=4,
+        help="Threads running independent pipeline stages concurrently (1 runs them in sequence)."
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=1,
+        help="Extra attempts for a failed stage before its dependents are skipped."
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Save each completed stage's result under <reports-dir>/.checkpoints, so that a failed run "
+             "can be continued with --resume. Off by default: it pickles every stage's output."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue a failed --checkpoint run with the same configuration from its checkpoints "
+             "(<reports-dir>/.checkpoints), re-running only the stages that had not completed."
+    )
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=0,
+        help="Render figures in a background pool of this many processes while modeling continues "
+             "(0 renders them in the pipeline's own threads). In batch mode each worker keeps one pool "
+             "for all its symbols."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only ingest rows newer than each symbol's high-water mark into the processed dataset "
+             "(load, clean, winsorize with frozen bounds, featurize); skips EDA, modeling and reporting."
+    )
+    parser.add_argument(
+        "--state-dir",
+        type=Path,
+        default=Path("project/data/state"),
+        help="Directory holding the per-symbol watermark and rolling-window state for --incremental."
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="With --incremental, stream a symbol's first (full-history) ingestion in chunks of this many "
+             "rows, so memory follows the chunk size; its winsorization bounds are then sketch estimates."
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=Path("project/data/interim"),
+        help="Where single-stage commands keep their outputs, per symbol, for the commands that follow "
+             "(e.g. 'clean' writes what 'features' reads). run-all does not use it."
+    )
+
+    # --- Batch (multi-symbol) mode ---
+    batch = parser.add_argument_group("batch mode", "Run the pipeline for many symbols across a process pool.")
+    batch.add_argument(
+        "--symbols",
+        nargs="+",
+        default=None,
+        help="Tickers to process; each is read from <raw-data-dir>/api_<symbol>.csv."
+    )
+    batch.add_argument(
+        "--symbols-file",
+        type=Path,
+        default=None,
+        help="CSV with a 'Symbol' column (e.g. the stage04 S&P 500 scrape) listing the tickers to process."
+    )
+    batch.add_argument(
+        "--raw-data-glob",
+        type=str,
+        default=None,
+        help="Glob of raw CSVs to process, e.g. 'project/data/raw/api_*.csv'. The symbol is taken from the file name."
+    )
+    batch.add_argument(
+        "--raw-data-dir",
+        type=Path,
+        default=Path("project/data/raw"),
+        help="Directory holding api_<symbol>.csv files for --symbols/--symbols-file."
+    )
+    batch.add_argument(
+        "--model-bank",
+        action="store_true",
+        help="After the batch, fit one model per symbol in a single batched solve over the processed "
+             "dataset and save it as a memory-mappable artifact in <model dir>/model_bank/ (requires --processed-format dataset)."
+    )
+    batch.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes for batch mode (default: number of CPUs)."
+    )
+
+    cli = argparse.ArgumentParser(
+        description="Run the end-to-end financial data pipeline, or one stage of it.",
+        epilog="Without a command, run-all is assumed, e.g. 'main.py --symbols AAPL MSFT'. "
+               "See 'main.py <command> --help' for the options.",
+    )
+    commands = cli.add_subparsers(dest="command", metavar="command")
+    for name, description in COMMANDS.items():
+        commands.add_parser(name, parents=[parser], help=description, description=description)
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["run-all", *argv]
+    return cli.parse_args(argv)
+
+def load_feature_spec(value: str | None) -> dict | None:
     """
-    Main function to run the end-to-end data processing and modeling pipeline.
+    Parses --feature-spec, given either inline JSON or a path to a JSON file.
     """
-    args = parse_arguments()
-    
-    # --- Create a timestamp for unique output file names ---
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    print("--- Starting pipeline with the following configuration ---")
-    print(f"Run timestamp: {timestamp}")
-    print(f"Raw data: {args.raw_data_path}")
-    print(f"Processed data output directory: {args.processed_data_dir}")
-    print(f"Model output: {args.model_path}")
-    print(f"Reports directory: {args.reports_dir}")
-    print("----------------------------------------------------------")
+    if not value:
+        return None
+    path = Path(value)
+    if path.suffix == ".json" and path.exists():
+        value = path.read_text()
+    return json.loads(value)
+
+def stage_cache(args):
+    """
+    The stage cache (src.cache.StageCache) configured on the command line, or None with --no-cache.
+    """
+    if args.no_cache:
+        return None
+    from src.cache import DEFAULT_MAX_BYTES, StageCache
+    max_bytes = args.cache_max_mb * 2**20 if args.cache_max_mb is not None else DEFAULT_MAX_BYTES
+    return StageCache(args.cache_dir, max_bytes=max_bytes)
+
+def walk_forward_config(args) -> dict | None:
+    """
+    Keyword arguments for modeling.walk_forward from the CLI, or None when disabled.
+    """
+    if not args.walk_forward:
+        return None
+    return {"mode": args.walk_forward, "train_size": args.wf_train_size, "step": args.wf_step}
+
+def bootstrap_config(args, workers: int = 1) -> dict | None:
+    """
+    Keyword arguments for evaluation.bootstrap_metrics from the CLI, or None when disabled.
+    """
+    if args.bootstrap <= 0:
+        return None
+    return {
+        "n_boot": args.bootstrap,
+        "method": args.bootstrap_method,
+        "block_length": args.bootstrap_block_length,
+        "workers": workers,
+    }
+
+def symbol_from_path(path: Path) -> str:
+    """
+    Derives a ticker from a raw file name, e.g. 'api_aapl.csv' -> 'AAPL'.
+    """
+    stem = path.stem
+    if stem.startswith("api_"):
+        stem = stem[len("api_"):]
+    return stem.upper()
+
+def resolve_batch_inputs(args) -> list:
+    """
+    Builds the list of (symbol, raw_data_path) pairs requested on the command line.
+    """
+    inputs = {}
+    symbols = list(args.symbols or [])
+    if args.symbols_file is not None:
+        import pandas as pd
+        universe = pd.read_csv(args.symbols_file)
+        symbols.extend(universe["Symbol"].dropna().astype(str).tolist())
+    for symbol in symbols:
+        symbol = symbol.strip().upper()
+        inputs[symbol] = args.raw_data_dir / f"api_{symbol.lower()}.csv"
+    if args.raw_data_glob:
+        for path in sorted(Path().glob(args.raw_data_glob)):
+            inputs.setdefault(symbol_from_path(path), path)
+    return sorted(inputs.items())
+
+def run_pipeline(
+    raw_data_path: Path,
+    processed_data_dir: Path,
+    model_path: Path,
+    reports_dir: Path,
+    symbol: str = "AAPL",
+    timestamp: str | None = None,
+    processed_format: str = "dataset",
+    feature_spec: dict | None = None,
+    lean: bool = False,
+    walk_forward: dict | None = None,
+    bootstrap: dict | None = None,
+    profile: bool = False,
+    trace_memory: bool = False,
+    cache=None,
+    stage_workers: int = 4,
+    retries: int = 1,
+    resume: bool = False,
+    checkpoint: bool = False,
+    render_workers: int = 0,
+    stages: tuple | None = None,
+    work_dir: Path | None = None,
+) -> dict:
+    """
+    Runs load -> clean -> EDA -> features -> model -> evaluation -> report for one raw file.
+    Returns a summary dictionary with row counts and evaluation metrics.
+    With `lean`, frames are downcast and modified in place (see --lean).
+    `walk_forward` holds modeling.walk_forward keyword arguments (mode, train_size, step)
+    and `bootstrap` evaluation.bootstrap_metrics keyword arguments.
+    Per-stage timings, memory and row counts are appended to <reports_dir>/run_log.jsonl;
+    `profile` also saves a cProfile per stage and `trace_memory` adds tracemalloc peaks.
+    With a `cache` (src.cache.StageCache), stages whose inputs, parameters and code are unchanged
+    reuse their stored outputs.
+    Independent stages run concurrently on `stage_workers` threads; failed stages are retried
+    `retries` times. `checkpoint` pickles each completed stage's result, and `resume`
+    continues a failed run from those checkpoints (checkpointing as it goes).
+    `render_workers` > 0 draws the figures in a background process pool of that size.
+    `stages` restricts the run to those tasks (see STAGE_TASKS): the results they need from
+    earlier stages are read from, and their own written to, <work_dir>/<symbol>.
+    """
+    from src.instrumentation import RUN_LOG_FILENAME, StageRecorder
+
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    if (stages is None or "clean" in stages) and not raw_data_path.exists():
+        raise FileNotFoundError(f"Input data file not found at {raw_data_path}")
+    if stages is not None and work_dir is None:
+        raise ValueError("Running a subset of the stages needs a work_dir for their inputs and outputs")
+
+    # --- Construct output paths ---
+    if processed_format == "dataset":
+        # One shared dataset; re-running a symbol replaces its partitions
+        PROCESSED_DATA_PATH = processed_data_dir / "features"
+    else:
+        PROCESSED_DATA_PATH = processed_data_dir / f"{symbol.lower()}_processed_{timestamp}.csv"
+    FIGURES_DIR = reports_dir / "figures"
+    EVALUATION_REPORT_PATH = reports_dir / "evaluation_metrics.txt"
 
-    # --- Construct dynamic paths using the timestamp ---
-    processed_filename = f"aapl_processed_{timestamp}.csv"
-    PROCESSED_DATA_PATH = args.processed_data_dir / processed_filename
-    FIGURES_DIR = args.reports_dir / "figures"
-    EVALUATION_REPORT_PATH = args.reports_dir / "evaluation_metrics.txt"
-    
     # --- Ensure output directories exist ---
-    args.processed_data_dir.mkdir(parents=True, exist_ok=True)
-    args.model_path.parent.mkdir(parents=True, exist_ok=True)
+    processed_data_dir.mkdir(parents=True, exist_ok=True)
+    model_path.parent.mkdir(parents=True, exist_ok=True)
     FIGURES_DIR.mkdir(parents=True, exist_ok=True)
 
-    # --- 1. Load Data ---
-    print(f"1. Loading data from {args.raw_data_path}...")
-    if not args.raw_data_path.exists():
-        print(f"Error: Input data file not found at {args.raw_data_path}")
-        return
-    df = read_df(args.raw_data_path)
-    print("Data loaded successfully.")
+    recorder = StageRecorder(
+        timestamp,
+        symbol=symbol,
+        log_path=reports_dir / RUN_LOG_FILENAME,
+        profile_dir=reports_dir / "profiles" / timestamp if profile else None,
+        trace_memory=trace_memory,
+    )
+    if profile or trace_memory:
+        # cProfile and tracemalloc cannot tell overlapping stages apart
+        stage_workers = 1
+    started = time.perf_counter()
+    try:
+        summary = _run_stages(
+            recorder, cache, raw_data_path, PROCESSED_DATA_PATH, model_path, reports_dir, FIGURES_DIR,
+            EVALUATION_REPORT_PATH, symbol, processed_format, feature_spec, lean, walk_forward, bootstrap,
+            stage_workers, retries, resume, checkpoint, render_workers,
+            stages, work_dir / symbol if work_dir is not None else None,
+        )
+    finally:
+        # Written even when a stage fails, so the log shows where the run stopped
+        log_path = recorder.write()
+        print(recorder.summary())
+        print(f"Stage log appended to {log_path}")
+    summary["run_seconds"] = time.perf_counter() - started
+    summary["stage_seconds"] = sum(r.wall_s for r in recorder.records)
+    if cache is not None:
+        summary["cache_hits"] = sum(r.cache == "hit" for r in recorder.records)
+    return summary
+
+def model_features(feature_spec: dict | None) -> list:
+    """
+    The model's input columns: modeling.DEFAULT_FEATURES plus those of --feature-spec.
+    """
+    from scripts.modeling import DEFAULT_FEATURES
+    if not feature_spec:
+        return DEFAULT_FEATURES
+    from src.features import feature_names
+    return DEFAULT_FEATURES + feature_names(feature_spec)
 
-    # --- 2. Data Cleaning & Outlier Handling ---
-    print("2. Cleaning data and handling outliers...")
-    df_clean = drop_missing(df)
-    numeric_cols = df_clean.select_dtypes(include='number').columns
-    df_winsorized = winsorize_df(df_clean, columns=numeric_cols, lower=0.01, upper=0.99)
-    print("Cleaning and outlier handling complete.")
+def training_window(train_rows) -> dict:
+    """
+    First and last date and the row count of a model's training rows, for its artifact manifest.
+    """
+    window = {"rows": len(train_rows), "start": None, "end": None}
+    if "date" in train_rows.columns and len(train_rows):
+        window["start"], window["end"] = str(train_rows["date"].min()), str(train_rows["date"].max())
+    return window
+
+def train_rows(features, X_test):
+    """
+    The rows of the featured frame a model was trained on: those before its test split.
+    """
+    return features.iloc[:features.index.get_loc(X_test.index[0])]
+
+def print_alerts(report: dict) -> None:
+    """
+    Prints the threshold breaches of a src.monitoring check.
+    """
+    for alert in report["alerts"]:
+        feature = f" {alert['feature']}" if alert["feature"] else ""
+        print(f"ALERT {alert['metric']}{feature}: {alert['value']:.4f} > {alert['threshold']}")
+
+def _load_stage_output(stage_dir: Path, name: str):
+    """
+    Result of task `name` saved by an earlier single-stage command.
+    """
+    path = stage_dir / f"{name}.pkl"
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No '{name}' output at {path}; run 'main.py {TASK_COMMANDS[name]}' first (with the same --work-dir)"
+        )
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def _save_stage_output(stage_dir: Path, name: str, value) -> None:
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    tmp = stage_dir / f".{name}.pkl.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(stage_dir / f"{name}.pkl")
+
+def _cached(cache, st, key: str | None, compute, outputs=()):
+    """
+    Runs `compute` through the stage cache when one is configured, noting the
+    hit or miss on the stage record `st`.
+    """
+    if cache is None:
+        return compute()
+    value, hit = cache.cached(key, compute, outputs)
+    st.cache = "hit" if hit else "miss"
+    return value
+
+def _run_stages(
+    recorder,
+    cache,
+    raw_data_path: Path,
+    PROCESSED_DATA_PATH: Path,
+    model_path: Path,
+    reports_dir: Path,
+    FIGURES_DIR: Path,
+    EVALUATION_REPORT_PATH: Path,
+    symbol: str,
+    processed_format: str,
+    feature_spec: dict | None,
+    lean: bool,
+    walk_forward: dict | None,
+    bootstrap: dict | None,
+    stage_workers: int = 4,
+    retries: int = 1,
+    resume: bool = False,
+    checkpoint: bool = False,
+    render_workers: int = 0,
+    stages: tuple | None = None,
+    stage_dir: Path | None = None,
+) -> dict:
+    """
+    Runs the stages as a DAG: after cleaning, EDA runs alongside features and
+    training, and saving the data and model, the walk-forward backtest,
+    evaluation and the prediction plot all run concurrently once their inputs
+    are ready. Plots are drawn without pyplot, so they may overlap too; with
+    `render_workers` they are rendered in a background process pool.
+    With `stages`, only those tasks run; their inputs come from `stage_dir`.
+    """
+    from src.orchestration import DAG, Task, config_signature
+
+    if cache is not None and not raw_data_path.exists():
+        # Every key chains from the raw file's hash; a later single-stage command may run without it
+        cache = None
+    # Chained stage keys: each hashes its upstream key, so a change only invalidates what follows it.
+    # Stage code is named rather than imported, so hashing it does not load the stage's dependencies.
+    keys = {}
+    if cache is not None:
+        from src.cache import hash_path
+        keys["clean"] = cache.key(
+            "clean", hash_path(raw_data_path),
+            params={"lower": 0.01, "upper": 0.99, "lean": lean}, code=("src.cleaning", "src.outliers"),
+        )
+        keys["eda"] = cache.key("eda", keys["clean"], params={"symbol": symbol}, code=("scripts.eda",))
+        keys["features"] = cache.key(
+            "features", keys["clean"], params={"spec": feature_spec},
+            code=("scripts.feature_engineering", "src.features"),
+        )
+        keys["train"] = cache.key("train", keys["features"], code=("scripts.modeling",))
+        keys["walk_forward"] = cache.key(
+            "walk_forward", keys["features"], params=walk_forward, code=("scripts.modeling",)
+        )
+        # The worker count does not change the resamples, only how they are split
+        keys["bootstrap"] = cache.key(
+            "bootstrap", keys["train"],
+            params={k: v for k, v in (bootstrap or {}).items() if k != "workers"}, code=("scripts.evaluation",),
+        )
+        keys["report"] = cache.key("report", keys["train"], code=("scripts.reporting",))
+
+    # --- 1-2. Load, Clean & Handle Outliers ---
+    def run_clean():
+        from src.storage import read_df
+        from src.cleaning import drop_missing, downcast_numeric, frame_nbytes
+        from src.outliers import Winsorizer
+
+        # A cached cleaning result skips reading the raw file altogether
+        hit, cleaned = cache.get(keys["clean"]) if cache is not None else (False, None)
+        if hit:
+            print("1-2. Loaded cleaned data from the stage cache.")
+            with recorder.stage("clean") as st:
+                st.cache = "hit"
+                st.output(cleaned[1])
+            return cleaned
+
+        print(f"1. Loading data from {raw_data_path}...")
+        with recorder.stage("load") as st:
+            df = read_df(raw_data_path)
+            rows_raw = len(df)
+            memory_log = []
+            if lean:
+                nbytes = frame_nbytes(df)
+                downcast_numeric(df, inplace=True)
+                memory_log.append(("downcast", nbytes, frame_nbytes(df)))
+            st.output(df)
+        print("Data loaded successfully.")
+
+        print("2. Cleaning data and handling outliers...")
+        with recorder.stage("clean", df) as st:
+            # In lean mode each step's frame is measured before and after it runs
+            nbytes = frame_nbytes(df) if lean else 0
+            df_clean = drop_missing(df, inplace=lean)
+            if lean:
+                memory_log.append(("drop_missing", nbytes, frame_nbytes(df_clean)))
+                nbytes = frame_nbytes(df_clean)
+            numeric_cols = df_clean.select_dtypes(include='number').columns
+            # Fitted once so serving can clip incoming rows to the same training-time limits
+            winsorizer = Winsorizer(lower=0.01, upper=0.99).fit(df_clean, numeric_cols)
+            df_winsorized = winsorizer.transform(df_clean, inplace=lean)
+            if lean:
+                memory_log.append(("winsorize", nbytes, frame_nbytes(df_winsorized)))
+            cleaned = (rows_raw, df_winsorized, winsorizer, memory_log)
+            if cache is not None:
+                st.cache = "miss"
+                cache.put(keys["clean"], cleaned)
+            st.output(df_winsorized)
+        print("Cleaning and outlier handling complete.")
+        return cleaned
 
     # --- 3. Exploratory Data Analysis ---
-    print("3. Generating EDA plots...")
-    eda.run_eda(df_winsorized, FIGURES_DIR)
-    print(f"EDA plots saved to {FIGURES_DIR}")
+    def run_eda(clean):
+        from scripts import eda, rendering
+        render_pool = rendering.shared_pool(render_workers)
+        df_winsorized = clean[1]
+        print("3. Generating EDA plots...")
+        with recorder.stage("eda", df_winsorized) as st:
+            _cached(
+                cache, st, keys.get("eda"),
+                # With a render pool the plots are drawn in another process while this thread waits
+                lambda: rendering.wait_all(eda.run_eda(df_winsorized, FIGURES_DIR, symbol=symbol, pool=render_pool) or []),
+                [FIGURES_DIR / "eda_close_price.png", FIGURES_DIR / "eda_daily_returns.png"],
+            )
+        print(f"EDA plots saved to {FIGURES_DIR}")
 
     # --- 4. Feature Engineering ---
-    print("4. Creating new features...")
-    df_featured = feature_engineering.create_features(df_winsorized)
-    df_featured.dropna(inplace=True)
-    print("Feature engineering complete.")
-    
-    # Save processed data with the timestamped filename
-    write_df(df_featured, PROCESSED_DATA_PATH)
-    print(f"Processed data saved to {PROCESSED_DATA_PATH}")
+    def run_features(clean):
+        from scripts import feature_engineering
+        from src.cleaning import frame_nbytes
+        df_winsorized, memory_log = clean[1], clean[3]
+        print("4. Creating new features...")
+
+        def make_features():
+            df_featured = feature_engineering.create_features(df_winsorized.copy(deep=False))
+            if feature_spec:
+                df_featured = feature_engineering.create_feature_set(df_featured, feature_spec)
+            df_featured.dropna(inplace=True)
+            return df_featured
+
+        with recorder.stage("features", df_winsorized) as st:
+            df_featured = _cached(cache, st, keys.get("features"), make_features)
+            st.output(df_featured)
+        print("Feature engineering complete.")
+        if lean:
+            # Measured sizes (memory_usage(deep=True)); a negative saving means the step grew the frame
+            print("Memory (lean mode):")
+            for stage, before, after in memory_log:
+                print(f"  {stage:<13} frame {before / 1e6:9.2f} MB -> {after / 1e6:9.2f} MB   "
+                      f"saved {(before - after) / 1e6:9.2f} MB")
+            print(f"  {'features':<13} frame {frame_nbytes(df_featured) / 1e6:9.2f} MB")
+        return df_featured
+
+    # Save processed data (partitioned dataset keyed by symbol, or a timestamped CSV)
+    def run_save_processed(features):
+        from src.storage import write_df
+        with recorder.stage("save_processed", features):
+            if processed_format == "dataset":
+                write_df(features.assign(symbol=symbol), PROCESSED_DATA_PATH)
+            else:
+                write_df(features, PROCESSED_DATA_PATH)
+        print(f"Processed data saved to {PROCESSED_DATA_PATH}")
 
     # --- 5. Modeling ---
-    print("5. Training regression model...")
-    model, X_test, y_test, y_pred = modeling.train_regression_model(df_featured)
-    print("Model training complete.")
-    
+    def run_train(features):
+        from scripts import modeling
+        print("5. Training regression model...")
+        with recorder.stage("train", features) as st:
+            trained = _cached(
+                cache, st, keys.get("train"),
+                lambda: modeling.train_regression_model(features, features=model_features(feature_spec)),
+            )
+            st.output(trained[1])
+        print("Model training complete.")
+        return trained
+
     # Save the trained model
-    with open(args.model_path, 'wb') as f:
-        pickle.dump(model, f)
-    print(f"Model saved to {args.model_path}")
+    def run_save_model(clean, features, train):
+        from src.artifacts import frame_hash
+        from src.serving import PREPROCESSING_FILENAME, LinearPredictor
+        from src.model_registry import publish_model
+        model, X_test, winsorizer = train[0], train[1], clean[2]
+        with recorder.stage("save_model"):
+            with open(model_path, 'wb') as f:
+                pickle.dump(model, f)
+            print(f"Model saved to {model_path}")
+            preprocessing_path = model_path.with_name(PREPROCESSING_FILENAME)
+            with open(preprocessing_path, 'wb') as f:
+                pickle.dump([winsorizer], f)
+            print(f"Preprocessing steps saved to {preprocessing_path}")
+            # Memory-mapped by app.py and app_asgi.py (which hot-reloads the registry's current version)
+            rows = train_rows(features, X_test)
+            model_version = publish_model(
+                LinearPredictor.from_model(model, [winsorizer]),
+                model_path.parent / "registry",
+                training_window=training_window(rows),
+                data_hash=frame_hash(rows),
+            )
+        print(f"Model version {model_version} published to {model_path.parent / 'registry'}")
+        return preprocessing_path, model_version
+
+    # Drift monitor: reference histograms from the training rows, then the test split replayed through it
+    def run_monitor(features, train):
+        import numpy as np
+        from src.monitoring import MONITOR_FILENAME, DriftMonitor, psi
+        _, X_test, y_test, y_pred = train
+        print("5c. Building the drift monitor...")
+        with recorder.stage("monitor", X_test):
+            errors = np.abs(np.asarray(y_test, dtype=np.float64) - y_pred)
+            monitor = DriftMonitor.fit(
+                train_rows(features, X_test), model_features(feature_spec), baseline_mae=float(errors.mean())
+            )
+            test_rows = features.loc[X_test.index]
+            at = test_rows["date"] if "date" in test_rows.columns else None
+            monitor.observe(test_rows, at=at).observe_outcomes(y_test, y_pred, at=at)
+            # Historical rows are always stale; freshness is checked on ingestion and serving
+            report = monitor.check(freshness=False)
+            # The window holds only the last days; drift of the whole test period is reported too
+            test_psi = psi(monitor.reference.counts, monitor.reference.empty().update(test_rows).counts)
+            report["test_psi"] = dict(zip(monitor.features, map(float, test_psi)))
+            monitor_path = monitor.save(model_path.parent / MONITOR_FILENAME)
+            with open(reports_dir / "monitoring.json", "w") as f:
+                json.dump(report, f, indent=2)
+        print(f"Drift monitor saved to {monitor_path}; last {monitor.window} days of the test split: "
+              f"MAE {report['mae']:.6f} (baseline {report['baseline_mae']:.6f}), {len(report['alerts'])} alerts")
+        print_alerts(report)
+        return {"test_psi_max": float(test_psi.max()), "mae_7d": report["mae"], "drift_alerts": len(report["alerts"])}
+
+    def run_walk_forward(features):
+        from scripts import evaluation, modeling
+        from src.storage import write_df
+        print(f"5b. Walk-forward backtest ({walk_forward['mode']})...")
+
+        def backtest():
+            wf = modeling.walk_forward(features, features=model_features(feature_spec), **walk_forward)
+            if "date" in features.columns:
+                wf.insert(0, "date", features.loc[wf.index, "date"])
+            return wf
+
+        with recorder.stage("walk_forward", features) as st:
+            wf = _cached(cache, st, keys.get("walk_forward"), backtest)
+            wf_path = reports_dir / "walk_forward_predictions.csv"
+            write_df(wf, wf_path)
+            st.output(wf)
+        wf_metrics = {f"wf_{k}": v for k, v in evaluation.compute_metrics(wf["y_true"], wf["y_pred"]).items()}
+        print(f"Walk-forward: {wf['train_end'].nunique()} fits, {len(wf)} predictions, "
+              f"R²={wf_metrics['wf_r2']:.4f}  RMSE={wf_metrics['wf_rmse']:.6f}; saved to {wf_path}")
+        return wf_metrics
 
     # --- 6. Evaluation ---
-    print("6. Evaluating model performance...")
-    evaluation.save_evaluation_metrics(y_test, y_pred, EVALUATION_REPORT_PATH)
-    print(f"Evaluation report saved to {EVALUATION_REPORT_PATH}")
+    def run_evaluate(train):
+        from scripts import evaluation
+        _, X_test, y_test, y_pred = train
+        print("6. Evaluating model performance...")
+        with recorder.stage("evaluate", X_test) as st:
+            intervals, interval_metrics, label = None, {}, ""
+            if bootstrap:
+                intervals = _cached(
+                    cache, st, keys.get("bootstrap"), lambda: evaluation.bootstrap_metrics(y_test, y_pred, **bootstrap)
+                )
+                interval_metrics = {f"{name}_{end}": ci[end] for name, ci in intervals.items() for end in ("lo", "hi")}
+                label = f"95%, {bootstrap['n_boot']} {bootstrap['method']} resamples"
+            metrics = evaluation.save_evaluation_metrics(y_test, y_pred, EVALUATION_REPORT_PATH, intervals, label)
+        print(f"Evaluation report saved to {EVALUATION_REPORT_PATH}")
+        return metrics, interval_metrics
 
     # --- 7. Reporting ---
-    print("7. Generating final report plots...")
-    reporting.plot_predictions(y_test, y_pred, FIGURES_DIR)
-    print(f"Prediction plot saved to {FIGURES_DIR}")
+    def run_report(train):
+        from scripts import rendering, reporting
+        render_pool = rendering.shared_pool(render_workers)
+        _, X_test, y_test, y_pred = train
+        print("7. Generating final report plots...")
+        with recorder.stage("report", X_test) as st:
+            _cached(
+                cache, st, keys.get("report"),
+                lambda: rendering.wait_all([reporting.plot_predictions(y_test, y_pred, FIGURES_DIR, pool=render_pool)]),
+                [FIGURES_DIR / "report_predictions_vs_actual.png"],
+            )
+        print(f"Prediction plot saved to {FIGURES_DIR}")
+
+    tasks = [
+        Task("clean", run_clean, retries=retries),
+        Task("eda", run_eda, deps=["clean"], retries=retries),
+        Task("features", run_features, deps=["clean"], retries=retries),
+        Task("save_processed", run_save_processed, deps=["features"], retries=retries),
+        Task("train", run_train, deps=["features"], retries=retries),
+        Task("save_model", run_save_model, deps=["clean", "features", "train"], retries=retries),
+        Task("monitor", run_monitor, deps=["features", "train"], retries=retries),
+        Task("evaluate", run_evaluate, deps=["train"], retries=retries),
+        Task("report", run_report, deps=["train"], retries=retries),
+    ]
+    if walk_forward:
+        tasks.append(Task("walk_forward", run_walk_forward, deps=["features"], retries=retries))
+    if stages is not None:
+        tasks = [t for t in tasks if t.name in stages]
+        # Inputs produced by other commands are read up front, so a missing one fails before any
+        # stage runs, and enter the DAG as tasks returning them
+        inputs = {name: _load_stage_output(stage_dir, name)
+                  for name in sorted({d for t in tasks for d in t.deps} - set(stages))}
+        tasks = [Task(name, lambda value=value: value, checkpoint=False) for name, value in inputs.items()] + tasks
+    dag = DAG(tasks)
+
+    signature = config_signature(
+        str(raw_data_path), os.stat(raw_data_path).st_mtime_ns if raw_data_path.exists() else None,
+        str(PROCESSED_DATA_PATH), str(model_path),
+        symbol, processed_format, feature_spec, lean, walk_forward, bootstrap, stages,
+    )
+    results = dag.run(
+        workers=stage_workers,
+        # Results are only pickled when a failed run may be resumed from them
+        checkpoint_dir=reports_dir / CHECKPOINT_DIRNAME if checkpoint or resume else None,
+        resume=resume,
+        signature=signature,
+    )
+    durations = {r.name: r.wall_s for r in recorder.records}
+    # Cleaning is recorded as load + clean, or as a single cache hit
+    durations["clean"] = durations.get("load", 0.0) + durations.get("clean", 0.0)
+    critical_s, critical = dag.critical_path(durations)
+    print(f"Critical path: {' -> '.join(critical)} ({critical_s:.2f} s)")
+    if stages is not None:
+        for name in stages:
+            if name in results:
+                value = results[name]
+                if name == "train":
+                    # Later commands read only the test split and predictions. The model is saved
+                    # by save_model, and unpickling it here would make them import scikit-learn.
+                    value = (None, *value[1:])
+                _save_stage_output(stage_dir, name, value)
+        print(f"Stage outputs saved to {stage_dir}")
 
+    # A single-stage command reports what its own and its input tasks produced
+    summary = {"symbol": symbol}
+    if "clean" in results:
+        summary["rows_raw"] = results["clean"][0]
+    if "features" in results:
+        summary["rows_featured"] = len(results["features"])
+    if "train" in results:
+        summary["rows_test"] = len(results["train"][2])
+    if "evaluate" in results:
+        metrics, interval_metrics = results["evaluate"]
+        summary.update(metrics)
+        summary.update(interval_metrics)
+    summary.update(results.get("walk_forward", {}))
+    summary.update(results.get("monitor", {}))
+    if "save_processed" in results:
+        summary["processed_path"] = str(PROCESSED_DATA_PATH)
+    if "save_model" in results:
+        preprocessing_path, model_version = results["save_model"]
+        summary.update(model_path=str(model_path), preprocessing_path=str(preprocessing_path), model_version=model_version)
+    summary["critical_path_seconds"] = critical_s
+    if lean and "clean" in results:
+        summary["bytes_saved"] = sum(before - after for _, before, after in results["clean"][3])
+    return summary
+
+def run_incremental(
+    raw_data_path: Path,
+    processed_data_dir: Path,
+    state_dir: Path,
+    symbol: str,
+    model_dir: Path | None = None,
+    chunksize: int | None = None,
+) -> dict:
+    """
+    Appends the rows newer than the symbol's watermark to the processed feature dataset.
+    When `model_dir` holds a drift monitor (see the train stage), the new rows, and the
+    published model's errors on them, are added to it and checked.
+    """
+    if not raw_data_path.exists():
+        raise FileNotFoundError(f"Input data file not found at {raw_data_path}")
+    from scripts import incremental
+    monitor = predictor = None
+    monitor_path = None
+    if model_dir is not None:
+        from src.monitoring import MONITOR_FILENAME, DriftMonitor
+        monitor_path = model_dir / MONITOR_FILENAME
+        if monitor_path.exists():
+            from src.model_registry import CURRENT_FILE, open_model
+            monitor = DriftMonitor.load(monitor_path)
+            if (model_dir / "registry" / CURRENT_FILE).exists():
+                predictor = open_model(model_dir / "registry")
+    print(f"Incremental ingestion of {symbol} from {raw_data_path}...")
+    summary = incremental.ingest_incremental(
+        raw_data_path, processed_data_dir / "features", state_dir, symbol, lower=0.01, upper=0.99,
+        monitor=monitor, predictor=predictor, chunksize=chunksize,
+    )
+    print(f"{symbol}: {summary['mode']}, {summary['rows_new']} new rows, watermark {summary['watermark']}")
+    # Also after a batch whose rows all had nulls: the monitor counted them
+    if monitor is not None and summary["mode"] == "append":
+        report = monitor.check()
+        monitor.save(monitor_path)
+        summary["drift_alerts"] = len(report["alerts"])
+        print_alerts(report)
+    return summary
+
+def _run_symbol(
+    symbol: str,
+    raw_data_path: Path,
+    processed_data_dir: Path,
+    model_path: Path,
+    reports_dir: Path,
+    timestamp: str,
+    processed_format: str,
+    state_dir: Path | None = None,
+    feature_spec: dict | None = None,
+    lean: bool = False,
+    walk_forward: dict | None = None,
+    bootstrap: dict | None = None,
+    profile: bool = False,
+    trace_memory: bool = False,
+    cache=None,
+    stage_workers: int = 4,
+    retries: int = 1,
+    resume: bool = False,
+    checkpoint: bool = False,
+    render_workers: int = 0,
+    stages: tuple | None = None,
+    work_dir: Path | None = None,
+    chunksize: int | None = None,
+) -> dict:
+    """
+    Worker entry point for batch mode: runs one symbol into its own output
+    sub-directories and turns failures into a summary row instead of raising.
+    A `state_dir` switches the worker to incremental ingestion.
+    """
+    try:
+        if state_dir is not None:
+            summary = run_incremental(
+                raw_data_path, processed_data_dir, state_dir, symbol, model_path.parent / symbol, chunksize
+            )
+            summary["status"] = "ok"
+            return summary
+        summary = run_pipeline(
+            raw_data_path,
+            # The partitioned dataset is shared; CSV output goes to per-symbol directories
+            processed_data_dir if processed_format == "dataset" else processed_data_dir / symbol,
+            model_path.parent / symbol / model_path.name,
+            reports_dir / symbol,
+            symbol=symbol,
+            timestamp=timestamp,
+            processed_format=processed_format,
+            feature_spec=feature_spec,
+            lean=lean,
+            walk_forward=walk_forward,
+            bootstrap=bootstrap,
+            profile=profile,
+            trace_memory=trace_memory,
+            cache=cache,
+            stage_workers=stage_workers,
+            retries=retries,
+            resume=resume,
+            checkpoint=checkpoint,
+            render_workers=render_workers,
+            stages=stages,
+            work_dir=work_dir,
+        )
+        summary["status"] = "ok"
+    except Exception as e:
+        traceback.print_exc()
+        summary = {"symbol": symbol, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+    return summary
+
+def run_batch(args, inputs: list, timestamp: str):
+    """
+    Fans the per-symbol pipeline out over a process pool and writes a combined summary.
+    Worker processes import pandas/sklearn/matplotlib once and are reused across symbols.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import pandas as pd
+    from src.storage import write_df
+
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Running batch mode for {len(inputs)} symbols on {workers} worker processes...")
+
+    feature_spec = load_feature_spec(args.feature_spec)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _run_symbol,
+                symbol,
+                path,
+                args.processed_data_dir,
+                args.model_path,
+                args.reports_dir,
+                timestamp,
+                args.processed_format,
+                args.state_dir if args.incremental else None,
+                feature_spec,
+                args.lean,
+                walk_forward_config(args),
+                # Symbols already run in parallel; each one bootstraps in its own process
+                bootstrap_config(args, workers=1),
+                args.profile,
+                args.trace_memory,
+                stage_cache(args),
+                args.stage_workers,
+                args.retries,
+                args.resume,
+                args.checkpoint,
+                args.render_workers,
+                STAGE_TASKS.get(args.command),
+                args.work_dir,
+                args.chunksize,
+            ): symbol
+            for symbol, path in inputs
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            summary = future.result()
+            results.append(summary)
+            print(f"[{done}/{len(inputs)}] {summary['symbol']}: {summary['status']}")
+
+    summary_df = pd.DataFrame(results).sort_values("symbol").reset_index(drop=True)
+    summary_path = args.reports_dir / f"batch_summary_{timestamp}.csv"
+    write_df(summary_df, summary_path)
+    n_failed = int((summary_df["status"] != "ok").sum())
+    print(f"Batch summary saved to {summary_path} ({len(summary_df) - n_failed} ok, {n_failed} failed)")
+    return summary_df
+
+def build_model_bank(args, symbols: list, feature_spec: dict | None = None):
+    """
+    Fits every symbol's regression at once from the shared feature dataset,
+    saves the resulting ModelBank as an artifact and writes per-symbol test metrics.
+    """
+    import pandas as pd
+    from scripts import evaluation, modeling
+    from src.artifacts import frame_hash
+    from src.storage import read_df, write_df
+
+    features = model_features(feature_spec)
+    print(f"Fitting model bank for {len(symbols)} symbols...")
+    df = read_df(args.processed_data_dir / "features", symbols=symbols)
+    bank, preds = modeling.train_model_bank(df, features=features)
+    train_rows = df.drop(index=preds.index)
+    bank_path = bank.save(
+        args.model_path.parent / MODEL_BANK_DIRNAME,
+        training_window=training_window(train_rows),
+        data_hash=frame_hash(train_rows),
+    )
+    metrics = pd.DataFrame(
+        [{"symbol": sym, "rows_test": len(g), **evaluation.compute_metrics(g["y_true"], g["y_pred"])}
+         for sym, g in preds.groupby("symbol")]
+    )
+    metrics_path = args.reports_dir / "model_bank_metrics.csv"
+    write_df(metrics, metrics_path)
+    print(f"Model bank saved to {bank_path}; per-symbol metrics saved to {metrics_path}")
+    return metrics
+
+def main():
+    """
+    Main function to run the end-to-end data processing and modeling pipeline.
+    """
+    args = parse_arguments()
+    if args.command == "ingest":
+        args.incremental = True
+    stages = STAGE_TASKS.get(args.command)
+    if args.model_bank and args.processed_format != "dataset":
+        print("Error: --model-bank reads the partitioned dataset; use --processed-format dataset")
+        return
+
+    # --- Create a timestamp for unique output file names ---
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    print("--- Starting pipeline with the following configuration ---")
+    print(f"Command: {args.command}")
+    print(f"Run timestamp: {timestamp}")
+    print(f"Processed data output directory: {args.processed_data_dir}")
+    print(f"Model output: {args.model_path}")
+    print(f"Reports directory: {args.reports_dir}")
+
+    batch_inputs = resolve_batch_inputs(args)
+    if batch_inputs:
+        print(f"Symbols: {len(batch_inputs)}")
+        print("----------------------------------------------------------")
+        summary_df = run_batch(args, batch_inputs, timestamp)
+        ok = summary_df.loc[summary_df["status"] == "ok", "symbol"].tolist()
+        if args.model_bank and args.command in ("run-all", "train") and not args.incremental and ok:
+            build_model_bank(args, ok, load_feature_spec(args.feature_spec))
+        print("--- Batch pipeline finished ---")
+        return
+
+    print(f"Raw data: {args.raw_data_path}")
+    print("----------------------------------------------------------")
+    if args.incremental:
+        try:
+            run_incremental(
+                args.raw_data_path, args.processed_data_dir, args.state_dir, symbol_from_path(args.raw_data_path),
+                args.model_path.parent, args.chunksize,
+            )
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return
+        print("--- Incremental ingestion finished ---")
+        return
+
+    try:
+        run_pipeline(
+            args.raw_data_path,
+            args.processed_data_dir,
+            args.model_path,
+            args.reports_dir,
+            symbol=symbol_from_path(args.raw_data_path),
+            timestamp=timestamp,
+            processed_format=args.processed_format,
+            feature_spec=load_feature_spec(args.feature_spec),
+            lean=args.lean,
+            walk_forward=walk_forward_config(args),
+            bootstrap=bootstrap_config(args, workers=os.cpu_count() or 1),
+            profile=args.profile,
+            trace_memory=args.trace_memory,
+            cache=stage_cache(args),
+            stage_workers=args.stage_workers,
+            retries=args.retries,
+            resume=args.resume,
+            checkpoint=args.checkpoint,
+            render_workers=args.render_workers,
+            stages=stages,
+            work_dir=args.work_dir,
+        )
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        return
+
+    if stages is not None:
+        print(f"--- Stage '{args.command}' finished successfully ---")
+        return
     print("--- Pipeline finished successfully ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
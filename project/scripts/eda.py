@@ -1,32 +1,30 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 
+from scripts import rendering
+
 # Corrected function definition to accept two arguments
-def run_eda(df: pd.DataFrame, output_dir: Path):
+def run_eda(df: pd.DataFrame, output_dir: Path, symbol: str = 'AAPL', pool=None):
     """
     Generates and saves EDA plots to the specified directory.
+    With a rendering.RenderPool, returns the plots' Futures instead of waiting for them.
     """
-    sns.set(context='talk', style='whitegrid')
-    
-    # Plot 1: Close Price History
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=df, x='date', y='close')
-    plt.title('AAPL Close Price History')
-    plt.ylabel('Close Price (USD)')
-    plt.xlabel('Date')
-    plt.savefig(output_dir / 'eda_close_price.png', dpi=300)
-    plt.close()
+    output_dir = Path(output_dir)
+
+    # Plot 1: Close Price History (downsampled, so the cost does not grow with the history)
+    close_plot = rendering.plot_close_history(
+        df['date'].to_numpy(), df['close'].to_numpy(), output_dir / 'eda_close_price.png', symbol, pool=pool
+    )
 
     # Plot 2: Daily Return Distribution
-    # This check ensures the column exists before trying to plot it.
-    if 'daily_return' not in df.columns:
-        df['daily_return'] = df['close'].pct_change()
-        
-    plt.figure(figsize=(12, 6))
-    sns.histplot(df['daily_return'].dropna(), kde=True, bins=100)
-    plt.title('Distribution of Daily Returns')
-    plt.xlabel('Daily Return')
-    plt.savefig(output_dir / 'eda_daily_returns.png', dpi=300)
-    plt.close()
\ No newline at end of file
+    # Computed locally when the column is missing; the caller's frame is left unchanged
+    if 'daily_return' in df.columns:
+        returns = df['daily_return']
+    else:
+        returns = df['close'].pct_change()
+    returns_plot = rendering.plot_return_distribution(
+        returns.to_numpy(), output_dir / 'eda_daily_returns.png', pool=pool
+    )
+
+    if pool is not None:
+        return [close_plot, returns_plot]
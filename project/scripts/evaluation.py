@@ -1,15 +1,149 @@
 import numpy as np
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Literal
 import textwrap
 
-def save_evaluation_metrics(y_true: np.ndarray, y_pred: np.ndarray, output_path: Path):
+BootstrapMethod = Literal['iid', 'block', 'stationary']
+
+# Resample indices held in memory at once (rows x n); blocks are sized to fit
+_BOOTSTRAP_BLOCK_VALUES = 1 << 22
+# Resamples per independently seeded task; fixing this (rather than splitting
+# by worker count) makes results depend only on the seed, not on `workers`
+_BOOTSTRAP_TASK_SIZE = 1000
+
+def compute_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """
+    Calculates R², RMSE and MAE and returns them as a dictionary. Computed with
+    NumPy, as in the bootstrap, so evaluating does not import scikit-learn;
+    a constant `y_true` gives R² = 1 for a perfect fit and 0 otherwise, as in
+    sklearn.metrics.r2_score.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = y_true - np.asarray(y_pred, dtype=np.float64)
+    sse = float(err @ err)
+    sst = float(((y_true - y_true.mean()) ** 2).sum())
+    if sst == 0:
+        r2 = 1.0 if sse == 0 else 0.0
+    else:
+        r2 = 1.0 - sse / sst
+    return {
+        'r2': r2,
+        'rmse': float(np.sqrt(sse / len(err))),
+        'mae': float(np.abs(err).mean()),
+    }
+
+def _resample_indices(rng: np.random.Generator, n: int, size: int, method: BootstrapMethod, block_length: int) -> np.ndarray:
+    """
+    A (size x n) matrix of resample indices. 'block' is the circular moving-block
+    bootstrap with fixed blocks of `block_length`; 'stationary' (Politis & Romano)
+    draws geometric block lengths with mean `block_length`. Both keep runs of
+    consecutive observations together, preserving short-range autocorrelation.
+    """
+    if method == 'iid':
+        return rng.integers(0, n, size=(size, n))
+    if method == 'block':
+        n_blocks = -(-n // block_length)
+        starts = rng.integers(0, n, size=(size, n_blocks, 1))
+        return ((starts + np.arange(block_length)) % n).reshape(size, -1)[:, :n]
+    if method == 'stationary':
+        positions = np.arange(n)
+        new_block = rng.random((size, n)) < 1.0 / block_length
+        new_block[:, 0] = True
+        # Position where the current block started, and that block's random origin
+        block_start = np.maximum.accumulate(np.where(new_block, positions, 0), axis=1)
+        origins = rng.integers(0, n, size=(size, n))
+        return (np.take_along_axis(origins, block_start, axis=1) + positions - block_start) % n
+    raise ValueError(f"method must be 'iid', 'block' or 'stationary', got {method!r}")
+
+def _bootstrap_task(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    size: int,
+    seed: np.random.SeedSequence,
+    method: BootstrapMethod,
+    block_length: int,
+) -> np.ndarray:
+    """
+    R², RMSE and MAE of `size` resamples as a (size x 3) array, computed for
+    blocks of resamples at once.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(y_true)
+    err = y_true - y_pred
+    out = np.empty((size, 3))
+    rows = max(1, _BOOTSTRAP_BLOCK_VALUES // max(n, 1))
+    for lo in range(0, size, rows):
+        hi = min(lo + rows, size)
+        idx = _resample_indices(rng, n, hi - lo, method, block_length)
+        e = err[idx]
+        sse = np.einsum('ij,ij->i', e, e)
+        yt = y_true[idx]
+        yt -= yt.mean(axis=1, keepdims=True)
+        sst = np.einsum('ij,ij->i', yt, yt)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[lo:hi, 0] = 1.0 - sse / sst
+        out[lo:hi, 1] = np.sqrt(sse / n)
+        out[lo:hi, 2] = np.abs(e).mean(axis=1)
+    return out
+
+def bootstrap_metrics(
+    y_true,
+    y_pred,
+    n_boot: int = 10_000,
+    method: BootstrapMethod = 'iid',
+    block_length: int | None = None,
+    alpha: float = 0.05,
+    seed: int | None = None,
+    workers: int = 1,
+) -> dict:
+    """
+    Bootstrap confidence intervals for R², RMSE and MAE.
+
+    All resample indices of a block are drawn as one matrix and the metrics are
+    computed across resamples at once; use method='block' or 'stationary' for
+    autocorrelated returns (default block length: n ** (1/3)). Resamples are
+    split into fixed-size tasks with independent SeedSequence children and
+    spread over `workers` processes. Returns {metric: {'mean', 'lo', 'hi'}}
+    with a (1 - alpha) percentile interval.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    n = len(y_true)
+    if n < 2:
+        raise ValueError('Bootstrap needs at least 2 observations')
+    if block_length is None:
+        block_length = max(1, int(round(n ** (1 / 3))))
+    sizes = [min(_BOOTSTRAP_TASK_SIZE, n_boot - lo) for lo in range(0, n_boot, _BOOTSTRAP_TASK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(y_true, y_pred, size, ss, method, block_length) for size, ss in zip(sizes, seeds)]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            parts = list(pool.map(_bootstrap_task, *zip(*args)))
+    else:
+        parts = [_bootstrap_task(*a) for a in args]
+    stats = np.concatenate(parts)
+    lo, hi = np.nanpercentile(stats, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+    mean = np.nanmean(stats, axis=0)
+    return {
+        name: {'mean': float(mean[i]), 'lo': float(lo[i]), 'hi': float(hi[i])}
+        for i, name in enumerate(('r2', 'rmse', 'mae'))
+    }
+
+def save_evaluation_metrics(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    output_path: Path,
+    intervals: dict | None = None,
+    interval_label: str = '',
+) -> dict:
     """
     Calculates regression metrics and saves them to a formatted text file.
+    Returns the metrics so callers can aggregate them (e.g. in batch runs).
+    `intervals` (from bootstrap_metrics) adds a confidence-interval section.
     """
-    r2 = r2_score(y_true, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-    mae = mean_absolute_error(y_true, y_pred)
+    metrics = compute_metrics(y_true, y_pred)
+    r2, rmse, mae = metrics['r2'], metrics['rmse'], metrics['mae']
 
     # Using textwrap.dedent to format the string cleanly
     report_content = textwrap.dedent(f"""
@@ -29,6 +163,18 @@ def save_evaluation_metrics(y_true: np.ndarray, y_pred: np.ndarray, output_path:
     - **RMSE & MAE**: These metrics measure the average error of the model's predictions in the same units as the target (daily returns). For example, an RMSE of {rmse:.4f} means the typical prediction error is about {rmse:.2%}.
     """)
 
+    if intervals:
+        report_content += textwrap.dedent(f"""
+        ## Bootstrap Confidence Intervals{f" ({interval_label})" if interval_label else ""}
+        -----------------------------------
+        - R-squared (R²):  [{intervals['r2']['lo']:.4f}, {intervals['r2']['hi']:.4f}]
+        - RMSE:            [{intervals['rmse']['lo']:.6f}, {intervals['rmse']['hi']:.6f}]
+        - MAE:             [{intervals['mae']['lo']:.6f}, {intervals['mae']['hi']:.6f}]
+        -----------------------------------
+        """)
+
     # Write the formatted content to the specified file path
     with open(output_path, 'w') as f:
-        f.write(report_content)
\ No newline at end of file
+        f.write(report_content)
+
+    return metrics
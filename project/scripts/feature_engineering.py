@@ -1,7 +1,89 @@
+import shutil
+import numpy as np
 import pandas as pd
+from pathlib import Path
+
+# Window of the rolling features; also the number of trailing rows needed to continue them on new data
+ROLLING_WINDOW = 5
+TAIL_COLUMNS = ['date', 'close', 'daily_return']
+
+def _rolling(values: np.ndarray, window: int, fn) -> np.ndarray:
+    """
+    Applies `fn` to each trailing window independently (NaN for the first window-1 rows).
+    Unlike pandas' running-sum rolling, each value depends only on its own window, so
+    the result is bit-identical however the series is split into chunks.
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = fn(np.lib.stride_tricks.sliding_window_view(values, window), axis=1)
+    return out
 
 def create_features(df):
-    df['daily_return'] = df['close'].pct_change()
-    df['rolling_avg_5d_close'] = df['close'].rolling(window=5).mean()
-    df['rolling_vol_5d'] = df['daily_return'].rolling(window=5).std()
+    # Derived features are always float64, even when prices were downcast to float32
+    close = df['close'].to_numpy(dtype=float)
+    df['daily_return'] = pd.Series(close, index=df.index).pct_change()
+    returns = df['daily_return'].to_numpy(dtype=float)
+    df['rolling_avg_5d_close'] = _rolling(close, ROLLING_WINDOW, np.mean)
+    df['rolling_vol_5d'] = _rolling(returns, ROLLING_WINDOW, lambda w, axis: np.std(w, axis=axis, ddof=1))
     return df
+
+def create_feature_set(df, spec=None, by=None):
+    """
+    Adds the features described by a declarative spec (see src.features) to `df`,
+    computed in one vectorized pass. Column names come from src.features.feature_names(spec).
+    """
+    from src.features import DEFAULT_FEATURE_SPEC, compute_features
+
+    features = compute_features(df, spec or DEFAULT_FEATURE_SPEC, by=by)
+    return pd.concat([df.drop(columns=features.columns, errors='ignore'), features], axis=1)
+
+def create_features_incremental(new_rows, tail=None):
+    """
+    Featurizes only `new_rows`, using `tail` (the last ROLLING_WINDOW rows
+    already featurized) as warm-up context so the rolling features continue
+    exactly where the previous run stopped.
+
+    Returns the featurized new rows and the tail to persist for the next call.
+    """
+    if tail is None or len(tail) == 0:
+        featured = create_features(new_rows.copy())
+    else:
+        context = create_features(pd.concat([tail[['close']], new_rows[['close']]], ignore_index=True))
+        featured = new_rows.reset_index(drop=True)
+        for col in context.columns.drop('close'):
+            featured[col] = context[col].to_numpy()[len(tail):]
+    cols = [c for c in TAIL_COLUMNS if c in featured.columns]
+    history = featured[cols] if tail is None or len(tail) == 0 else pd.concat([tail[cols], featured[cols]], ignore_index=True)
+    new_tail = history.tail(ROLLING_WINDOW).reset_index(drop=True)
+    return featured, new_tail
+
+def stream_features(chunks, tail=None):
+    """
+    Featurizes an iterator of chunks (e.g. `pd.read_csv(..., chunksize=...)` or
+    `storage.iter_df`) in order, carrying the rolling-window tail across chunk
+    boundaries. Concatenating the yielded frames gives exactly `create_features`
+    of the whole series, while only one chunk is held in memory at a time.
+    """
+    for chunk in chunks:
+        featured, tail = create_features_incremental(chunk.reset_index(drop=True), tail)
+        yield featured
+
+def write_features_stream(chunks, dataset_path, symbol: str, dropna: bool = True) -> int:
+    """
+    Streams featurized chunks into the partitioned dataset at `dataset_path`,
+    replacing any previous data for `symbol`. Returns the number of rows written.
+    """
+    from src.storage import write_df
+
+    symbol_dir = Path(dataset_path) / f'symbol={symbol}'
+    if symbol_dir.exists():
+        shutil.rmtree(symbol_dir)
+    n_rows = 0
+    for featured in stream_features(chunks):
+        if dropna:
+            featured = featured.dropna()
+        if featured.empty:
+            continue
+        write_df(featured.assign(symbol=symbol), dataset_path, mode='append')
+        n_rows += len(featured)
+    return n_rows
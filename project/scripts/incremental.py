@@ -0,0 +1,188 @@
+from __future__ import annotations
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from src.storage import iter_df, read_df, write_df
+from src.cleaning import drop_missing
+from src.outliers import winsorize_bounds, winsorize_df
+from scripts.feature_engineering import (
+    ROLLING_WINDOW, TAIL_COLUMNS, create_features, create_features_incremental, write_features_stream,
+)
+
+STATE_VERSION = 1
+# Price and volume levels trend over time: bounds frozen on the bootstrap history would pin
+# later rows at old extremes (and zero their returns), so incremental mode never clips them
+LEVEL_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def state_path(state_dir: Path, symbol: str) -> Path:
+    return Path(state_dir) / f"{symbol.upper()}.json"
+
+def load_state(state_dir: Path, symbol: str) -> dict | None:
+    """
+    Loads the persisted ingestion state for a symbol, or None if it was never ingested.
+    """
+    path = state_path(state_dir, symbol)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    tail = pd.DataFrame(state["tail"]["data"], columns=state["tail"]["columns"])
+    if "date" in tail.columns:
+        tail["date"] = pd.to_datetime(tail["date"])
+    state["tail"] = tail
+    state["watermark"] = pd.Timestamp(state["watermark"])
+    return state
+
+def save_state(state: dict, state_dir: Path) -> Path:
+    """
+    Writes the state atomically (temp file + rename) so a crash never leaves a half-written file.
+    """
+    path = state_path(state_dir, state["symbol"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = dict(state)
+    payload["watermark"] = state["watermark"].isoformat()
+    payload["tail"] = json.loads(state["tail"].to_json(orient="split", index=False, date_format="iso"))
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+def _bootstrap(raw_data_path: Path, dataset_path: Path, symbol: str, lower: float, upper: float) -> tuple[pd.DataFrame, dict]:
+    df = drop_missing(read_df(raw_data_path))
+    numeric_cols = [c for c in df.select_dtypes(include="number").columns if c not in LEVEL_COLUMNS]
+    # Bounds are frozen here and reused for every later append
+    bounds = winsorize_bounds(df, columns=numeric_cols, lower=lower, upper=upper)
+    featured, tail = create_features_incremental(winsorize_df(df, bounds=bounds))
+    featured = featured.dropna()
+    write_df(featured.assign(symbol=symbol), dataset_path, mode="overwrite")
+    state = {
+        "version": STATE_VERSION,
+        "symbol": symbol,
+        "columns": df.columns.tolist(),
+        "winsor_bounds": {c: list(b) for c, b in bounds.items()},
+        "rows": len(featured),
+        "watermark": df["date"].max(),
+        "tail": tail,
+    }
+    return featured, state
+
+def _bootstrap_stream(
+    raw_data_path: Path, dataset_path: Path, symbol: str, lower: float, upper: float, chunksize: int
+) -> dict:
+    """
+    `_bootstrap` for histories that do not fit in memory: reads `raw_data_path` twice
+    in chunks of `chunksize` rows, first to fit the winsorization bounds with KLL
+    sketches (src.sketches), then to featurize and write it chunk by chunk. Features
+    match the in-memory path; the bounds are sketch estimates, and rows with nulls are
+    dropped without first dropping mostly-empty columns.
+    """
+    from src.sketches import fit_quantile_sketches, sketch_bounds
+
+    def complete_chunks():
+        for chunk in iter_df(raw_data_path, chunksize=chunksize):
+            chunk = chunk.dropna(axis=0, how="any")
+            if not chunk.empty:
+                yield chunk
+
+    bounds = sketch_bounds(fit_quantile_sketches(complete_chunks()), lower=lower, upper=upper)
+    bounds = {c: b for c, b in bounds.items() if c not in LEVEL_COLUMNS}
+    # The last rows written, from which the rolling-window tail is rebuilt
+    last = {}
+
+    def winsorized_chunks():
+        for chunk in complete_chunks():
+            chunk = winsorize_df(chunk, bounds=bounds)
+            last["columns"] = chunk.columns.tolist()
+            last["rows"] = pd.concat([last.get("rows"), chunk], ignore_index=True).tail(ROLLING_WINDOW + 1)
+            watermark = chunk["date"].max()
+            last["watermark"] = max(last.get("watermark", watermark), watermark)
+            yield chunk
+
+    rows = write_features_stream(winsorized_chunks(), dataset_path, symbol)
+    if not last:
+        raise ValueError(f"No complete rows in {raw_data_path}")
+    # One row more than the tail, so its first daily return is that of the full series
+    tail = create_features(last["rows"].copy())[TAIL_COLUMNS].tail(ROLLING_WINDOW).reset_index(drop=True)
+    return {
+        "version": STATE_VERSION,
+        "symbol": symbol,
+        "columns": last["columns"],
+        "winsor_bounds": {c: list(b) for c, b in bounds.items()},
+        "rows": rows,
+        "watermark": last["watermark"],
+        "tail": tail,
+    }
+
+def ingest_incremental(
+    raw_data_path: Path,
+    dataset_path: Path,
+    state_dir: Path,
+    symbol: str,
+    lower: float = 0.01,
+    upper: float = 0.99,
+    monitor=None,
+    predictor=None,
+    chunksize: int | None = None,
+) -> dict:
+    """
+    Appends only the rows of `raw_data_path` newer than the symbol's high-water mark
+    to the processed dataset, featurizing them from the persisted rolling-window tail.
+
+    The first call for a symbol (no state yet) processes the full history and freezes
+    the winsorization bounds; later calls cost O(new rows). Only columns other than
+    LEVEL_COLUMNS are clipped, at bootstrap and on append, unlike batch mode, which clips
+    every numeric column to bounds refit on the full history at every run. With a `chunksize` the first call streams the
+    history in chunks of that many rows (see `_bootstrap_stream`). Data is written before the
+    state is updated, so an interrupted run is retried from the old watermark.
+
+    Appended rows are also counted into `monitor` (a src.monitoring.DriftMonitor), and
+    with a `predictor` each row's return is scored against the prediction made on the
+    row before it, which for the first new row is kept in the state. Scoring is skipped
+    for a predictor that needs features beyond create_features' (e.g. --feature-spec).
+    """
+    symbol = symbol.upper()
+    state = load_state(state_dir, symbol)
+    if state is None:
+        if chunksize:
+            state = _bootstrap_stream(raw_data_path, dataset_path, symbol, lower, upper, chunksize)
+        else:
+            _, state = _bootstrap(raw_data_path, dataset_path, symbol, lower, upper)
+        save_state(state, state_dir)
+        return {"symbol": symbol, "mode": "bootstrap", "rows_new": state["rows"], "watermark": str(state["watermark"])}
+
+    new_rows = read_df(raw_data_path, start=state["watermark"])
+    new_rows = new_rows.loc[new_rows["date"] > state["watermark"], state["columns"]]
+    if monitor is not None:
+        # Counted before rows with nulls are dropped, so the monitor sees the null rate
+        monitor.observe(new_rows, at=new_rows["date"])
+    new_rows = new_rows.dropna(axis=0, how="any").reset_index(drop=True)
+    if new_rows.empty:
+        return {"symbol": symbol, "mode": "append", "rows_new": 0, "watermark": str(state["watermark"])}
+
+    bounds = {c: tuple(b) for c, b in state["winsor_bounds"].items() if c not in LEVEL_COLUMNS}
+    featured, tail = create_features_incremental(winsorize_df(new_rows, bounds=bounds), state["tail"])
+    featured = featured.dropna()
+    write_df(featured.assign(symbol=symbol), dataset_path, mode="append")
+    if monitor is not None:
+        derived = [c for c in featured.columns if c not in new_rows.columns]
+        monitor.observe(featured[derived], at=featured["date"])
+        missing = [c for c in predictor.feature_names if c not in featured.columns] if predictor is not None else []
+        if missing:
+            # A model trained with --feature-spec needs windows longer than the persisted tail
+            print(f"Warning: the published model uses features incremental ingestion does not build "
+                  f"({', '.join(missing)}); its errors are not scored")
+        elif predictor is not None and len(featured):
+            predictions = predictor.predict(featured[predictor.feature_names].to_numpy(dtype=np.float64))
+            previous = np.concatenate([[state.get("last_prediction", np.nan)], predictions[:-1]])
+            monitor.observe_outcomes(featured["daily_return"], previous, at=featured["date"])
+            state["last_prediction"] = float(predictions[-1])
+
+    state["tail"] = tail
+    state["watermark"] = new_rows["date"].max()
+    state["rows"] += len(featured)
+    save_state(state, state_dir)
+    return {"symbol": symbol, "mode": "append", "rows_new": len(featured), "watermark": str(state["watermark"])}
@@ -3,10 +3,272 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_squared_error
 import numpy as np
+from pathlib import Path
+from typing import Literal
 
-def train_regression_model(df: pd.DataFrame):
+from src.artifacts import read_artifact, write_artifact
+
+DEFAULT_FEATURES = ['open', 'high', 'low', 'close', 'volume', 'daily_return', 'rolling_avg_5d_close', 'rolling_vol_5d']
+
+WalkForwardMode = Literal['expanding', 'rolling']
+
+def _aligned_xy(df: pd.DataFrame, features: list | None = None):
+    """
+    Feature matrix and next-day-return target with rows containing NaNs removed.
+    """
+    # Target variable is the next day's return
+    if 'daily_return' not in df.columns:
+        df['daily_return'] = df['close'].pct_change()
+    y = df['daily_return'].shift(-1)
+    features = [col for col in (features or DEFAULT_FEATURES) if col in df.columns]
+    combined = pd.concat([y.rename('target_return'), df[features]], axis=1)
+    combined.dropna(inplace=True)
+    return combined.drop(columns='target_return'), combined['target_return']
+
+def _solve_normal_equations(gram: np.ndarray, moment: np.ndarray) -> np.ndarray:
+    """
+    Solves a stack of normal equations G b = m in one batched call. Windows
+    whose Gram matrix is singular (e.g. a constant feature) fall back to the
+    minimum-norm least-squares solution, as LinearRegression returns.
+    """
+    try:
+        return np.linalg.solve(gram, moment[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return (np.linalg.pinv(gram) @ moment[..., None])[..., 0]
+
+def walk_forward(
+    df: pd.DataFrame,
+    features: list | None = None,
+    mode: WalkForwardMode = 'expanding',
+    train_size: int = 252,
+    step: int = 1,
+) -> pd.DataFrame:
+    """
+    Walk-forward evaluation of the next-day-return regression: the model is
+    refit every `step` rows on the preceding `train_size` rows ('rolling') or on
+    all rows so far ('expanding'), and predicts the following `step` rows.
+
+    Instead of refitting from scratch, per-row outer products x xᵀ and x y are
+    accumulated once with cumulative sums, so the normal equations of any window
+    are a difference of two prefix sums (rows entering minus rows leaving), and
+    all windows are solved in one batched call. Features are standardized with
+    the first training window's statistics to keep the sums well conditioned.
+
+    Returns one row per out-of-sample prediction (indexed like `df`) with
+    y_true, y_pred and the training window [train_start, train_end) used.
+    """
+    if mode not in ('expanding', 'rolling'):
+        raise ValueError(f"mode must be 'expanding' or 'rolling', got {mode!r}")
+    if step < 1:
+        raise ValueError(f'step must be >= 1, got {step}')
+    X_df, y_s = _aligned_xy(df, features)
+    n = len(X_df)
+    if train_size < 1 or train_size >= n:
+        raise ValueError(f'train_size must be in [1, {n - 1}] for {n} usable rows, got {train_size}')
+
+    X = X_df.to_numpy(dtype=np.float64)
+    y = y_s.to_numpy(dtype=np.float64)
+    mu = X[:train_size].mean(axis=0)
+    sd = X[:train_size].std(axis=0)
+    sd[sd == 0] = 1.0
+    # Intercept column first; it is part of the solve like any other coefficient
+    Z = np.empty((n, X.shape[1] + 1))
+    Z[:, 0] = 1.0
+    Z[:, 1:] = (X - mu) / sd
+
+    p = Z.shape[1]
+    gram = np.zeros((n + 1, p, p))
+    moment = np.zeros((n + 1, p))
+    np.cumsum(Z[:, :, None] * Z[:, None, :], axis=0, out=gram[1:])
+    np.cumsum(Z * y[:, None], axis=0, out=moment[1:])
+
+    ends = np.arange(train_size, n, step)
+    starts = ends - train_size if mode == 'rolling' else np.zeros_like(ends)
+    beta = _solve_normal_equations(gram[ends] - gram[starts], moment[ends] - moment[starts])
+
+    test = np.arange(train_size, n)
+    fit = (test - train_size) // step
+    y_pred = np.einsum('ij,ij->i', Z[test], beta[fit])
+    return pd.DataFrame(
+        {
+            'y_true': y[test],
+            'y_pred': y_pred,
+            'train_start': starts[fit],
+            'train_end': ends[fit],
+        },
+        index=X_df.index[test],
+    )
+
+class ModelBank:
+    """
+    Per-symbol linear models stored as one coefficient matrix (symbols x features)
+    plus an intercept vector, in the original feature units. Pickles like a
+    single fitted model, and `save`/`load` use the memory-mappable
+    src.artifacts format; predicting for many symbols at once is one gather and
+    a row-wise dot product.
+    """
+
+    __slots__ = ('symbols', 'features', 'coef', 'intercept', '_index')
+
+    def __init__(self, symbols, features, coef: np.ndarray, intercept: np.ndarray):
+        self.symbols = [str(s) for s in symbols]
+        self.features = list(features)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+
+    def __getstate__(self):
+        return (self.symbols, self.features, self.coef, self.intercept)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol) -> bool:
+        return str(symbol) in self._index
+
+    def __repr__(self) -> str:
+        return f'ModelBank(symbols={len(self.symbols)}, features={self.features})'
+
+    def save(self, path, training_window: dict | None = None, data_hash: str | None = None) -> Path:
+        """Writes the bank as a src.artifacts directory."""
+        return write_artifact(
+            path, self.coef, self.intercept, self.features, symbols=self.symbols,
+            training_window=training_window, data_hash=data_hash,
+        )
+
+    @classmethod
+    def load(cls, path) -> 'ModelBank':
+        """Opens a saved bank; its coefficients stay memory-mapped, shared by every process using them."""
+        artifact = read_artifact(path)
+        return cls(artifact.symbols, artifact.features, artifact.coef, artifact.intercept)
+
+    def rows(self, symbols) -> np.ndarray:
+        """Bank row of each symbol; raises KeyError for a symbol without a model."""
+        try:
+            return np.array([self._index[str(s)] for s in symbols], dtype=np.intp)
+        except KeyError as e:
+            raise KeyError(f'No model for symbol {e.args[0]!r}') from None
+
+    def predict(self, X, symbols) -> np.ndarray:
+        """
+        Predicts rows of `X` (columns in `self.features` order, or a DataFrame
+        containing them) with each row's symbol model. `symbols` is one ticker
+        for all rows or one ticker per row.
+        """
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if isinstance(symbols, str):
+            i = self.rows([symbols])[0]
+            return X @ self.coef[i] + self.intercept[i]
+        idx = self.rows(symbols)
+        return np.einsum('ij,ij->i', X, self.coef[idx]) + self.intercept[idx]
+
+def train_model_bank(
+    df: pd.DataFrame,
+    features: list | None = None,
+    by: str = 'symbol',
+    test_size: float = 0.2,
+    block_size: int = 256,
+) -> tuple[ModelBank, pd.DataFrame]:
+    """
+    Fits the next-day-return regression of `train_regression_model` for every
+    symbol of a stacked frame (time-ordered within each symbol) at once, with
+    the same chronological split: the last `test_size` share of each symbol's
+    rows is held out.
+
+    Each symbol's standardized training rows are zero-padded into a 3-D array
+    (zero rows add nothing to XᵀX or Xᵀy); Gram matrices are built with one
+    batched matmul per block of `block_size` symbols, bounding memory, and all
+    symbols are solved in a single batched call. Returns the bank and the held-out rows
+    with columns [by, y_true, y_pred], indexed like `df`.
+    """
+    features = [col for col in (features or DEFAULT_FEATURES) if col in df.columns]
+    codes, symbols = pd.factorize(df[by], sort=True)
+    if 'daily_return' in df.columns:
+        returns = df['daily_return']
+    else:
+        returns = df.groupby(codes, sort=False)['close'].pct_change()
+    y_all = returns.groupby(codes, sort=False).shift(-1)
+    usable = y_all.notna().to_numpy() & df[features].notna().all(axis=1).to_numpy()
+
+    # Group rows by symbol (stable, so each symbol stays in time order)
+    take = np.flatnonzero(usable)[np.argsort(codes[usable], kind='stable')]
+    X = df[features].to_numpy(dtype=np.float64)[take]
+    y = y_all.to_numpy(dtype=np.float64)[take]
+    codes = codes[take]
+    n_sym, k = len(symbols), X.shape[1]
+    counts = np.bincount(codes, minlength=n_sym)
+    # Same split as train_test_split(test_size, shuffle=False), per symbol
+    n_train = counts - np.ceil(counts * test_size).astype(np.int64)
+    if (n_train < 1).any():
+        raise ValueError(f'Too few usable rows for: {list(symbols[n_train < 1])}')
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    pos = np.arange(len(codes)) - starts[codes]
+    train = pos < n_train[codes]
+
+    # Training rows are contiguous per symbol, so per-symbol sums are segment reductions
+    rows = np.flatnonzero(train)
+    tc, tp = codes[rows], pos[rows]
+    segments = np.concatenate([[0], np.cumsum(n_train)[:-1]])
+
+    def group_sums(values: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(values, segments, axis=0)
+
+    # Centering per symbol avoids cancellation when forming XᵀX
+    mu = group_sums(X[rows]) / n_train[:, None]
+    Z = X[rows] - mu[tc]
+    yt = y[rows]
+
+    # With centered features the intercept row/column of XᵀX is (n, sum z)
+    gram = np.empty((n_sym, k + 1, k + 1))
+    moment = np.empty((n_sym, k + 1))
+    gram[:, 0, 0] = n_train
+    gram[:, 0, 1:] = gram[:, 1:, 0] = group_sums(Z)
+    moment[:, 0] = group_sums(yt)
+    for lo in range(0, n_sym, block_size):
+        hi = min(lo + block_size, n_sym)
+        sel = (tc >= lo) & (tc < hi)
+        padded = np.zeros((hi - lo, int(n_train[lo:hi].max()), k))
+        target = np.zeros(padded.shape[:2])
+        padded[tc[sel] - lo, tp[sel]] = Z[sel]
+        target[tc[sel] - lo, tp[sel]] = yt[sel]
+        padded_t = padded.transpose(0, 2, 1)
+        gram[lo:hi, 1:, 1:] = padded_t @ padded
+        moment[lo:hi, 1:] = (padded_t @ target[..., None])[..., 0]
+
+    # Scaling by the per-symbol standard deviations (read off the diagonal) is
+    # the same as solving on standardized features, which keeps volume and
+    # returns on comparable scales
+    sd = np.sqrt(np.diagonal(gram[:, 1:, 1:], axis1=1, axis2=2) / n_train[:, None])
+    sd = np.where(sd > 0, sd, 1.0)
+    scale = np.concatenate([np.ones((n_sym, 1)), sd], axis=1)
+    beta = _solve_normal_equations(gram / (scale[:, :, None] * scale[:, None, :]), moment / scale)
+
+    # Back to raw feature units: y = b0 + sum(b_j (x_j - mu_j) / sd_j)
+    coef = beta[:, 1:] / sd
+    intercept = beta[:, 0] - (coef * mu).sum(axis=1)
+    bank = ModelBank(symbols, features, coef, intercept)
+
+    test = ~train
+    index = df.index[take]
+    preds = pd.DataFrame(
+        {
+            by: np.asarray(symbols)[codes[test]],
+            'y_true': y[test],
+            'y_pred': np.einsum('ij,ij->i', X[test], coef[codes[test]]) + intercept[codes[test]],
+        },
+        index=index[test],
+    )
+    return bank, preds.sort_index()
+
+def train_regression_model(df: pd.DataFrame, features: list | None = None):
     """
     Trains a linear regression model to predict the next day's return.
+    `features` overrides the default feature columns (e.g. names from src.features.feature_names).
     
     Returns:
         - Trained model object (lr)
@@ -14,23 +276,9 @@ def train_regression_model(df: pd.DataFrame):
         - y_test (true target values for the test set)
         - y_pred (predicted values for the test set)
     """
-    # Target variable is the next day's return
-    if 'daily_return' not in df.columns:
-        df['daily_return'] = df['close'].pct_change()
-    
-    y = df['daily_return'].shift(-1)
-    
-    # Define features to be used for modeling
-    features = [col for col in ['open', 'high', 'low', 'close', 'volume', 'daily_return', 'rolling_avg_5d_close', 'rolling_vol_5d'] if col in df.columns]
-    X = df[features]
-    
-    # Align X and y by concatenating and dropping rows with NaNs
+    # Align X and the next-day target, dropping rows with NaNs
     # This is crucial for time series data
-    combined = pd.concat([y.rename('target_return'), X], axis=1)
-    combined.dropna(inplace=True)
-    
-    y_aligned = combined['target_return']
-    X_aligned = combined.drop(columns='target_return')
+    X_aligned, y_aligned = _aligned_xy(df, features)
     
     # Split data chronologically for time series analysis
     X_train, X_test, y_train, y_test = train_test_split(X_aligned, y_aligned, test_size=0.2, shuffle=False)
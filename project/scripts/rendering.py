@@ -0,0 +1,217 @@
+"""
+Figure rendering for the EDA and reporting plots.
+
+Figures are drawn on the non-interactive Agg canvas through matplotlib's
+object-oriented API (no pyplot), so they need no display and no global figure
+state: several threads, or the processes of a RenderPool, can render at once.
+
+Long inputs are reduced before drawing. Series are downsampled with
+Largest-Triangle-Three-Buckets, which keeps the visual shape (peaks, crashes).
+Distributions are drawn from a histogram plus a KDE evaluated on a binned grid.
+Scatters with many points become hexbin density plots. Drawing cost therefore
+depends on the size of the figure, not the length of the data.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+
+matplotlib.use("Agg", force=True)
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DEFAULT_DPI = 150
+# Points kept per line: a few per horizontal pixel of a 12-inch figure
+MAX_LINE_POINTS = 2000
+# Above this many points a scatter is drawn as a hexbin density
+MAX_SCATTER_POINTS = 20000
+KDE_GRID_SIZE = 512
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the `n_out` points chosen by Largest-Triangle-Three-Buckets
+    (Steinarsson, 2013). The first and last points are always kept, and from
+    each bucket in between the point forming the largest triangle with the
+    previously kept point and the next bucket's average is taken. `x` must be
+    increasing.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n_out - 2 buckets over the interior points, then the last point as its own bucket
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.intp), n)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / counts
+    avg_y = np.add.reduceat(y, edges[:-1]) / counts
+    out = np.empty(n_out, dtype=np.intp)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle areas; the constant factor does not change the argmax
+        area = np.abs((ax - avg_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[i + 1] - ay))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def binned_kde(values: np.ndarray, grid_size: int = KDE_GRID_SIZE) -> tuple:
+    """
+    Gaussian KDE (Scott's bandwidth) evaluated on `grid_size` points by binning
+    the data and convolving with the kernel: O(n + grid_size * kernel) instead
+    of O(n * grid_size).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) < 2 or values.std() == 0:
+        return np.array([]), np.array([])
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    lo, hi = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    counts, edges = np.histogram(values, bins=grid_size, range=(lo, hi))
+    grid = (edges[:-1] + edges[1:]) / 2
+    step = edges[1] - edges[0]
+    half = min(int(np.ceil(4 * bandwidth / step)), grid_size)
+    offsets = np.arange(-half, half + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel, mode="same")
+    density /= density.sum() * step
+    return grid, density
+
+def _new_figure(figsize: tuple, dpi: int):
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.grid(True, alpha=0.3)
+    return fig, ax
+
+def _save(fig: Figure, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(path)
+    return path
+
+# --- Renderers: take already reduced data, so they are cheap to ship to a process ---
+def render_close_history(x, close, path, symbol: str, dpi: int = DEFAULT_DPI) -> Path:
+    fig, ax = _new_figure((12, 6), dpi)
+    ax.plot(x, close, lw=1.2)
+    ax.set_title(f"{symbol} Close Price History")
+    ax.set_ylabel("Close Price (USD)")
+    ax.set_xlabel("Date")
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    return _save(fig, path)
+
+def render_return_distribution(counts, edges, grid, density, path, dpi: int = DEFAULT_DPI) -> Path:
+    fig, ax = _new_figure((12, 6), dpi)
+    ax.stairs(counts, edges, fill=True, alpha=0.6)
+    if len(grid):
+        # Scale the density to the histogram's counts
+        ax.plot(grid, density * counts.sum() * (edges[1] - edges[0]), lw=1.5)
+    ax.set_title("Distribution of Daily Returns")
+    ax.set_xlabel("Daily Return")
+    ax.set_ylabel("Count")
+    fig.tight_layout()
+    return _save(fig, path)
+
+def render_actual_vs_predicted(y_true, y_pred, limits, path, hexbin: bool, dpi: int = DEFAULT_DPI) -> Path:
+    fig, ax = _new_figure((10, 10), dpi)
+    if hexbin:
+        cells = ax.hexbin(y_true, y_pred, gridsize=80, bins="log", mincnt=1, cmap="viridis")
+        fig.colorbar(cells, ax=ax, label="log10(count)")
+    else:
+        ax.scatter(y_true, y_pred, s=12, alpha=0.5, linewidths=0)
+    ax.plot(limits, limits, color="red", linestyle="--", lw=2, label="Perfect Prediction")
+    ax.set_title("Actual vs. Predicted Daily Returns")
+    ax.set_xlabel("Actual Returns")
+    ax.set_ylabel("Predicted Returns")
+    # Explicit location: "best" scans every point
+    ax.legend(loc="upper left")
+    fig.tight_layout()
+    return _save(fig, path)
+
+# --- Plot functions: reduce the data here, then render inline or in a pool ---
+def _dispatch(pool, fn, *args):
+    if pool is None:
+        return fn(*args)
+    return pool.submit(fn, *args)
+
+def plot_close_history(dates, close, path, symbol: str, pool=None, max_points: int = MAX_LINE_POINTS,
+                       dpi: int = DEFAULT_DPI):
+    """Close price line, LTTB-downsampled to `max_points`. Returns the path, or a Future with a `pool`."""
+    dates = np.asarray(dates)
+    close = np.asarray(close, dtype=np.float64)
+    keep = np.isfinite(close)
+    dates, close = dates[keep], close[keep]
+    if np.issubdtype(dates.dtype, np.datetime64):
+        x = dates.astype("datetime64[ns]").astype(np.int64)
+    else:
+        x = np.arange(len(close))
+    idx = lttb(x, close, max_points)
+    return _dispatch(pool, render_close_history, dates[idx], close[idx], path, symbol, dpi)
+
+def plot_return_distribution(returns, path, pool=None, bins: int = 100, dpi: int = DEFAULT_DPI):
+    """Histogram of `returns` with a binned KDE overlay."""
+    returns = np.asarray(returns, dtype=np.float64)
+    returns = returns[np.isfinite(returns)]
+    counts, edges = np.histogram(returns, bins=bins)
+    grid, density = binned_kde(returns)
+    return _dispatch(pool, render_return_distribution, counts, edges, grid, density, path, dpi)
+
+def plot_actual_vs_predicted(y_true, y_pred, path, pool=None, max_points: int = MAX_SCATTER_POINTS,
+                             dpi: int = DEFAULT_DPI):
+    """Scatter of actual vs. predicted values (a hexbin density above `max_points`) with the y = x line."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    limits = [float(min(y_true.min(), y_pred.min())), float(max(y_true.max(), y_pred.max()))]
+    return _dispatch(pool, render_actual_vs_predicted, y_true, y_pred, limits, path, len(y_true) > max_points, dpi)
+
+class RenderPool:
+    """
+    Background process pool for rendering. Plot functions given a pool return
+    Futures at once, so the caller (e.g. modeling) continues while matplotlib
+    runs in another process. Only the reduced data is sent to the workers.
+    Workers are spawned fresh rather than forked, which is safe when the
+    pipeline has threads running.
+    """
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, fn, *args) -> Future:
+        return self._executor.submit(fn, *args)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+_shared_pool = None
+# Held while creating the pool: the DAG's eda and report tasks may ask for it at once
+_shared_pool_lock = threading.Lock()
+
+def shared_pool(workers: int) -> RenderPool | None:
+    """
+    One RenderPool per process, created on first use and reused, e.g. by a
+    batch worker across all its symbols. None when `workers` is 0 (inline rendering).
+    """
+    global _shared_pool
+    if workers <= 0:
+        return None
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = RenderPool(workers)
+    return _shared_pool
+
+def wait_all(results) -> list:
+    """Resolves Futures among `results` (re-raising render errors); plain values pass through."""
+    return [r.result() if isinstance(r, Future) else r for r in results]
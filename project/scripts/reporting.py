@@ -1,28 +1,16 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import numpy as np # Ensure numpy is imported
 
-def plot_predictions(y_true: pd.Series, y_pred: np.ndarray, output_dir: Path):
+from scripts import rendering
+
+def plot_predictions(y_true: pd.Series, y_pred: np.ndarray, output_dir: Path, pool=None):
     """
-    Generates and saves a scatter plot of actual vs. predicted values.
+    Generates and saves a scatter plot of actual vs. predicted values, with a
+    red y = x line for perfect predictions. Large test sets are drawn as a
+    hexbin density instead of individual points.
+    With a rendering.RenderPool, returns the plot's Future instead of waiting for it.
     """
-    plt.figure(figsize=(10, 10))
-    sns.scatterplot(x=y_true, y=y_pred, alpha=0.5)
-    
-    # Add a red line for perfect predictions (y=x)
-    # Determine the plot limits to make the line span the entire plot
-    limits = [
-        min(y_true.min(), y_pred.min()),
-        max(y_true.max(), y_pred.max())
-    ]
-    plt.plot(limits, limits, color='red', linestyle='--', lw=2, label='Perfect Prediction')
-    
-    plt.title('Actual vs. Predicted Daily Returns')
-    plt.xlabel('Actual Returns')
-    plt.ylabel('Predicted Returns')
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(output_dir / 'report_predictions_vs_actual.png', dpi=300)
-    plt.close()
\ No newline at end of file
+    return rendering.plot_actual_vs_predicted(
+        y_true, y_pred, Path(output_dir) / 'report_predictions_vs_actual.png', pool=pool
+    )
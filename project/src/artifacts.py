@@ -0,0 +1,212 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from src.serving import LinearPredictor
+
+# <artifact>/manifest.json describes the model; each array is a .npy file next to it
+MANIFEST_FILE = "manifest.json"
+FORMAT = "linear-model"
+FORMAT_VERSION = 1
+
+__all__ = [
+    "MANIFEST_FILE",
+    "FORMAT_VERSION",
+    "ModelArtifact",
+    "write_artifact",
+    "read_artifact",
+    "is_artifact",
+    "frame_hash",
+]
+
+def frame_hash(df) -> str:
+    """Content hash of a DataFrame's values (not its index), for the manifest's data_hash."""
+    import pandas as pd
+    h = hashlib.blake2b(digest_size=16)
+    h.update(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def is_artifact(path: str | Path) -> bool:
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+class ModelArtifact:
+    """
+    A linear model, or a bank of per-symbol linear models, read from disk.
+
+    `coef` is (models x features) and `intercept` (models,); `lo`/`hi` are
+    optional clip limits per feature (features,) or per model and feature.
+    Loaded with mmap, the arrays are read-only views of the files: every
+    process serving the same artifact shares one copy of its pages through the
+    OS page cache, and loading costs a few system calls whatever the number of
+    models.
+    """
+
+    __slots__ = ("path", "manifest", "arrays", "_index")
+
+    def __init__(self, path: Path, manifest: dict, arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        symbols = manifest.get("symbols")
+        self._index = {s: i for i, s in enumerate(symbols)} if symbols is not None else None
+
+    @property
+    def features(self) -> list:
+        return self.manifest["features"]
+
+    @property
+    def symbols(self) -> Optional[list]:
+        return self.manifest.get("symbols")
+
+    @property
+    def version(self) -> str:
+        # Registry versions are directories named after their publication time
+        return self.path.name
+
+    @property
+    def coef(self) -> np.ndarray:
+        return self.arrays["coef"]
+
+    @property
+    def intercept(self) -> np.ndarray:
+        return self.arrays["intercept"]
+
+    def __len__(self) -> int:
+        return len(self.intercept)
+
+    def __repr__(self) -> str:
+        return f"ModelArtifact({str(self.path)!r}, models={len(self)}, features={len(self.features)})"
+
+    def row(self, symbol: Optional[str] = None) -> int:
+        """Model index of `symbol`; a single-model artifact takes no symbol."""
+        if symbol is None:
+            if len(self) != 1:
+                raise KeyError(f"Artifact holds {len(self)} models; pass a symbol")
+            return 0
+        if self._index is None:
+            raise KeyError("Artifact has no symbols")
+        try:
+            return self._index[str(symbol)]
+        except KeyError:
+            raise KeyError(f"No model for symbol {symbol!r}") from None
+
+    def predictor(self, symbol: Optional[str] = None) -> LinearPredictor:
+        """One model as a LinearPredictor whose arrays are views of the artifact (no copy)."""
+        i = self.row(symbol)
+        lo, hi = self.arrays.get("lo"), self.arrays.get("hi")
+        if lo is not None and lo.ndim == 2:
+            lo, hi = lo[i], hi[i]
+        return LinearPredictor(self.coef[i], float(self.intercept[i]), self.features, lo, hi, version=self.version)
+
+    def predict(self, X, symbols) -> np.ndarray:
+        """
+        Predicts rows of `X` (columns in `features` order) with each row's
+        model: `symbols` is one ticker for all rows or one per row.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if isinstance(symbols, str) or symbols is None:
+            return self.predictor(symbols).predict(X)
+        idx = np.array([self.row(s) for s in symbols], dtype=np.intp)
+        lo, hi = self.arrays.get("lo"), self.arrays.get("hi")
+        if lo is not None:
+            X = np.clip(X, lo[idx] if lo.ndim == 2 else lo, hi[idx] if hi.ndim == 2 else hi)
+        return np.einsum("ij,ij->i", X, self.coef[idx]) + self.intercept[idx]
+
+def write_artifact(
+    path: str | Path,
+    coef,
+    intercept,
+    features: Iterable[str],
+    symbols: Optional[Iterable[str]] = None,
+    lo=None,
+    hi=None,
+    training_window: Optional[dict] = None,
+    data_hash: Optional[str] = None,
+    metadata: Optional[dict] = None,
+) -> Path:
+    """
+    Writes a model artifact directory: one .npy file per array (np.save pads
+    the header so the data starts 64-byte aligned) and manifest.json with the
+    feature names, symbols, training window, data hash and each array's file,
+    dtype and shape. A 1-D `coef` is a single model.
+
+    The directory is written under a temporary name and renamed into place,
+    so a reader never sees a partial artifact (when one is replaced, the path
+    is briefly missing). Processes that mapped the old arrays keep their mapping.
+    """
+    path = Path(path)
+    coef = np.atleast_2d(np.asarray(coef, dtype=np.float64))
+    intercept = np.atleast_1d(np.asarray(intercept, dtype=np.float64))
+    features = [str(f) for f in features]
+    symbols = [str(s) for s in symbols] if symbols is not None else None
+    if coef.shape != (len(intercept), len(features)):
+        raise ValueError(f"coef has shape {coef.shape}; expected ({len(intercept)}, {len(features)})")
+    if symbols is not None and len(symbols) != len(intercept):
+        raise ValueError(f"{len(symbols)} symbols for {len(intercept)} models")
+    arrays = {"coef": coef, "intercept": intercept}
+    if lo is not None:
+        arrays["lo"] = np.asarray(lo, dtype=np.float64)
+        arrays["hi"] = np.asarray(hi, dtype=np.float64)
+
+    manifest = {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "features": features,
+        "symbols": symbols,
+        "training_window": training_window,
+        "data_hash": data_hash,
+        "metadata": metadata or {},
+        "arrays": {},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp"
+    tmp.mkdir()
+    try:
+        for name, array in arrays.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(array))
+            manifest["arrays"][name] = {"file": f"{name}.npy", "dtype": array.dtype.str, "shape": list(array.shape)}
+        with open(tmp / MANIFEST_FILE, "w") as f:
+            json.dump(manifest, f)
+        if path.exists():
+            # Directories cannot be replaced atomically; move the old one aside first
+            old = path.parent / f".{path.name}.{uuid.uuid4().hex}.old"
+            os.replace(path, old)
+            os.replace(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+def read_artifact(path: str | Path, mmap: bool = True) -> ModelArtifact:
+    """
+    Opens an artifact directory, memory-mapping its arrays (read-only) unless
+    `mmap` is False. Raises ValueError for another format, a newer
+    format_version, or arrays that do not match the manifest.
+    """
+    path = Path(path)
+    with open(path / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a {FORMAT} artifact")
+    if manifest.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {manifest['format_version']}; this code reads up to {FORMAT_VERSION}")
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        array = np.load(path / spec["file"], mmap_mode="r" if mmap else None, allow_pickle=False)
+        if array.dtype.str != spec["dtype"] or list(array.shape) != spec["shape"]:
+            raise ValueError(f"{path / spec['file']} does not match the manifest")
+        arrays[name] = array
+    return ModelArtifact(path, manifest, arrays)
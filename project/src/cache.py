@@ -0,0 +1,164 @@
+from __future__ import annotations
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import platform
+import shutil
+import uuid
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+VALUE_FILE = "value.pkl"
+FILES_DIR = "files"
+_CHUNK = 1 << 20
+
+__all__ = [
+    "DEFAULT_MAX_BYTES",
+    "StageCache",
+    "hash_path",
+    "code_fingerprint",
+]
+
+def _environment() -> str:
+    # Pickles are only reused by the interpreter and library versions that wrote them.
+    # Imported here so that importing the cache does not load numpy and pandas.
+    import numpy as np
+    import pandas as pd
+    return f"{platform.python_version()}|{np.__version__}|{pd.__version__}"
+
+def hash_path(path: str | Path) -> str:
+    """Content hash of a file, or of every file (and its relative name) under a directory."""
+    path = Path(path)
+    h = hashlib.blake2b(digest_size=16)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        if path.is_dir():
+            h.update(str(file.relative_to(path)).encode())
+        with open(file, "rb") as f:
+            while chunk := f.read(_CHUNK):
+                h.update(chunk)
+    return h.hexdigest()
+
+def code_fingerprint(*modules: Union[ModuleType, str]) -> str:
+    """
+    Hash of the modules' source files, so editing a stage's code invalidates
+    its entries. Modules may be given by name, e.g. "scripts.eda", which finds
+    the source without importing it.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for module in modules:
+        path = importlib.util.find_spec(module).origin if isinstance(module, str) else module.__file__
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+class StageCache:
+    """
+    Content-addressed on-disk cache of pipeline stage outputs.
+
+    A stage's key hashes its name, the keys of the stages it reads from (or
+    the content hash of the raw input), its parameters and the source of its
+    code, so a changed input or parameter invalidates that stage and, through
+    the chained keys, everything downstream of it -- and nothing upstream.
+
+    Each entry is a directory holding the pickled return value and copies of
+    any files the stage wrote (e.g. figures), restored to their original paths
+    on a hit. Entries are written under a temporary name and renamed, so
+    concurrent batch workers never read a partial entry. When the cache grows
+    beyond `max_bytes`, the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def key(
+        self, stage: str, *inputs, params: Optional[dict] = None, code: Iterable[Union[ModuleType, str]] = ()
+    ) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(_environment().encode())
+        h.update(stage.encode())
+        for value in inputs:
+            h.update(b"\0" + str(value).encode())
+        h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        h.update(code_fingerprint(*code).encode())
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str, outputs: Iterable[str | Path] = ()) -> Tuple[bool, object]:
+        """(True, value) on a hit, after copying the entry's files back to `outputs`; else (False, None)."""
+        entry = self._entry(key)
+        try:
+            with open(entry / VALUE_FILE, "rb") as f:
+                value = pickle.load(f)
+            for i, path in enumerate(outputs):
+                path = Path(path)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(entry / FILES_DIR / f"{i}_{path.name}", path)
+            # The entry's mtime is its last use, for LRU eviction
+            os.utime(entry)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Missing, evicted mid-read or written by incompatible code: a miss
+            return False, None
+        return True, value
+
+    def put(self, key: str, value: object = None, outputs: Iterable[str | Path] = ()) -> None:
+        entry = self._entry(key)
+        tmp = entry.parent / f".{key}.{uuid.uuid4().hex}.tmp"
+        (tmp / FILES_DIR).mkdir(parents=True)
+        try:
+            with open(tmp / VALUE_FILE, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            for i, path in enumerate(outputs):
+                shutil.copyfile(path, tmp / FILES_DIR / f"{i}_{Path(path).name}")
+            os.replace(tmp, entry)
+        except OSError:
+            # Another worker stored the same key first; its entry is equivalent
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def cached(self, key: str, compute: Callable[[], object], outputs: Iterable[str | Path] = ()) -> Tuple[object, bool]:
+        """
+        Returns (value, hit). On a miss runs `compute()`, which must also write
+        the files listed in `outputs`, and stores its value and those files.
+        """
+        outputs = list(outputs)
+        hit, value = self.get(key, outputs)
+        if hit:
+            return value, True
+        value = compute()
+        self.put(key, value, outputs)
+        return value, False
+
+    def entries(self) -> list:
+        """(mtime, size, path) of every entry."""
+        out = []
+        for entry in self.cache_dir.glob("*/*"):
+            if entry.name.startswith("."):
+                continue
+            try:
+                size = sum(p.stat().st_size for p in entry.rglob("*") if p.is_file())
+                out.append((entry.stat().st_mtime, size, entry))
+            except OSError:
+                continue
+        return out
+
+    def evict(self) -> int:
+        """Removes least recently used entries until the cache fits `max_bytes`; returns bytes freed."""
+        entries = sorted(self.entries(), key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            freed += size
+        return freed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
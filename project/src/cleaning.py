@@ -3,27 +3,35 @@ import pandas as pd
 import numpy as np
 from typing import Iterable
 
-def fill_missing_median(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
-    out = df.copy()
+# float32 keeps ~7 significant digits, enough for prices; downcast_numeric only
+# accepts a float column if every value round-trips within this relative error.
+DOWNCAST_RTOL = 1e-6
+
+def _target(df: pd.DataFrame, inplace: bool) -> pd.DataFrame:
+    # With inplace=True the caller's frame is modified and returned, avoiding a full copy
+    return df if inplace else df.copy()
+
+def fill_missing_median(df: pd.DataFrame, cols: Iterable[str], inplace: bool = False) -> pd.DataFrame:
+    out = _target(df, inplace)
     for c in cols:
         if c in out.columns and pd.api.types.is_numeric_dtype(out[c]):
             med = out[c].median()
             out[c] = out[c].fillna(med)
     return out
 
-def drop_missing(df: pd.DataFrame, threshold: float = 0.5) -> pd.DataFrame:
-    out = df.copy()
+def drop_missing(df: pd.DataFrame, threshold: float = 0.5, inplace: bool = False) -> pd.DataFrame:
+    out = _target(df, inplace)
     # drop columns above threshold missing
     col_missing = out.isna().mean()
     to_drop = [c for c, r in col_missing.items() if r > threshold]
     if to_drop:
-        out = out.drop(columns=to_drop)
+        out.drop(columns=to_drop, inplace=True)
     # drop remaining rows with any missing
-    out = out.dropna(axis=0, how='any')
+    out.dropna(axis=0, how='any', inplace=True)
     return out
 
-def normalize_data(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
-    out = df.copy()
+def normalize_data(df: pd.DataFrame, cols: Iterable[str], inplace: bool = False) -> pd.DataFrame:
+    out = _target(df, inplace)
     for c in cols:
         if c in out.columns and pd.api.types.is_numeric_dtype(out[c]):
             mu = out[c].mean()
@@ -31,3 +39,147 @@ def normalize_data(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
             if sigma and not np.isnan(sigma) and sigma != 0:
                 out[c] = (out[c] - mu) / sigma
     return out
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Bytes held by the frame's columns and index (object/string values included)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def downcast_numeric(
+    df: pd.DataFrame,
+    cols: Iterable[str] | None = None,
+    rtol: float = DOWNCAST_RTOL,
+    inplace: bool = False,
+) -> pd.DataFrame:
+    """
+    Stores float64 columns as float32 and int64 columns as int32 where no
+    information is lost: floats must round-trip within `rtol` (and integral
+    floats such as share volumes must stay exact), ints must fit the int32 range.
+    Other columns are left untouched.
+    """
+    out = _target(df, inplace)
+    if cols is None:
+        cols = out.columns
+    for c in cols:
+        if c not in out.columns:
+            continue
+        dtype = out[c].dtype
+        x = out[c].to_numpy()
+        if dtype == np.float64:
+            with np.errstate(over='ignore'):
+                y = x.astype(np.float32)
+            back = y.astype(np.float64)
+            finite = np.isfinite(x)
+            ok = np.array_equal(np.isfinite(back), finite)
+            if ok:
+                xf, bf = x[finite], back[finite]
+                integral = xf == np.round(xf)
+                ok = np.array_equal(bf[integral], xf[integral]) and bool(
+                    np.all(np.abs(bf - xf) <= rtol * np.abs(xf))
+                )
+            if ok:
+                out[c] = y
+        elif dtype == np.int64 and len(x):
+            info = np.iinfo(np.int32)
+            if info.min <= x.min() and x.max() <= info.max:
+                out[c] = x.astype(np.int32)
+    return out
+
+class FittedColumnTransform:
+    """
+    Base for fit-once / transform-many cleaning steps. `fit` learns one number
+    (or a pair) per column and stores them as NumPy arrays; `transform_array`
+    applies them to a 2-D block or a single row in one vectorized operation,
+    so a serving path can reuse training-time statistics for a row that could
+    not produce them itself. Instances pickle alongside the model.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self):
+        self.columns: list[str] = []
+
+    def _fit_block(self, block: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def transform_array(self, X: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _transform_column(self, i: int, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def fit(self, df: pd.DataFrame, cols: Iterable[str] | None = None):
+        if cols is None:
+            cols = df.select_dtypes(include='number').columns
+        self.columns = [c for c in cols if c in df.columns and pd.api.types.is_numeric_dtype(df[c])]
+        self._fit_block(df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan))
+        return self
+
+    def transform(self, df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame:
+        if inplace:
+            # Column at a time, so the peak is one column rather than a float64 block;
+            # every column keeps its dtype, so a --lean downcast is not undone
+            for i, c in enumerate(self.columns):
+                x = df[c].to_numpy()
+                y = self._transform_column(i, x.astype(np.float64, copy=False))
+                if x.dtype.kind in 'iu':
+                    info = np.iinfo(x.dtype)
+                    y = np.clip(np.rint(y), info.min, info.max)
+                df[c] = y.astype(x.dtype, copy=False) if x.dtype.kind in 'fiu' else y
+            return df
+        if not self.columns:
+            return df.copy()
+        block = self.transform_array(df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan))
+        # Untouched columns are shared with df; only the transformed ones are new
+        out = df.copy(deep=False)
+        for i, c in enumerate(self.columns):
+            out[c] = block[:, i]
+        return out
+
+    def fit_transform(self, df: pd.DataFrame, cols: Iterable[str] | None = None) -> pd.DataFrame:
+        return self.fit(df, cols).transform(df)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(columns={self.columns})"
+
+class MedianImputer(FittedColumnTransform):
+    """Stateful counterpart of `fill_missing_median`."""
+
+    __slots__ = ("medians",)
+
+    def __init__(self):
+        super().__init__()
+        self.medians = np.empty(0)
+
+    def _fit_block(self, block: np.ndarray) -> None:
+        self.medians = pd.DataFrame(block).median().to_numpy()
+
+    def transform_array(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        return np.where(np.isnan(X), self.medians, X)
+
+    def _transform_column(self, i: int, x: np.ndarray) -> np.ndarray:
+        return np.where(np.isnan(x), self.medians[i], x)
+
+class Standardizer(FittedColumnTransform):
+    """Stateful counterpart of `normalize_data` (population std; constant columns pass through)."""
+
+    __slots__ = ("means", "stds")
+
+    def __init__(self):
+        super().__init__()
+        self.means = np.empty(0)
+        self.stds = np.empty(0)
+
+    def _fit_block(self, block: np.ndarray) -> None:
+        frame = pd.DataFrame(block)
+        mu = frame.mean().to_numpy()
+        sigma = frame.std(ddof=0).to_numpy()
+        usable = (sigma != 0) & ~np.isnan(sigma)
+        self.means = np.where(usable, mu, 0.0)
+        self.stds = np.where(usable, sigma, 1.0)
+
+    def transform_array(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.means) / self.stds
+
+    def _transform_column(self, i: int, x: np.ndarray) -> np.ndarray:
+        return (x - self.means[i]) / self.stds[i]
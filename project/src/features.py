@@ -0,0 +1,232 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Union
+import numpy as np
+import pandas as pd
+
+# A spec maps a registered feature kind to its windows, e.g.
+# {"returns": [1, 5, 20], "sma": [5, 20, 60], "vol": [5, 20], "rsi": [14], "atr": True, "volume_z": [20]}
+# `True` selects the kind's default window.
+FeatureSpec = Mapping[str, Union[bool, int, Iterable[int]]]
+
+DEFAULT_FEATURE_SPEC: Dict[str, List[int]] = {
+    "returns": [1, 5, 20],
+    "sma": [5, 20, 60],
+    "vol": [5, 20],
+    "rsi": [14],
+    "atr": [14],
+    "volume_z": [20],
+}
+
+__all__ = [
+    "FEATURE_REGISTRY",
+    "DEFAULT_FEATURE_SPEC",
+    "register_feature",
+    "feature_names",
+    "compute_features",
+]
+
+class _Context:
+    """
+    Shared, lazily computed arrays for one compute_features call. Every
+    intermediate (returns, true range, prefix sums, ...) is built at most once
+    and reused by all features and windows that need it.
+    """
+
+    def __init__(self, df: pd.DataFrame, groups: Optional[np.ndarray]):
+        self.df = df
+        self.n = len(df)
+        self.groups = groups
+        self._cache: Dict[tuple, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        key = ("col", name)
+        if key not in self._cache:
+            if name not in self.df.columns:
+                raise KeyError(f"Feature input column '{name}' not in frame")
+            self._cache[key] = self.df[name].to_numpy(dtype=np.float64)
+        return self._cache[key]
+
+    def lag(self, name: str, k: int) -> np.ndarray:
+        """Value k rows earlier within the same group (NaN otherwise)."""
+        key = ("lag", name, k)
+        if key not in self._cache:
+            x = self.column(name)
+            out = np.full(self.n, np.nan)
+            if k < self.n:
+                out[k:] = x[:-k]
+            out[~self.same_group(k + 1)] = np.nan
+            self._cache[key] = out
+        return self._cache[key]
+
+    def same_group(self, w: int) -> np.ndarray:
+        """True where rows t-w+1..t all belong to the same group."""
+        key = ("group", w)
+        if key not in self._cache:
+            ok = np.zeros(self.n, dtype=bool)
+            if w <= self.n:
+                ok[w - 1:] = True
+                if self.groups is not None:
+                    ok[w - 1:] &= self.groups[w - 1:] == self.groups[: self.n - w + 1]
+            self._cache[key] = ok
+        return self._cache[key]
+
+    def derived(self, name: str, fn: Callable[["_Context"], np.ndarray]) -> np.ndarray:
+        key = ("derived", name)
+        if key not in self._cache:
+            self._cache[key] = fn(self)
+        return self._cache[key]
+
+    def prefix(self, name: str, x: np.ndarray) -> tuple:
+        """
+        Prefix sums of the (centered) values, their squares and the valid-count.
+        Centering by the mean keeps the sum-of-squares variance formula accurate
+        for large-magnitude inputs such as volume.
+        """
+        key = ("prefix", name)
+        if key not in self._cache:
+            valid = ~np.isnan(x)
+            center = float(x[valid].mean()) if valid.any() else 0.0
+            xc = np.where(valid, x - center, 0.0)
+            zero = np.zeros(1)
+            self._cache[key] = (
+                np.concatenate([zero, np.cumsum(xc)]),
+                np.concatenate([zero, np.cumsum(xc * xc)]),
+                np.concatenate([np.zeros(1, dtype=np.int64), np.cumsum(valid)]),
+                center,
+            )
+        return self._cache[key]
+
+    def window_mean_var(self, name: str, x: np.ndarray, w: int, ddof: int = 1) -> tuple:
+        """
+        Trailing-window mean and variance for every row from prefix sums: O(n) per window
+        regardless of its length. Windows with a NaN or spanning two groups are NaN.
+        """
+        s, ss, cnt, center = self.prefix(name, x)
+        mean = np.full(self.n, np.nan)
+        var = np.full(self.n, np.nan)
+        if w > self.n:
+            return mean, var
+        ws = s[w:] - s[:-w]
+        wss = ss[w:] - ss[:-w]
+        full = (cnt[w:] - cnt[:-w] == w) & self.same_group(w)[w - 1:]
+        m = ws / w
+        mean[w - 1:] = np.where(full, m + center, np.nan)
+        if w > ddof:
+            v = np.maximum((wss - ws * m) / (w - ddof), 0.0)
+            var[w - 1:] = np.where(full, v, np.nan)
+        return mean, var
+
+def _simple_returns(ctx: _Context) -> np.ndarray:
+    return ctx.column("close") / ctx.lag("close", 1) - 1.0
+
+def _true_range(ctx: _Context) -> np.ndarray:
+    high, low = ctx.column("high"), ctx.column("low")
+    prev_close = ctx.lag("close", 1)
+    tr = high - low
+    with np.errstate(invalid="ignore"):
+        tr = np.fmax(tr, np.abs(high - prev_close))
+        tr = np.fmax(tr, np.abs(low - prev_close))
+    return tr
+
+def _returns(ctx: _Context, w: int) -> np.ndarray:
+    return ctx.column("close") / ctx.lag("close", w) - 1.0
+
+def _sma(ctx: _Context, w: int) -> np.ndarray:
+    return ctx.window_mean_var("close", ctx.column("close"), w)[0]
+
+def _vol(ctx: _Context, w: int) -> np.ndarray:
+    r = ctx.derived("returns_1", _simple_returns)
+    return np.sqrt(ctx.window_mean_var("returns_1", r, w)[1])
+
+def _rsi(ctx: _Context, w: int) -> np.ndarray:
+    # Cutler's RSI: simple (not Wilder-smoothed) averages of gains and losses,
+    # which keeps it expressible with prefix sums
+    diff = ctx.column("close") - ctx.lag("close", 1)
+    gain = ctx.derived("gain", lambda c: np.where(np.isnan(diff), np.nan, np.maximum(diff, 0.0)))
+    loss = ctx.derived("loss", lambda c: np.where(np.isnan(diff), np.nan, np.maximum(-diff, 0.0)))
+    avg_gain = ctx.window_mean_var("gain", gain, w)[0]
+    avg_loss = ctx.window_mean_var("loss", loss, w)[0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+
+def _atr(ctx: _Context, w: int) -> np.ndarray:
+    # Simple moving average of the true range
+    tr = ctx.derived("true_range", _true_range)
+    return ctx.window_mean_var("true_range", tr, w)[0]
+
+def _volume_z(ctx: _Context, w: int) -> np.ndarray:
+    volume = ctx.column("volume")
+    mean, var = ctx.window_mean_var("volume", volume, w)
+    sd = np.sqrt(var)
+    z = np.full(ctx.n, np.nan)
+    ok = ~np.isnan(mean)
+    # A flat window has no dispersion; report a z-score of 0 rather than inf
+    z[ok] = np.where(sd[ok] > 0, (volume[ok] - mean[ok]) / np.where(sd[ok] > 0, sd[ok], 1.0), 0.0)
+    return z
+
+# kind -> (function(ctx, window), output name template, default window)
+FEATURE_REGISTRY: Dict[str, tuple] = {
+    "returns": (_returns, "return_{w}d", 1),
+    "sma": (_sma, "sma_{w}", 20),
+    "vol": (_vol, "vol_{w}", 20),
+    "rsi": (_rsi, "rsi_{w}", 14),
+    "atr": (_atr, "atr_{w}", 14),
+    "volume_z": (_volume_z, "volume_z_{w}", 20),
+}
+
+def register_feature(kind: str, fn: Callable[[_Context, int], np.ndarray], name_template: str, default_window: int) -> None:
+    """
+    Adds a feature kind to the registry. `fn(ctx, window)` returns one float array of len(df).
+    """
+    FEATURE_REGISTRY[kind] = (fn, name_template, default_window)
+
+def _windows(kind: str, value) -> List[int]:
+    if kind not in FEATURE_REGISTRY:
+        raise ValueError(f"Unknown feature kind: {kind}")
+    if value is True:
+        return [FEATURE_REGISTRY[kind][2]]
+    if value is False or value is None:
+        return []
+    if isinstance(value, (int, np.integer)):
+        return [int(value)]
+    return [int(w) for w in value]
+
+def feature_names(spec: FeatureSpec = DEFAULT_FEATURE_SPEC) -> List[str]:
+    """
+    Output column names for a spec, in the order compute_features returns them.
+    """
+    return [
+        FEATURE_REGISTRY[kind][1].format(w=w)
+        for kind, value in spec.items()
+        for w in _windows(kind, value)
+    ]
+
+def compute_features(
+    df: pd.DataFrame,
+    spec: FeatureSpec = DEFAULT_FEATURE_SPEC,
+    by: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Computes every feature in `spec` from the close/high/low/volume columns in
+    one vectorized pass and returns them as a new frame aligned with `df`.
+
+    With `by` (e.g. 'symbol'), many series stacked in one frame are featurized
+    together; rows must be time-ordered and contiguous per group, and windows
+    never cross a group boundary.
+    """
+    groups = None
+    if by is not None:
+        groups, uniques = pd.factorize(df[by])
+        if len(groups) and np.count_nonzero(np.diff(groups)) + 1 > len(uniques):
+            raise ValueError(f"Rows must be contiguous per '{by}' (sort by ['{by}', 'date'] first)")
+    ctx = _Context(df, groups)
+    out = {}
+    for kind, value in spec.items():
+        windows = _windows(kind, value)
+        fn, template, _ = FEATURE_REGISTRY[kind]
+        for w in windows:
+            if w < 1:
+                raise ValueError(f"Window for '{kind}' must be >= 1, got {w}")
+            out[template.format(w=w)] = fn(ctx, w)
+    return pd.DataFrame(out, index=df.index)
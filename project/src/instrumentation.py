@@ -0,0 +1,208 @@
+from __future__ import annotations
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# Written next to the evaluation report; one JSON object per stage and run
+RUN_LOG_FILENAME = "run_log.jsonl"
+
+__all__ = [
+    "RUN_LOG_FILENAME",
+    "StageRecord",
+    "StageRecorder",
+]
+
+def _status_mb(key: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+def _reset_peak_rss() -> bool:
+    # Writing 5 to clear_refs resets the VmHWM high-water mark (Linux only)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+# Stages running in this process: the high-water mark is process-wide, so it is
+# only reset, and a peak only attributed to one stage, when no other stage overlaps
+_active: List["StageRecord"] = []
+_active_lock = threading.Lock()
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is the peak over the process lifetime, in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def _shape(obj) -> tuple:
+    shape = getattr(obj, "shape", None)
+    if shape is None:
+        return None, None
+    return int(shape[0]), int(shape[1]) if len(shape) > 1 else 1
+
+class StageRecord:
+    """
+    Measurements of one stage; `output` sets the row/column counts out and
+    `cache` is "hit" or "miss" for stages served through src.cache.StageCache.
+    `peak_rss_scope` is "stage" when `peak_rss_mb` covers this stage alone and
+    "process" when it is the process peak over a window other stages shared.
+    """
+
+    __slots__ = (
+        "name", "rows_in", "cols_in", "rows_out", "cols_out", "wall_s", "cpu_s",
+        "rss_mb", "peak_rss_mb", "peak_rss_scope", "peak_traced_mb", "profile", "cache", "status", "error",
+        "started",
+    )
+
+    def __init__(self, name: str, frame_in=None):
+        self.name = name
+        self.rows_in, self.cols_in = _shape(frame_in)
+        self.rows_out = self.cols_out = None
+        self.wall_s = self.cpu_s = None
+        self.rss_mb = self.peak_rss_mb = self.peak_traced_mb = None
+        self.peak_rss_scope = "process"
+        self.profile = None
+        self.cache = None
+        self.status = "ok"
+        self.error = None
+        self.started = datetime.now().isoformat(timespec="milliseconds")
+
+    def output(self, frame) -> None:
+        self.rows_out, self.cols_out = _shape(frame)
+
+    @property
+    def rows_dropped(self) -> Optional[int]:
+        if self.rows_in is None or self.rows_out is None:
+            return None
+        return self.rows_in - self.rows_out
+
+    def to_dict(self) -> dict:
+        out = {k: getattr(self, k) for k in self.__slots__}
+        out["rows_dropped"] = self.rows_dropped
+        return out
+
+class StageRecorder:
+    """
+    Times and measures the stages of one pipeline run.
+
+        recorder = StageRecorder(run_id, symbol="AAPL", log_path=reports_dir / RUN_LOG_FILENAME)
+        with recorder.stage("clean", df) as st:
+            df_clean = drop_missing(df)
+            st.output(df_clean)
+        recorder.write()
+
+    Every stage records wall and CPU time, RSS at the end and the stage's peak
+    RSS (the kernel's high-water mark is reset on entry where supported and no
+    other stage is running; otherwise it is a process-wide peak, flagged by
+    `peak_rss_scope`), and the row/column counts going
+    in and out. `trace_memory` adds the tracemalloc peak, which sees Python and
+    NumPy allocations but not native ones and slows allocation-heavy stages.
+    `profile_dir` runs each stage under cProfile and saves `<stage>.prof`
+    plus a text summary of the top functions by cumulative time.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        symbol: Optional[str] = None,
+        log_path: Optional[str | Path] = None,
+        profile_dir: Optional[str | Path] = None,
+        trace_memory: bool = False,
+    ):
+        self.run_id = run_id
+        self.symbol = symbol
+        self.log_path = Path(log_path) if log_path is not None else None
+        self.profile_dir = Path(profile_dir) if profile_dir is not None else None
+        self.trace_memory = trace_memory
+        self.records: List[StageRecord] = []
+
+    @contextmanager
+    def stage(self, name: str, frame_in=None) -> Iterator[StageRecord]:
+        record = StageRecord(name, frame_in)
+        self.records.append(record)
+        with _active_lock:
+            if _active:
+                # Resetting now would cut short the peaks of the stages already running
+                for other in _active:
+                    other.peak_rss_scope = "process"
+            elif _reset_peak_rss():
+                record.peak_rss_scope = "stage"
+            _active.append(record)
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        profiler = cProfile.Profile() if self.profile_dir is not None else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record.status = "failed"
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record.wall_s = time.perf_counter() - wall
+            record.cpu_s = time.process_time() - cpu
+            if tracing:
+                record.peak_traced_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            with _active_lock:
+                _active.remove(record)
+            record.rss_mb = _status_mb("VmRSS")
+            record.peak_rss_mb = _status_mb("VmHWM") or _max_rss_mb()
+            if profiler is not None:
+                record.profile = str(self._save_profile(profiler, name))
+
+    def _save_profile(self, profiler: cProfile.Profile, name: str) -> Path:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.profile_dir / f"{name}.prof"
+        profiler.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(25)
+        path.with_suffix(".txt").write_text(text.getvalue())
+        return path
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<16}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}{'rows in':>10}{'rows out':>10}  cache"]
+        for r in self.records:
+            mark = "*" if r.peak_rss_scope == "process" else " "
+            lines.append(
+                f"{r.name:<16}{r.wall_s or 0:9.3f}{r.cpu_s or 0:9.3f}{r.peak_rss_mb or 0:9.1f}{mark}"
+                f"{'' if r.rows_in is None else r.rows_in:>10}{'' if r.rows_out is None else r.rows_out:>10}"
+                f"  {r.cache or ''}"
+            )
+        if any(r.peak_rss_scope == "process" for r in self.records):
+            lines.append("* process-wide peak: the stage overlapped other stages, or the peak could not be reset")
+        return "\n".join(lines)
+
+    def write(self) -> Optional[Path]:
+        """Appends one JSON line per recorded stage to `log_path`."""
+        if self.log_path is None:
+            return None
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a") as f:
+            for r in self.records:
+                entry = {"run_id": self.run_id, "symbol": self.symbol, "pid": os.getpid(), **r.to_dict()}
+                f.write(json.dumps(entry) + "\n")
+        return self.log_path
@@ -0,0 +1,256 @@
+from __future__ import annotations
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from 25 µs to 1 s; the stage14 SLO (p95 < 250 ms) is a bucket edge
+LATENCY_BUCKETS = (
+    0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "Counter",
+    "Histogram",
+    "MetricsRegistry",
+    "REGISTRY",
+    "CONTENT_TYPE",
+    "RequestMetrics",
+]
+
+# Shards per metric child; threads map onto them by native thread id
+SHARDS = 16
+
+class _Sharded:
+    """
+    A fixed-size list of numbers split over SHARDS shards, each with its own
+    lock. A thread updates the shard picked by its native id, so concurrent
+    threads rarely contend for a lock, and memory stays bounded however many
+    short-lived threads (e.g. one per request) come and go. Readers sum all shards.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._values: List[list] = [[0] * size for _ in range(SHARDS)]
+        self._locks = [threading.Lock() for _ in range(SHARDS)]
+
+    def shard(self) -> Tuple[threading.Lock, list]:
+        """The calling thread's shard and the lock to hold while updating it."""
+        i = threading.get_native_id() % SHARDS
+        return self._locks[i], self._values[i]
+
+    def totals(self) -> list:
+        out = [0] * self._size
+        for lock, values in zip(self._locks, self._values):
+            with lock:
+                snapshot = list(values)
+            for i, v in enumerate(snapshot):
+                out[i] += v
+        return out
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """
+        The child for one label combination. Cache the result on hot paths:
+        the lookup is a dict get, the child's update takes a rarely contended shard lock.
+        """
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _label_str(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+class _CounterChild:
+    __slots__ = ("_values",)
+
+    def __init__(self):
+        self._values = _Sharded(1)
+
+    def inc(self, amount: float = 1) -> None:
+        lock, values = self._values.shard()
+        with lock:
+            values[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._values.totals()[0]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def render(self) -> Iterable[str]:
+        for key, child in sorted(self._children.items()):
+            yield f"{self.name}{self._label_str(key)} {_fmt(child.value)}"
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_values")
+
+    def __init__(self, bounds: Sequence[float]):
+        self._bounds = bounds
+        # One slot per bucket (plus +Inf), then the running sum
+        self._values = _Sharded(len(bounds) + 2)
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self._bounds, value)
+        lock, values = self._values.shard()
+        with lock:
+            values[i] += 1
+            values[-1] += value
+
+    def snapshot(self) -> Tuple[list, float]:
+        totals = self._values.totals()
+        return totals[:-1], totals[-1]
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket edge below which a `q` share of observations fall (inf past the last bucket)."""
+        counts, _ = self.snapshot()
+        total = sum(counts)
+        if not total:
+            return float("nan")
+        running = 0
+        for bound, c in zip(list(self._bounds) + [float("inf")], counts):
+            running += c
+            if running >= q * total:
+                return bound
+        return float("inf")
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def render(self) -> Iterable[str]:
+        for key, child in sorted(self._children.items()):
+            counts, total = child.snapshot()
+            running = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                running += c
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else _fmt(bound))
+                yield f"{self.name}_bucket{self._label_str(key, le)} {running}"
+            yield f"{self.name}_sum{self._label_str(key)} {_fmt(total)}"
+            yield f"{self.name}_count{self._label_str(key)} {running}"
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Default registry used by the serving apps
+REGISTRY = MetricsRegistry()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class RequestMetrics:
+    """
+    Hot-path instrumentation for the prediction endpoints: a latency histogram
+    per request stage (parse, validate, predict, serialize) and end to end, and
+    request / predicted-row counters, all labelled by endpoint and model version.
+
+    `record` takes the perf_counter timestamps taken at the stage boundaries,
+    so a request pays for a few clock reads and histogram increments.
+    """
+
+    STAGES = ("parse", "validate", "predict", "serialize")
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.stage_seconds = registry.histogram(
+            "prediction_stage_seconds", "Time spent per request stage.", ("endpoint", "stage", "model_version")
+        )
+        self.request_seconds = registry.histogram(
+            "prediction_request_seconds", "End-to-end request latency.", ("endpoint", "model_version")
+        )
+        self.requests = registry.counter(
+            "prediction_requests_total", "Requests by response status.", ("endpoint", "status", "model_version")
+        )
+        self.rows = registry.counter(
+            "prediction_rows_total", "Rows predicted.", ("endpoint", "model_version")
+        )
+        self._children: Dict[tuple, tuple] = {}
+
+    def _for(self, endpoint: str, version, status: int) -> tuple:
+        key = (endpoint, version, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                [self.stage_seconds.labels(endpoint, s, version) for s in self.STAGES],
+                self.request_seconds.labels(endpoint, version),
+                self.requests.labels(endpoint, status, version),
+                self.rows.labels(endpoint, version),
+            )
+        return children
+
+    def record(self, endpoint: str, version, status: int, stamps: Sequence[float], rows: int = 0) -> None:
+        """
+        `stamps` are the start time followed by the end of each completed stage;
+        a request that failed early passes fewer.
+        """
+        stages, total, requests, row_counter = self._for(endpoint, version, status)
+        for hist, start, end in zip(stages, stamps, stamps[1:]):
+            hist.observe(end - start)
+        total.observe(stamps[-1] - stamps[0])
+        requests.inc()
+        if rows:
+            row_counter.inc(rows)
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
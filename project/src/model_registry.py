@@ -0,0 +1,130 @@
+from __future__ import annotations
+import asyncio
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.artifacts import read_artifact, write_artifact
+from src.serving import LinearPredictor, load_predictor
+
+# <registry>/CURRENT names the live version; <registry>/<version>/ holds its files
+CURRENT_FILE = "CURRENT"
+
+__all__ = [
+    "ModelRegistry",
+    "publish_model",
+    "load_version",
+    "open_model",
+]
+
+def publish_model(
+    predictor: LinearPredictor,
+    registry_dir: str | Path,
+    keep: int = 5,
+    training_window: Optional[dict] = None,
+    data_hash: Optional[str] = None,
+) -> str:
+    """
+    Writes `predictor` as a new version (a src.artifacts directory, so servers
+    can memory-map it) and makes it current. The version directory is complete
+    before CURRENT is replaced atomically: readers see the old version or the
+    new one, never a partial one. Versions beyond the newest `keep` are removed.
+    """
+    registry_dir = Path(registry_dir)
+    registry_dir.mkdir(parents=True, exist_ok=True)
+    version = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    write_artifact(
+        registry_dir / version,
+        predictor.coef,
+        predictor.intercept,
+        predictor.feature_names or [f"x{i}" for i in range(predictor.n_features)],
+        lo=predictor.lo,
+        hi=predictor.hi,
+        training_window=training_window,
+        data_hash=data_hash,
+    )
+
+    pointer = registry_dir / f".{CURRENT_FILE}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, registry_dir / CURRENT_FILE)
+
+    # Workers still serving a removed version keep their mapping until they swap
+    versions = sorted(p.name for p in registry_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in versions[:-keep]:
+        shutil.rmtree(registry_dir / old, ignore_errors=True)
+    return version
+
+def load_version(version_dir: str | Path) -> LinearPredictor:
+    """
+    Maps a published version into memory. The arrays are read-only views of the
+    files, so every process serving the same version shares one copy of its
+    pages through the OS page cache instead of unpickling its own.
+    """
+    return read_artifact(version_dir).predictor()
+
+def open_model(path: str | Path) -> LinearPredictor:
+    """
+    Loads a model for serving from a registry (its current version), an
+    artifact directory, or -- for models saved before artifacts existed -- a
+    pickle with its preprocessing steps. Only the last one unpickles anything.
+    """
+    path = Path(path)
+    if (path / CURRENT_FILE).is_file():
+        return load_version(path / (path / CURRENT_FILE).read_text().strip())
+    if path.is_dir():
+        return load_version(path)
+    return load_predictor(path)
+
+class ModelRegistry:
+    """
+    Serves the current version of a registry directory and hot-reloads it.
+
+    `current` is a plain attribute read, and a reload replaces it with one
+    assignment, so requests never see a half-loaded model: each request takes
+    the predictor once and finishes on it even if a newer version is swapped
+    in meanwhile.
+    """
+
+    def __init__(self, registry_dir: str | Path, poll_interval: float = 1.0):
+        self.registry_dir = Path(registry_dir)
+        self.poll_interval = poll_interval
+        self.current: Optional[LinearPredictor] = None
+        self._mtime_ns: Optional[int] = None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.current.version if self.current is not None else None
+
+    def refresh(self) -> bool:
+        """
+        Loads the version named by CURRENT if it changed; returns True on a swap.
+        A missing or broken version leaves the live model in place.
+        """
+        pointer = self.registry_dir / CURRENT_FILE
+        try:
+            mtime_ns = pointer.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime_ns == self._mtime_ns:
+            return False
+        version = pointer.read_text().strip()
+        if version == self.version:
+            self._mtime_ns = mtime_ns
+            return False
+        try:
+            predictor = load_version(self.registry_dir / version)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Model registry: could not load version {version}: {e}")
+            return False
+        self.current = predictor
+        self._mtime_ns = mtime_ns
+        return True
+
+    async def watch(self) -> None:
+        """Polls for new versions until cancelled; run as a background task."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self.refresh():
+                print(f"Model registry: now serving version {self.version}")
@@ -0,0 +1,379 @@
+from __future__ import annotations
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Alert thresholds of the stage14 monitoring plan
+NULL_RATE_MAX = 0.05
+FRESHNESS_MAX_S = 60 * 60
+MAE_INCREASE_MAX = 0.15
+PSI_MAX = 0.1
+# PSI over fewer rows than this is reported but does not alert
+PSI_MIN_ROWS = 100
+
+DEFAULT_BINS = 10
+# Rolling window: WINDOW_PERIODS periods of PERIOD_S seconds (7 days)
+PERIOD_S = 24 * 60 * 60
+WINDOW_PERIODS = 7
+MONITOR_FILENAME = "monitor.json"
+
+__all__ = [
+    "MONITOR_FILENAME",
+    "Histograms",
+    "DriftMonitor",
+    "psi",
+]
+
+def _epoch_seconds(at, n: int) -> np.ndarray:
+    """Timestamps (None for now, epoch seconds, datetimes or an array of them) as n epoch seconds."""
+    if at is None:
+        return np.full(n, time.time())
+    values = np.asarray(getattr(at, "values", at))
+    if np.issubdtype(values.dtype, np.number):
+        seconds = values.astype(np.float64)
+    else:
+        seconds = values.astype("datetime64[ns]").astype(np.int64) / 1e9
+    return np.broadcast_to(seconds, (n,)) if seconds.ndim == 0 else seconds
+
+def psi(expected: np.ndarray, actual: np.ndarray, eps: float = 1e-4) -> np.ndarray:
+    """
+    Population Stability Index per row of two (features x bins) count arrays:
+    sum((a - e) * ln(a / e)) over the bins' proportions, floored at `eps` so
+    empty bins stay finite. NaN for a feature without counts on either side.
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        e = np.maximum(expected / expected.sum(axis=1, keepdims=True), eps)
+        a = np.maximum(actual / actual.sum(axis=1, keepdims=True), eps)
+        return ((a - e) * np.log(a / e)).sum(axis=1)
+
+class Histograms:
+    """
+    Fixed-bin histograms and null counters for a set of features.
+
+    Every feature has `bins` bins separated by `cuts` (bins - 1 cut points, the
+    outer bins open-ended), so a batch is counted in O(batch) and histograms
+    with the same cuts -- from other batches, periods or processes -- combine
+    by adding their counts (`merge`).
+    """
+
+    __slots__ = ("features", "cuts", "counts", "nulls", "n")
+
+    def __init__(self, features: Iterable[str], cuts, counts=None, nulls=None, n=None):
+        self.features = [str(f) for f in features]
+        self.cuts = np.asarray(cuts, dtype=np.float64)
+        k, bins = len(self.features), self.cuts.shape[1] + 1
+        self.counts = np.zeros((k, bins), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.nulls = np.zeros(k, dtype=np.int64) if nulls is None else np.asarray(nulls, dtype=np.int64)
+        # Rows seen per feature: a batch may hold only some of the features
+        self.n = np.zeros(k, dtype=np.int64) if n is None else np.asarray(n, dtype=np.int64)
+
+    @classmethod
+    def fit(cls, df, features: Optional[Iterable[str]] = None, bins: int = DEFAULT_BINS) -> "Histograms":
+        """
+        Bins at the quantiles of the reference frame `df` (e.g. the training
+        rows), so each holds about 1/bins of it, and counts `df` into them.
+        """
+        features = list(features) if features is not None else list(df.select_dtypes(include=[np.number]).columns)
+        X = df[features].to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            cuts = np.nanquantile(X, np.linspace(0, 1, bins + 1)[1:-1], axis=0).T
+        # A feature without any value gets cuts that send everything to the first bin
+        cuts = np.where(np.isnan(cuts), np.inf, cuts)
+        return cls(features, cuts).update(df)
+
+    def empty(self) -> "Histograms":
+        return Histograms(self.features, self.cuts)
+
+    def _columns(self, X) -> tuple:
+        """(indices of the features in the batch, the batch as a float array with those columns)."""
+        if hasattr(X, "columns"):
+            present = [i for i, f in enumerate(self.features) if f in X.columns]
+            return present, X[[self.features[i] for i in present]].to_numpy(dtype=np.float64)
+        return list(range(len(self.features))), np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+    def _count(self, X: np.ndarray, present: list, groups: Optional[np.ndarray] = None, n_groups: int = 1) -> tuple:
+        """
+        Bin counts (groups x features x bins), null counts (groups x features) and
+        row counts (groups) of `X`, whose rows are assigned to `groups`. One pass.
+        """
+        cuts = self.cuts[present]
+        k, bins = len(present), cuts.shape[1] + 1
+        g = np.zeros(len(X), dtype=np.intp) if groups is None else groups
+        null = np.isnan(X)
+        # Bin index = number of cut points below the value; NaN compares False and is masked out
+        idx = (X[:, :, None] > cuts[None]).sum(axis=2)
+        cell = g[:, None] * k + np.arange(k)
+        counts = np.bincount((cell * bins + idx)[~null], minlength=n_groups * k * bins).reshape(n_groups, k, bins)
+        nulls = np.bincount(cell[null], minlength=n_groups * k).reshape(n_groups, k)
+        return counts, nulls, np.bincount(g, minlength=n_groups)
+
+    def _add(self, present: list, counts: np.ndarray, nulls: np.ndarray, rows: int) -> None:
+        if len(present) == len(self.features):
+            # Every feature: add in place without fancy indexing (the served-request case)
+            self.counts += counts
+            self.nulls += nulls
+            self.n += rows
+            return
+        self.counts[present] += counts
+        self.nulls[present] += nulls
+        self.n[present] += rows
+
+    def update(self, X) -> "Histograms":
+        """
+        Counts a batch: a DataFrame (the features it holds are counted, others
+        are left alone) or an array with the features as columns, in order.
+        NaNs count as nulls.
+        """
+        present, X = self._columns(X)
+        if len(X) and present:
+            counts, nulls, rows = self._count(X, present)
+            self._add(present, counts[0], nulls[0], rows[0])
+        return self
+
+    def merge(self, other: "Histograms") -> "Histograms":
+        """Adds `other`'s counts (same features and cuts) into this one and returns self."""
+        if other.features != self.features or not np.array_equal(other.cuts, self.cuts):
+            raise ValueError("Only histograms with the same features and cuts can be merged")
+        self.counts += other.counts
+        self.nulls += other.nulls
+        self.n += other.n
+        return self
+
+    def null_rate(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 0, self.nulls / self.n, np.nan)
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts.tolist(), "nulls": self.nulls.tolist(), "n": self.n.tolist()}
+
+    def __repr__(self) -> str:
+        return f"Histograms(features={len(self.features)}, bins={self.counts.shape[1]}, rows={int(self.n.max(initial=0))})"
+
+class DriftMonitor:
+    """
+    Streaming data-quality and drift monitor for a model's input features.
+
+    The reference histograms are built once from the training frame. Incoming
+    batches (pipeline ingests or served requests) are counted into one
+    histogram per period (day) of their timestamps, and prediction errors into
+    per-period sums; only the last `window` periods are kept. Every check
+    therefore merges at most `window` small arrays, whatever the history length:
+    - null rate per feature over the window;
+    - PSI of the window's histograms against the reference;
+    - MAE over the window against the training baseline;
+    - freshness: time since the newest observed timestamp.
+
+    Updates take a lock, so request threads can share one monitor; monitors of
+    other processes combine with `merge`.
+    """
+
+    __slots__ = ("reference", "baseline_mae", "period_s", "window", "last_seen", "_periods", "_errors", "_lock")
+
+    def __init__(
+        self,
+        reference: Histograms,
+        baseline_mae: Optional[float] = None,
+        period_s: int = PERIOD_S,
+        window: int = WINDOW_PERIODS,
+    ):
+        self.reference = reference
+        self.baseline_mae = baseline_mae
+        self.period_s = period_s
+        self.window = window
+        self.last_seen: Optional[float] = None
+        self._periods: Dict[int, Histograms] = {}
+        # period -> [sum of absolute errors, count]
+        self._errors: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fit(
+        cls,
+        train_df,
+        features: Optional[Iterable[str]] = None,
+        baseline_mae: Optional[float] = None,
+        bins: int = DEFAULT_BINS,
+        **kwargs,
+    ) -> "DriftMonitor":
+        return cls(Histograms.fit(train_df, features, bins), baseline_mae, **kwargs)
+
+    @property
+    def features(self) -> List[str]:
+        return self.reference.features
+
+    def _evict(self) -> None:
+        latest = max(self._periods.keys() | self._errors.keys(), default=None)
+        if latest is None:
+            return
+        for store in (self._periods, self._errors):
+            for p in [p for p in store if p <= latest - self.window]:
+                del store[p]
+
+    def observe(self, X, at=None) -> "DriftMonitor":
+        """
+        Counts a batch of feature rows (see Histograms.update) stamped `at`:
+        None for now, one timestamp for the batch or one per row.
+        """
+        present, X = self.reference._columns(X)
+        if not len(X):
+            return self
+        seconds = _epoch_seconds(at, len(X))
+        periods = (seconds // self.period_s).astype(np.int64)
+        with self._lock:
+            latest = max([int(periods.max()), *self._periods.keys(), *self._errors.keys()])
+            # Rows already outside the window are never counted
+            if periods[0] == periods[-1] and (periods == periods[0]).all():
+                # One period, e.g. a served batch stamped now
+                groups, inverse = periods[:1], None
+            else:
+                keep = periods > latest - self.window
+                X = X[keep]
+                groups, inverse = np.unique(periods[keep], return_inverse=True)
+            if present and len(groups) and groups[-1] > latest - self.window:
+                counts, nulls, rows = self.reference._count(X, present, inverse, len(groups))
+                for i, p in enumerate(groups):
+                    hist = self._periods.get(int(p))
+                    if hist is None:
+                        hist = self._periods[int(p)] = self.reference.empty()
+                    hist._add(present, counts[i], nulls[i], rows[i])
+            self.last_seen = max(self.last_seen or -math.inf, float(seconds.max()))
+            self._evict()
+        return self
+
+    def observe_outcomes(self, y_true, y_pred, at=None) -> "DriftMonitor":
+        """Adds absolute errors of realized predictions to their periods' sums (NaN pairs are skipped)."""
+        errors = np.abs(np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64)).ravel()
+        if not len(errors):
+            return self
+        periods = (_epoch_seconds(at, len(errors)) // self.period_s).astype(np.int64)
+        keep = ~np.isnan(errors)
+        groups, inverse = np.unique(periods[keep], return_inverse=True)
+        sums = np.bincount(inverse, weights=errors[keep], minlength=len(groups))
+        counts = np.bincount(inverse, minlength=len(groups))
+        with self._lock:
+            for p, s, c in zip(groups, sums, counts):
+                entry = self._errors.setdefault(int(p), [0.0, 0])
+                entry[0] += float(s)
+                entry[1] += int(c)
+            self._evict()
+        return self
+
+    def merge(self, other: "DriftMonitor") -> "DriftMonitor":
+        """Folds another monitor's window (same reference) into this one and returns self."""
+        with self._lock:
+            for p, hist in other._periods.items():
+                self._periods.setdefault(p, self.reference.empty()).merge(hist)
+            for p, (s, c) in other._errors.items():
+                entry = self._errors.setdefault(p, [0.0, 0])
+                entry[0] += s
+                entry[1] += c
+            if other.last_seen is not None:
+                self.last_seen = max(self.last_seen or -math.inf, other.last_seen)
+            self._evict()
+        return self
+
+    def window_histograms(self) -> Histograms:
+        with self._lock:
+            merged = self.reference.empty()
+            for hist in self._periods.values():
+                merged.merge(hist)
+        return merged
+
+    def rolling_mae(self) -> Optional[float]:
+        with self._lock:
+            total = sum(s for s, _ in self._errors.values())
+            count = sum(c for _, c in self._errors.values())
+        return total / count if count else None
+
+    def check(self, now: Optional[float] = None, freshness: bool = True) -> dict:
+        """
+        Current metrics and the alerts that breach the stage14 thresholds.
+        `freshness=False` leaves out the data age, e.g. when replaying history.
+        """
+        current = self.window_histograms()
+        null_rate = current.null_rate()
+        drift = psi(self.reference.counts, current.counts)
+        mae = self.rolling_mae()
+        age = None
+        if freshness and self.last_seen is not None:
+            age = (time.time() if now is None else now) - self.last_seen
+
+        alerts = []
+        for f, rate, value, n in zip(self.features, null_rate, drift, current.n):
+            if rate > NULL_RATE_MAX:
+                alerts.append({"metric": "null_rate", "feature": f, "value": float(rate), "threshold": NULL_RATE_MAX})
+            if n >= PSI_MIN_ROWS and value > PSI_MAX:
+                alerts.append({"metric": "psi", "feature": f, "value": float(value), "threshold": PSI_MAX})
+        if mae is not None and self.baseline_mae:
+            increase = mae / self.baseline_mae - 1
+            if increase > MAE_INCREASE_MAX:
+                alerts.append({"metric": "mae_increase", "feature": None, "value": increase, "threshold": MAE_INCREASE_MAX})
+        if age is not None and age > FRESHNESS_MAX_S:
+            alerts.append({"metric": "freshness_s", "feature": None, "value": age, "threshold": FRESHNESS_MAX_S})
+
+        def clean(values):
+            return {f: (None if np.isnan(v) else float(v)) for f, v in zip(self.features, values)}
+
+        return {
+            "rows": int(current.n.max(initial=0)),
+            "null_rate": clean(null_rate),
+            "psi": clean(drift),
+            "mae": mae,
+            "baseline_mae": self.baseline_mae,
+            "freshness_s": age,
+            "alerts": alerts,
+        }
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "features": self.features,
+                "cuts": self.reference.cuts.tolist(),
+                "reference": self.reference.to_dict(),
+                "baseline_mae": self.baseline_mae,
+                "period_s": self.period_s,
+                "window": self.window,
+                "last_seen": self.last_seen,
+                "periods": {str(p): h.to_dict() for p, h in self._periods.items()},
+                "errors": {str(p): e for p, e in self._errors.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "DriftMonitor":
+        features, cuts = state["features"], state["cuts"]
+        monitor = cls(
+            Histograms(features, cuts, **state["reference"]),
+            state.get("baseline_mae"),
+            period_s=state.get("period_s", PERIOD_S),
+            window=state.get("window", WINDOW_PERIODS),
+        )
+        monitor.last_seen = state.get("last_seen")
+        monitor._periods = {int(p): Histograms(features, cuts, **h) for p, h in state.get("periods", {}).items()}
+        monitor._errors = {int(p): list(e) for p, e in state.get("errors", {}).items()}
+        return monitor
+
+    def save(self, path: str | Path) -> Path:
+        """Writes the monitor as JSON (temp file + rename)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "DriftMonitor":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def __repr__(self) -> str:
+        return f"DriftMonitor(features={len(self.features)}, periods={len(self._periods)}, baseline_mae={self.baseline_mae})"
@@ -0,0 +1,288 @@
+from __future__ import annotations
+import hashlib
+import json
+import pickle
+import shutil
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Literal, Optional
+
+Executor = Literal["thread", "process"]
+
+STATE_FILE = "state.json"
+
+__all__ = [
+    "Task",
+    "DAG",
+    "DAGError",
+    "config_signature",
+]
+
+class DAGError(RuntimeError):
+    """Raised when tasks failed after their retries; `failed` maps task -> error, `skipped` lists their dependents."""
+
+    def __init__(self, failed: Dict[str, str], skipped: List[str]):
+        super().__init__(
+            f"{len(failed)} task(s) failed: " + "; ".join(f"{k}: {v}" for k, v in failed.items())
+            + (f" (skipped {', '.join(skipped)})" if skipped else "")
+        )
+        self.failed = failed
+        self.skipped = skipped
+
+class Task:
+    """
+    One node of a DAG. `fn` is called with the results of `deps` as keyword
+    arguments named after them, e.g. Task("train", train, deps=["features"])
+    runs train(features=<result of features>).
+
+    `retries` extra attempts are made after a failure, `retry_delay` seconds
+    apart (growing linearly). Thread tasks sharing a `lock` name never run at
+    the same time (e.g. plots drawn with pyplot's global state).
+    `executor="process"` runs the task in a process pool; its function, inputs
+    and result must then be picklable. With `checkpoint`, the result is saved
+    so a resumed run can skip the task.
+    """
+
+    __slots__ = ("name", "fn", "deps", "retries", "retry_delay", "lock", "executor", "checkpoint")
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable,
+        deps: Iterable[str] = (),
+        retries: int = 0,
+        retry_delay: float = 0.5,
+        lock: Optional[str] = None,
+        executor: Executor = "thread",
+        checkpoint: bool = True,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unsupported executor: {executor}")
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.lock = lock
+        self.executor = executor
+        self.checkpoint = checkpoint
+
+def _call_with_retries(fn: Callable, kwargs: dict, retries: int, retry_delay: float, lock=None):
+    # Module-level so process-pool tasks can pickle it
+    for attempt in range(retries + 1):
+        try:
+            if lock is None:
+                return fn(**kwargs)
+            with lock:
+                return fn(**kwargs)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"Task {getattr(fn, '__name__', fn)} failed (attempt {attempt + 1}/{retries + 1}): "
+                  f"{type(e).__name__}: {e}; retrying")
+            time.sleep(retry_delay * (attempt + 1))
+
+class DAG:
+    """
+    Tasks and their dependencies, run by a local scheduler.
+
+        dag = DAG([Task("clean", clean), Task("features", features, deps=["clean"]), ...])
+        results = dag.run(workers=4, checkpoint_dir=..., resume=True)
+
+    The scheduler submits every task whose dependencies have finished to a
+    thread pool (or a process pool for executor="process"), so independent
+    branches run concurrently and wall time approaches the critical path.
+    A failed task is retried; if it still fails, its dependents are skipped,
+    the other branches finish, and DAGError is raised.
+
+    With a `checkpoint_dir`, every finished checkpointed task's result is
+    pickled there. `resume=True` reloads those results and runs only the
+    remaining tasks, provided the DAG was started with the same `signature`
+    (e.g. a hash of the run's configuration); a successful run clears them.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self.tasks: Dict[str, Task] = {}
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task: Task) -> Task:
+        if task.name in self.tasks:
+            raise ValueError(f"Duplicate task: {task.name}")
+        self.tasks[task.name] = task
+        return task
+
+    def order(self) -> List[str]:
+        """Topological order (ties in insertion order); raises ValueError on unknown deps or cycles."""
+        for task in self.tasks.values():
+            missing = [d for d in task.deps if d not in self.tasks]
+            if missing:
+                raise ValueError(f"Task {task.name} depends on unknown task(s): {', '.join(missing)}")
+        order, state = [], {}
+
+        def visit(name: str, path: tuple) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in DAG: {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for dep in self.tasks[name].deps:
+                visit(dep, path + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.tasks:
+            visit(name, ())
+        return order
+
+    def critical_path(self, durations: Dict[str, float]) -> tuple:
+        """(seconds, [task, ...]) of the longest dependency chain given per-task durations."""
+        finish, via = {}, {}
+        for name in self.order():
+            deps = self.tasks[name].deps
+            prev = max(deps, key=lambda d: finish[d]) if deps else None
+            finish[name] = durations.get(name, 0.0) + (finish[prev] if prev else 0.0)
+            via[name] = prev
+        if not finish:
+            return 0.0, []
+        end = max(finish, key=finish.get)
+        path = []
+        while end is not None:
+            path.append(end)
+            end = via[end]
+        return finish[path[0]], path[::-1]
+
+    # --- checkpoints ---
+    @staticmethod
+    def _load_checkpoints(checkpoint_dir: Path, signature: str) -> Dict[str, object]:
+        try:
+            state = json.loads((checkpoint_dir / STATE_FILE).read_text())
+        except (OSError, ValueError):
+            return {}
+        if state.get("signature") != signature:
+            return {}
+        results = {}
+        for name in state.get("done", []):
+            try:
+                with open(checkpoint_dir / f"{name}.pkl", "rb") as f:
+                    results[name] = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+                continue
+        return results
+
+    @staticmethod
+    def _save_checkpoint(checkpoint_dir: Path, signature: str, name: str, result, done: List[str]) -> None:
+        tmp = checkpoint_dir / f".{name}.pkl.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(checkpoint_dir / f"{name}.pkl")
+        state_tmp = checkpoint_dir / f".{STATE_FILE}.tmp"
+        state_tmp.write_text(json.dumps({"signature": signature, "done": done}))
+        state_tmp.replace(checkpoint_dir / STATE_FILE)
+
+    def run(
+        self,
+        workers: int = 4,
+        process_workers: Optional[int] = None,
+        checkpoint_dir: Optional[str | Path] = None,
+        resume: bool = False,
+        signature: str = "",
+    ) -> Dict[str, object]:
+        """
+        Runs every task and returns {task: result}. `workers` bounds the thread
+        pool; `workers=1` runs the tasks one by one in topological order.
+        `process_workers` sizes the pool for executor="process" tasks.
+        """
+        order = self.order()
+        checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir is not None else None
+        results: Dict[str, object] = {}
+        if checkpoint_dir is not None:
+            if resume:
+                results = {k: v for k, v in self._load_checkpoints(checkpoint_dir, signature).items() if k in self.tasks}
+                if results:
+                    print(f"Resuming: {', '.join(n for n in order if n in results)} restored from checkpoints")
+            else:
+                shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        done = [n for n in order if n in results]
+        failed: Dict[str, str] = {}
+        skipped: List[str] = []
+        locks = {t.lock: threading.Lock() for t in self.tasks.values() if t.lock}
+
+        def finished(name: str, result) -> None:
+            results[name] = result
+            done.append(name)
+            if checkpoint_dir is not None and self.tasks[name].checkpoint:
+                self._save_checkpoint(checkpoint_dir, signature, name, result, done)
+
+        def blocked(name: str) -> bool:
+            return any(d in failed or d in skipped for d in self.tasks[name].deps)
+
+        if workers <= 1:
+            for name in order:
+                if name in results:
+                    continue
+                task = self.tasks[name]
+                if blocked(name):
+                    skipped.append(name)
+                    continue
+                try:
+                    finished(name, _call_with_retries(
+                        task.fn, {d: results[d] for d in task.deps}, task.retries, task.retry_delay
+                    ))
+                except Exception as e:
+                    traceback.print_exc()
+                    failed[name] = f"{type(e).__name__}: {e}"
+        else:
+            threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dag")
+            processes = None
+            running: Dict[Future, str] = {}
+            try:
+                while True:
+                    for name in order:
+                        if name in results or name in failed or name in skipped or name in running.values():
+                            continue
+                        task = self.tasks[name]
+                        if blocked(name):
+                            skipped.append(name)
+                            continue
+                        if not all(d in results for d in task.deps):
+                            continue
+                        kwargs = {d: results[d] for d in task.deps}
+                        if task.executor == "process":
+                            if processes is None:
+                                processes = ProcessPoolExecutor(max_workers=process_workers)
+                            # Locks only serialize thread tasks; a process has its own pyplot state
+                            future = processes.submit(_call_with_retries, task.fn, kwargs, task.retries, task.retry_delay)
+                        else:
+                            future = threads.submit(
+                                _call_with_retries, task.fn, kwargs, task.retries, task.retry_delay, locks.get(task.lock)
+                            )
+                        running[future] = name
+                    if not running:
+                        break
+                    finished_futures, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished_futures:
+                        name = running.pop(future)
+                        try:
+                            finished(name, future.result())
+                        except Exception as e:
+                            traceback.print_exception(e)
+                            failed[name] = f"{type(e).__name__}: {e}"
+            finally:
+                threads.shutdown(wait=True)
+                if processes is not None:
+                    processes.shutdown(wait=True)
+
+        if failed:
+            raise DAGError(failed, skipped)
+        if checkpoint_dir is not None:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+        return results
+
+def config_signature(*parts) -> str:
+    """Stable hash of a run's configuration, for DAG.run(signature=...)."""
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
@@ -1,10 +1,15 @@
 from __future__ import annotations
-from typing import Iterable, Dict, Optional, Literal
+import warnings
+from typing import Iterable, Dict, List, Optional, Literal, Tuple
 import numpy as np
 import pandas as pd
 
+from src.cleaning import FittedColumnTransform
+
 OutlierMethod = Literal["iqr", "zscore"]
 HandleMode = Literal["flag", "remove", "winsorize", "none"]
+# "exact" sorts the data; "sketch" uses a bounded-memory KLL quantile sketch (see src.sketches)
+QuantileBackend = Literal["exact", "sketch"]
 
 __all__ = [
     "detect_outliers_iqr",
@@ -13,19 +18,87 @@ __all__ = [
     "flag_outliers_df",
     "remove_outliers_df",
     "winsorize_df",
+    "winsorize_bounds",
+    "quantile_table",
+    "Winsorizer",
 ]
 
-def detect_outliers_iqr(series: pd.Series, k: float = 1.5) -> pd.Series:
-    s = series.dropna()
-    if s.empty:
+# Columns sorted per batch in _nanquantile; bounds the temporary sort buffer to ~32 MB
+_SORT_BUFFER_VALUES = 1 << 22
+
+def _nanquantile(values: np.ndarray, qs) -> np.ndarray:
+    """
+    Column-wise np.nanquantile (linear method) for a 1-D or 2-D (rows x columns) block.
+
+    Columns are sorted contiguously in batches with NaNs last; every quantile is
+    then a gather plus NumPy's own interpolation, so results match
+    `Series.quantile` exactly while avoiding np.nanquantile's per-column
+    fallback. All-NaN columns yield NaN, which the clip/flag helpers treat as
+    "no limit".
+    """
+    values = np.asarray(values, dtype=np.float64)
+    squeeze = values.ndim == 1
+    block = values.reshape(-1, 1) if squeeze else values
+    qs = np.asarray(qs, dtype=np.float64).reshape(-1, 1)
+    out = np.empty((len(qs), block.shape[1]))
+    step = max(1, _SORT_BUFFER_VALUES // max(len(block), 1))
+    for start in range(0, block.shape[1], step):
+        # Sorting the transposed slice sorts each column as one contiguous run
+        ordered = np.sort(block[:, start:start + step].T, axis=1)
+        n = np.count_nonzero(~np.isnan(ordered), axis=1)
+        virtual = (n - 1) * qs
+        lo_idx = np.clip(np.floor(virtual), 0, np.maximum(n - 1, 0)).astype(np.intp)
+        hi_idx = np.minimum(lo_idx + 1, np.maximum(n - 1, 0))
+        t = virtual - np.floor(virtual)
+        rows = np.arange(ordered.shape[0])
+        a = ordered[rows, lo_idx]
+        b = ordered[rows, hi_idx]
+        diff = b - a
+        q = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+        q[:, n == 0] = np.nan
+        out[:, start:start + step] = q
+    return out[:, 0] if squeeze else out
+
+def _numeric_columns(df: pd.DataFrame, columns: Optional[Iterable[str]]) -> List[str]:
+    if columns is None:
+        return df.select_dtypes(include=[np.number]).columns.tolist()
+    return [c for c in columns if pd.api.types.is_numeric_dtype(df[c])]
+
+def _as_float(df: pd.DataFrame, columns: List[str], copy: bool = False) -> np.ndarray:
+    return df[columns].to_numpy(dtype=np.float64, na_value=np.nan, copy=copy)
+
+def quantile_table(df: pd.DataFrame, columns: Optional[Iterable[str]], qs: Iterable[float]) -> pd.DataFrame:
+    """
+    All requested quantiles of all numeric columns in one `_nanquantile` pass
+    over the 2-D column block (columns sorted in batches, NaNs ignored). Rows
+    are the quantiles, columns the frame's columns.
+    """
+    cols = _numeric_columns(df, columns)
+    qs = list(qs)
+    return pd.DataFrame(_nanquantile(_as_float(df, cols), qs).reshape(len(qs), len(cols)), index=qs, columns=cols)
+
+def detect_outliers_iqr(
+    series: pd.Series,
+    k: float = 1.5,
+    backend: QuantileBackend = "exact",
+    sketch_k: Optional[int] = None,
+) -> pd.Series:
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.isnan(values).all():
         return pd.Series(False, index=series.index)
-    q1 = s.quantile(0.25)
-    q3 = s.quantile(0.75)
+    if backend == "sketch":
+        from src.sketches import DEFAULT_K, KLLSketch
+
+        q1, q3 = KLLSketch(k=sketch_k or DEFAULT_K).update(values).quantile([0.25, 0.75])
+    elif backend == "exact":
+        q1, q3 = _nanquantile(values, [0.25, 0.75])
+    else:
+        raise ValueError(f"Unsupported backend: {backend}")
     iqr = q3 - q1
     lower = q1 - k * iqr
     upper = q3 + k * iqr
-    mask = (series < lower) | (series > upper)
-    return mask.fillna(False)
+    # NaN compares False, so missing values are never flagged
+    return pd.Series((values < lower) | (values > upper), index=series.index, name=series.name)
 
 def detect_outliers_zscore(series: pd.Series, threshold: float = 3.0) -> pd.Series:
     mu = series.mean(skipna=True)
@@ -43,29 +116,137 @@ def winsorize_series(series: pd.Series, lower: float = 0.05, upper: float = 0.95
     hi = series.quantile(upper)
     return series.clip(lower=lo, upper=hi)
 
+def _group_codes(df: pd.DataFrame, by: Optional[str]) -> Tuple[Optional[np.ndarray], int]:
+    if by is None:
+        return None, 1
+    codes, uniques = pd.factorize(df[by], use_na_sentinel=False)
+    return codes, len(uniques)
+
+def _static_stats(values: np.ndarray, method: str, params: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-column (lo, hi) limits for one block of rows."""
+    if method == "quantile":
+        lo, hi = _nanquantile(values, [params["lower"], params["upper"]])
+        return lo, hi
+    if method == "iqr":
+        q1, q3 = _nanquantile(values, [0.25, 0.75])
+        k = params.get("k", 1.5)
+        return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+    if method == "zscore":
+        t = params.get("threshold", 3.0)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mu = np.nanmean(values, axis=0)
+            sigma = np.nanstd(values, axis=0)
+        # Zero or undefined dispersion never flags anything
+        degenerate = ~(sigma > 0)
+        return np.where(degenerate, -np.inf, mu - t * sigma), np.where(degenerate, np.inf, mu + t * sigma)
+    raise ValueError(f"Unsupported method: {method}")
+
+def _rolling_stats(frame: pd.DataFrame, method: str, params: Dict, window: int, min_periods: Optional[int]):
+    """Trailing-window limits: row t only sees rows t-window+1..t, never later ones."""
+    roll = frame.rolling(window, min_periods=min_periods or window)
+    if method == "quantile":
+        return roll.quantile(params["lower"]), roll.quantile(params["upper"])
+    if method == "iqr":
+        q1, q3 = roll.quantile(0.25), roll.quantile(0.75)
+        k = params.get("k", 1.5)
+        return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+    if method == "zscore":
+        t = params.get("threshold", 3.0)
+        mu, sigma = roll.mean(), roll.std(ddof=0)
+        degenerate = ~(sigma > 0)
+        return (mu - t * sigma).mask(degenerate & mu.notna(), -np.inf), (mu + t * sigma).mask(degenerate & mu.notna(), np.inf)
+    raise ValueError(f"Unsupported method: {method}")
+
+def _limits(
+    df: pd.DataFrame,
+    cols: List[str],
+    values: np.ndarray,
+    method: str,
+    params: Dict,
+    by: Optional[str],
+    window: Optional[int],
+    min_periods: Optional[int],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lower/upper limits broadcastable against `values` (n_rows x n_cols): one row
+    for the whole frame, one per group (`by`) or one per row (`window`).
+    """
+    if window is not None:
+        frame = pd.DataFrame(values, columns=cols)
+        if by is None:
+            lo, hi = _rolling_stats(frame, method, params, window, min_periods)
+        else:
+            keys = df[by].to_numpy()
+            grouped = [_rolling_stats(part, method, params, window, min_periods) for _, part in frame.groupby(keys, sort=False)]
+            lo = pd.concat([g[0] for g in grouped]).sort_index()
+            hi = pd.concat([g[1] for g in grouped]).sort_index()
+        return lo.to_numpy(), hi.to_numpy()
+
+    codes, n_groups = _group_codes(df, by)
+    if codes is None:
+        lo, hi = _static_stats(values, method, params)
+        return np.atleast_1d(lo)[None, :], np.atleast_1d(hi)[None, :]
+    lo_table = np.empty((n_groups, len(cols)))
+    hi_table = np.empty((n_groups, len(cols)))
+    order = np.argsort(codes, kind="stable")
+    starts = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    for g in range(n_groups):
+        lo_table[g], hi_table[g] = _static_stats(values[order[starts[g]:starts[g + 1]]], method, params)
+    return lo_table[codes], hi_table[codes]
+
+def _clip_(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    # Clips `values` in place. NaN limits (empty groups, warm-up rows) mean "no limit"; NaN values stay NaN
+    lo = np.where(np.isnan(lo), -np.inf, lo)
+    hi = np.where(np.isnan(hi), np.inf, hi)
+    return np.clip(values, lo, hi, out=values)
+
+def _column_batches(cols: List[str], n_rows: int) -> Iterable[List[str]]:
+    # Processing a few columns at a time keeps the float working copy small on wide frames
+    step = max(1, _SORT_BUFFER_VALUES // max(n_rows, 1))
+    for start in range(0, len(cols), step):
+        yield cols[start:start + step]
+
+def _assign_columns(out: pd.DataFrame, cols: List[str], block: np.ndarray) -> None:
+    for i, col in enumerate(cols):
+        out[col] = block[:, i]
+
 def flag_outliers_df(
     df: pd.DataFrame,
     columns: Optional[Iterable[str]] = None,
     method: OutlierMethod = "iqr",
     method_params: Optional[Dict] = None,
     flag_suffix: Optional[str] = None,
+    by: Optional[str] = None,
+    window: Optional[int] = None,
+    min_periods: Optional[int] = None,
+    inplace: bool = False,
+    bounds: Optional[Dict[str, tuple]] = None,
 ) -> pd.DataFrame:
-    if columns is None:
-        columns = df.select_dtypes(include=[np.number]).columns.tolist()
-    method_params = method_params or {}
-    out = df.copy()
-    for col in columns:
-        if not pd.api.types.is_numeric_dtype(out[col]):
-            continue
-        if method == "iqr":
-            mask = detect_outliers_iqr(out[col], **method_params)
-            suffix = flag_suffix or "outlier_iqr"
-        elif method == "zscore":
-            mask = detect_outliers_zscore(out[col], **method_params)
-            suffix = flag_suffix or "outlier_z"
-        else:
-            raise ValueError(f"Unsupported method: {method}")
-        out[f"{col}_{suffix}"] = mask
+    """
+    Adds a boolean `<col>_<suffix>` column per numeric column. Limits for all
+    columns are computed together (one quantile/mean call over the 2-D block),
+    per `by` group and/or over a trailing `window` of rows. Fixed `bounds`
+    ({column: (lo, hi)}, e.g. from `sketches.sketch_iqr_bounds`) flag values
+    outside them instead, so limits fitted once can be applied chunk by chunk.
+    """
+    if method not in ("iqr", "zscore"):
+        raise ValueError(f"Unsupported method: {method}")
+    suffix = flag_suffix or ("outlier_iqr" if method == "iqr" else "outlier_z")
+    if bounds is not None:
+        out = df if inplace else df.copy(deep=False)
+        for col, (lo, hi) in bounds.items():
+            if col in df.columns:
+                values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                out[f"{col}_{suffix}"] = (values < lo) | (values > hi)
+        return out
+    cols = _numeric_columns(df, columns)
+    out = df if inplace else df.copy(deep=False)
+    for batch in _column_batches(cols, len(df)):
+        values = _as_float(df, batch)
+        lo, hi = _limits(df, batch, values, method, method_params or {}, by, window, min_periods)
+        mask = (values < lo) | (values > hi)
+        _assign_columns(out, [f"{col}_{suffix}" for col in batch], mask)
     return out
 
 def remove_outliers_df(
@@ -80,16 +261,114 @@ def remove_outliers_df(
     mask = df[flag_columns].any(axis=1) if how == "any" else df[flag_columns].all(axis=1)
     return df.loc[~mask].copy()
 
+def winsorize_bounds(
+    df: pd.DataFrame,
+    columns: Optional[Iterable[str]] = None,
+    lower: float = 0.05,
+    upper: float = 0.95,
+) -> Dict[str, tuple]:
+    table = quantile_table(df, columns, [lower, upper])
+    return {
+        col: (float(table.iat[0, i]), float(table.iat[1, i]))
+        for i, col in enumerate(table.columns)
+        if not np.isnan(table.iat[0, i])
+    }
+
 def winsorize_df(
     df: pd.DataFrame,
     columns: Optional[Iterable[str]] = None,
     lower: float = 0.05,
     upper: float = 0.95,
+    bounds: Optional[Dict[str, tuple]] = None,
+    by: Optional[str] = None,
+    window: Optional[int] = None,
+    min_periods: Optional[int] = None,
+    inplace: bool = False,
+    backend: QuantileBackend = "exact",
+    sketch_k: Optional[int] = None,
 ) -> pd.DataFrame:
-    if columns is None:
-        columns = df.select_dtypes(include=[np.number]).columns.tolist()
-    out = df.copy()
-    for col in columns:
-        if pd.api.types.is_numeric_dtype(out[col]):
-            out[col] = winsorize_series(out[col], lower=lower, upper=upper)
+    """
+    Clips numeric columns to their [lower, upper] quantiles. When `bounds`
+    ({column: (lo, hi)}, e.g. from `winsorize_bounds`) is given, those fixed
+    limits are applied instead of recomputing quantiles on `df`.
+
+    Quantiles for a batch of columns come from one vectorized sort-based pass.
+    `by` computes them per group (e.g. 'symbol') and `window` over a trailing
+    window of rows (no look-ahead). With `inplace=True` the columns of `df`
+    are overwritten instead of returning a new frame.
+
+    `backend="sketch"` estimates the quantiles with KLL sketches of size
+    `sketch_k` instead of sorting (rank error ~ sketches.kll_rank_error(k)).
+    For data larger than memory, fit sketches over chunks with
+    `sketches.fit_quantile_sketches` and pass `sketches.sketch_bounds(...)` as `bounds`.
+    """
+    if backend == "sketch" and bounds is None:
+        if by is not None or window is not None:
+            raise ValueError("The sketch backend does not support by/window")
+        from src.sketches import DEFAULT_K, fit_quantile_sketches, sketch_bounds
+
+        sketches = fit_quantile_sketches([df], _numeric_columns(df, columns), k=sketch_k or DEFAULT_K)
+        bounds = sketch_bounds(sketches, lower=lower, upper=upper)
+    elif backend not in ("exact", "sketch"):
+        raise ValueError(f"Unsupported backend: {backend}")
+    cols = [c for c in bounds if c in df.columns] if bounds is not None else _numeric_columns(df, columns)
+    # A shallow copy shares the untouched columns, so only the clipped columns use new memory
+    out = df if inplace else df.copy(deep=False)
+    for batch in _column_batches(cols, len(df)):
+        # Our own float copy of the batch, clipped in place below
+        values = _as_float(df, batch, copy=True)
+        if bounds is not None:
+            lo = np.array([[bounds[c][0] for c in batch]], dtype=np.float64)
+            hi = np.array([[bounds[c][1] for c in batch]], dtype=np.float64)
+        else:
+            lo, hi = _limits(df, batch, values, "quantile", {"lower": lower, "upper": upper}, by, window, min_periods)
+        _assign_columns(out, batch, _clip_(values, lo, hi))
     return out
+
+class Winsorizer(FittedColumnTransform):
+    """
+    Stateful counterpart of `winsorize_df`: `fit` learns the [lower, upper]
+    quantiles of each numeric column once; `transform` / `transform_array`
+    clip new data (down to a single served row) to those training-time limits.
+    `backend="sketch"` fits them with KLL sketches of size `sketch_k`.
+    """
+
+    __slots__ = ("lower", "upper", "backend", "sketch_k", "lo", "hi")
+
+    def __init__(
+        self,
+        lower: float = 0.05,
+        upper: float = 0.95,
+        backend: QuantileBackend = "exact",
+        sketch_k: Optional[int] = None,
+    ):
+        super().__init__()
+        self.lower = lower
+        self.upper = upper
+        self.backend = backend
+        self.sketch_k = sketch_k
+        self.lo = np.empty(0)
+        self.hi = np.empty(0)
+
+    def _fit_block(self, block: np.ndarray) -> None:
+        if self.backend == "sketch":
+            from src.sketches import DEFAULT_K, KLLSketch
+
+            k = self.sketch_k or DEFAULT_K
+            qs = np.array([KLLSketch(k=k).update(block[:, i]).quantile([self.lower, self.upper]) for i in range(block.shape[1])]).T
+        else:
+            qs = _nanquantile(block, [self.lower, self.upper]).reshape(2, block.shape[1])
+        # NaN limits (all-NaN columns) mean "no limit", as in winsorize_df
+        self.lo = np.where(np.isnan(qs[0]), -np.inf, qs[0])
+        self.hi = np.where(np.isnan(qs[1]), np.inf, qs[1])
+
+    @property
+    def bounds(self) -> Dict[str, tuple]:
+        """Limits as {column: (lo, hi)}, the format `winsorize_df(bounds=...)` takes."""
+        return {c: (float(lo), float(hi)) for c, lo, hi in zip(self.columns, self.lo, self.hi)}
+
+    def transform_array(self, X: np.ndarray) -> np.ndarray:
+        return np.clip(np.asarray(X, dtype=np.float64), self.lo, self.hi)
+
+    def _transform_column(self, i: int, x: np.ndarray) -> np.ndarray:
+        return np.clip(x, self.lo[i], self.hi[i])
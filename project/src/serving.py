@@ -0,0 +1,236 @@
+from __future__ import annotations
+import asyncio
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+import numpy as np
+
+# Fitted cleaning steps (applied in order) are pickled next to the model under this name
+PREPROCESSING_FILENAME = "preprocessing.pkl"
+
+__all__ = [
+    "PREPROCESSING_FILENAME",
+    "LinearPredictor",
+    "MicroBatcher",
+    "AsyncMicroBatcher",
+    "load_predictor",
+]
+
+class LinearPredictor:
+    """
+    A fitted linear model reduced to its coefficient vector and intercept, so a
+    batch of rows is one matrix-vector product with no per-call validation.
+    Training-time winsorization limits, when given, are applied to the matching
+    feature columns before predicting.
+    """
+
+    __slots__ = ("coef", "intercept", "feature_names", "lo", "hi", "version")
+
+    def __init__(
+        self,
+        coef,
+        intercept: float,
+        feature_names: Optional[Iterable[str]] = None,
+        lo: Optional[np.ndarray] = None,
+        hi: Optional[np.ndarray] = None,
+        version: Optional[str] = None,
+    ):
+        # No copy when coef is already a float64 array (e.g. a read-only memory map)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(intercept)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.lo = lo
+        self.hi = hi
+        self.version = version
+
+    @property
+    def n_features(self) -> int:
+        return len(self.coef)
+
+    @classmethod
+    def from_model(cls, model, preprocessing: Optional[list] = None) -> "LinearPredictor":
+        """
+        Builds a predictor from any estimator with `coef_` and `intercept_`
+        (e.g. sklearn's LinearRegression). Steps with per-column clip limits
+        (src.outliers.Winsorizer) are matched to the model's features by name.
+        """
+        if not hasattr(model, "coef_"):
+            raise TypeError(f"{type(model).__name__} has no coef_; only linear models can be served")
+        names = getattr(model, "feature_names_in_", None)
+        names = list(names) if names is not None else None
+        lo = hi = None
+        for step in preprocessing or []:
+            if names is not None and hasattr(step, "lo"):
+                limits = dict(zip(step.columns, zip(step.lo, step.hi)))
+                lo = np.array([limits.get(n, (-np.inf, np.inf))[0] for n in names])
+                hi = np.array([limits.get(n, (-np.inf, np.inf))[1] for n in names])
+        return cls(model.coef_, np.ravel(model.intercept_)[0], names, lo, hi)
+
+    def validate(self, rows) -> np.ndarray:
+        """
+        Converts request rows to a 2-D float array, raising ValueError unless
+        every row has n_features finite numbers.
+        """
+        try:
+            X = np.asarray(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("features must be numbers") from None
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"expected rows of {self.n_features} features, got shape {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("features must be finite")
+        return X
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.lo is not None:
+            X = np.clip(X, self.lo, self.hi)
+        return X @ self.coef + self.intercept
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one batch call.
+
+    Request threads `submit` a row and wait on the returned Future; a
+    background thread takes the first queued row, keeps collecting for at most
+    `max_wait` seconds (or until `max_batch` rows), stacks them into one
+    matrix and resolves every Future from a single `predict_fn` call.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch: int = 256,
+        max_wait: float = 0.001,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: np.ndarray) -> Future:
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future: Future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, row: np.ndarray, timeout: Optional[float] = 1.0) -> float:
+        return self.submit(row).result(timeout)
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self) -> list:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        # Drain what is already queued, then wait at most max_wait for stragglers
+        wait_until = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = wait_until - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                # Let _run see the shutdown sentinel after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            futures = [f for _, f in batch]
+            try:
+                preds = self.predict_fn(np.vstack([row for row, _ in batch]))
+            except Exception as e:
+                for f in futures:
+                    f.set_exception(e)
+                continue
+            for f, p in zip(futures, preds.tolist()):
+                f.set_result(p)
+
+class AsyncMicroBatcher:
+    """
+    asyncio counterpart of MicroBatcher for a single event loop: rows awaiting
+    a prediction are flushed together `max_wait` seconds after the first one
+    arrives (or as soon as `max_batch` are pending). Each row carries the
+    predictor it was validated against, so a model swapped in mid-window never
+    receives rows shaped for the previous one.
+    """
+
+    def __init__(self, max_batch: int = 256, max_wait: float = 0.001):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: list = []
+        self._timer = None
+
+    async def predict(self, predictor: LinearPredictor, row: np.ndarray) -> float:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((predictor, row, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        groups: dict = {}
+        for item in pending:
+            groups.setdefault(id(item[0]), []).append(item)
+        for items in groups.values():
+            try:
+                preds = items[0][0].predict(np.vstack([row for _, row, _ in items])).tolist()
+            except Exception as e:
+                for _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), p in zip(items, preds):
+                # A client that disconnected may have cancelled its future
+                if not future.done():
+                    future.set_result(p)
+
+def load_predictor(model_path: str | Path) -> LinearPredictor:
+    """
+    Loads a pickled model and, if present, the preprocessing steps saved next to it.
+    """
+    model_path = Path(model_path)
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    preprocessing = None
+    prep_path = model_path.with_name(PREPROCESSING_FILENAME)
+    if prep_path.exists():
+        with open(prep_path, "rb") as f:
+            preprocessing = pickle.load(f)
+    predictor = LinearPredictor.from_model(model, preprocessing)
+    # Same format as registry versions: the model file's modification time
+    predictor.version = datetime.fromtimestamp(model_path.stat().st_mtime).strftime("%Y%m%dT%H%M%S%f")
+    return predictor
@@ -1,16 +1,104 @@
 from __future__ import annotations
+import uuid
 import pandas as pd
 from pathlib import Path
+from typing import Iterable, Iterator, Literal, Optional
+
+# Hive-style partition keys used for directory datasets: <root>/symbol=AAPL/year=2024/part-*.parquet
+DATASET_PARTITIONS = ['symbol', 'year']
+DATE_COLUMN = 'date'
+
+WriteMode = Literal['overwrite', 'append']
 
 def detect_format(path: str | Path) -> str:
+    # A path without an extension is a partitioned Parquet dataset directory
+    if not Path(path).suffix:
+        return 'dataset'
     ext = str(path).lower().rsplit('.', 1)[-1]
     if ext in ('csv', 'parquet'):
         return ext
     raise ValueError(f'Unsupported file extension: {ext}')
 
-def write_df(df: pd.DataFrame, path: str | Path) -> Path:
+def _date_bounds(start, end) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    return start, end
+
+def _arrow_filter(
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+    symbols: Optional[Iterable[str]],
+    available: Iterable[str],
+):
+    """
+    Builds a pyarrow expression for the date range / symbol predicates.
+    Partition keys are filtered too, so whole directories are pruned before any file is opened.
+    """
+    import pyarrow.dataset as ds
+
+    available = set(available)
+    expr = None
+
+    def _and(e):
+        return e if expr is None else expr & e
+
+    if start is not None and DATE_COLUMN in available:
+        expr = _and(ds.field(DATE_COLUMN) >= start.to_pydatetime())
+        if 'year' in available:
+            expr = _and(ds.field('year') >= start.year)
+    if end is not None and DATE_COLUMN in available:
+        expr = _and(ds.field(DATE_COLUMN) <= end.to_pydatetime())
+        if 'year' in available:
+            expr = _and(ds.field('year') <= end.year)
+    if symbols is not None and 'symbol' in available:
+        expr = _and(ds.field('symbol').isin([str(s) for s in symbols]))
+    return expr
+
+def _write_dataset(
+    df: pd.DataFrame,
+    path: Path,
+    partition_cols: Optional[Iterable[str]],
+    mode: WriteMode,
+) -> Path:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partition_cols = list(partition_cols if partition_cols is not None else DATASET_PARTITIONS)
+    if 'year' in partition_cols and 'year' not in df.columns:
+        if DATE_COLUMN not in df.columns:
+            raise ValueError(f"Partitioning by 'year' requires a '{DATE_COLUMN}' column")
+        df = df.assign(year=pd.to_datetime(df[DATE_COLUMN]).dt.year.astype('int32'))
+    missing = [c for c in partition_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f'Missing partition columns: {missing}')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    partitioning = ds.partitioning(
+        pa.schema([table.schema.field(c) for c in partition_cols]), flavor='hive'
+    )
+    ds.write_dataset(
+        table,
+        path,
+        format='parquet',
+        partitioning=partitioning,
+        # Unique file names let appends land next to existing files
+        basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+        # 'overwrite' replaces only the partitions present in df (e.g. one symbol)
+        existing_data_behavior='delete_matching' if mode == 'overwrite' else 'overwrite_or_ignore',
+    )
+    return path
+
+def write_df(
+    df: pd.DataFrame,
+    path: str | Path,
+    partition_cols: Optional[Iterable[str]] = None,
+    mode: WriteMode = 'overwrite',
+) -> Path:
     path = Path(path)
     fmt = detect_format(path)
+    if fmt == 'dataset':
+        path.mkdir(parents=True, exist_ok=True)
+        return _write_dataset(df, path, partition_cols, mode)
     path.parent.mkdir(parents=True, exist_ok=True)
     if fmt == 'csv':
         df.to_csv(path, index=False)
@@ -26,18 +114,110 @@ def write_df(df: pd.DataFrame, path: str | Path) -> Path:
     else:
         raise ValueError(f'Unsupported format: {fmt}')
 
-def read_df(path: str | Path) -> pd.DataFrame:
+def _read_csv(
+    path: Path,
+    columns: Optional[list[str]],
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+    symbols: Optional[Iterable[str]],
+) -> pd.DataFrame:
+    header = pd.read_csv(path, nrows=0).columns
+    has_date = DATE_COLUMN in header
+    usecols = None
+    if columns is not None:
+        # Predicate columns are read even when not projected, then dropped below
+        extra = [DATE_COLUMN] if has_date and (start is not None or end is not None) else []
+        if symbols is not None and 'symbol' in header:
+            extra.append('symbol')
+        usecols = list(dict.fromkeys(list(columns) + extra))
+    # Parse dates while reading instead of a second pass over the column
+    has_date = has_date and (usecols is None or DATE_COLUMN in usecols)
+    df = pd.read_csv(path, usecols=usecols, parse_dates=[DATE_COLUMN] if has_date else None)
+    mask = None
+    if has_date and pd.api.types.is_datetime64_any_dtype(df[DATE_COLUMN]):
+        if start is not None:
+            mask = df[DATE_COLUMN] >= start
+        if end is not None:
+            m = df[DATE_COLUMN] <= end
+            mask = m if mask is None else mask & m
+    if symbols is not None and 'symbol' in df.columns:
+        m = df['symbol'].isin([str(s) for s in symbols])
+        mask = m if mask is None else mask & m
+    if mask is not None:
+        df = df.loc[mask].reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+def iter_df(
+    path: str | Path,
+    chunksize: int = 100_000,
+    columns: Optional[Iterable[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields the file or dataset in order as DataFrames of at most `chunksize` rows,
+    so callers can process data that does not fit in memory.
+    """
     path = Path(path)
     fmt = detect_format(path)
+    columns = list(columns) if columns is not None else None
     if fmt == 'csv':
-        df = pd.read_csv(path)
-        if 'date' in df.columns:
-            try:
-                df['date'] = pd.to_datetime(df['date'])
-            except Exception:
-                pass
+        header = pd.read_csv(path, nrows=0).columns
+        parse_dates = [DATE_COLUMN] if DATE_COLUMN in header and (columns is None or DATE_COLUMN in columns) else None
+        yield from pd.read_csv(path, usecols=columns, parse_dates=parse_dates, chunksize=chunksize)
+    elif fmt in ('parquet', 'dataset'):
+        import pyarrow.dataset as ds
+
+        if fmt == 'dataset':
+            dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        else:
+            dataset = ds.dataset(path, format='parquet')
+        if columns is None:
+            columns = [c for c in dataset.schema.names if not (fmt == 'dataset' and c == 'year')]
+        for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+def read_df(
+    path: str | Path,
+    columns: Optional[Iterable[str]] = None,
+    start=None,
+    end=None,
+    symbols: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Reads a CSV, a Parquet file or a partitioned Parquet dataset directory.
+
+    `columns` projects the columns to read, `start`/`end` keep rows whose `date`
+    falls in the inclusive range and `symbols` keeps only the given tickers.
+    For Parquet these are pushed down to the reader, so unread columns, pruned
+    partitions and non-matching row groups are never decoded.
+    """
+    path = Path(path)
+    fmt = detect_format(path)
+    columns = list(columns) if columns is not None else None
+    start, end = _date_bounds(start, end)
+    if fmt == 'csv':
+        return _read_csv(path, columns, start, end, symbols)
+    elif fmt in ('parquet', 'dataset'):
+        import pyarrow.dataset as ds
+
+        if fmt == 'dataset':
+            dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        else:
+            dataset = ds.dataset(path, format='parquet')
+        names = dataset.schema.names
+        expr = _arrow_filter(start, end, symbols, names)
+        if columns is None:
+            # The derived 'year' partition key is a storage detail, not data
+            columns = [c for c in names if not (fmt == 'dataset' and c == 'year')]
+        df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+        if fmt == 'dataset':
+            sort_cols = [c for c in ('symbol', DATE_COLUMN) if c in df.columns]
+            if sort_cols:
+                df = df.sort_values(sort_cols, kind='stable', ignore_index=True)
         return df
-    elif fmt == 'parquet':
-        return pd.read_parquet(path)
     else:
         raise ValueError(f'Unsupported format: {fmt}')
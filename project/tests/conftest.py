@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The pipeline imports its packages as src.* and scripts.*, from the project directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.feature_engineering import create_features
+from scripts.incremental import ingest_incremental
+from src.storage import read_df
+
+def _prices(n):
+    # A trending series, so bounds frozen on the first rows would clip the later ones
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.002, 0.02, n)))
+    return pd.DataFrame({
+        'date': pd.bdate_range('2010-01-01', periods=n),
+        'open': close * 0.99,
+        'high': close * 1.01,
+        'low': close * 0.98,
+        'close': close,
+        'volume': rng.integers(1_000, 100_000, n),
+    })
+
+@pytest.mark.parametrize('chunksize', [None, 700])
+def test_bootstrap_then_append_matches_full_recompute(tmp_path, chunksize):
+    prices = _prices(3000)
+    raw = tmp_path / 'api_test.csv'
+    prices.iloc[:2990].to_csv(raw, index=False)
+    dataset, state_dir = tmp_path / 'features', tmp_path / 'state'
+    ingest_incremental(raw, dataset, state_dir, 'TEST', chunksize=chunksize)
+    prices.iloc[:2991].to_csv(raw, index=False)
+    summary = ingest_incremental(raw, dataset, state_dir, 'TEST')
+    assert summary['rows_new'] == 1
+
+    expected = create_features(prices.iloc[:2991].copy()).tail(3).reset_index(drop=True)
+    got = read_df(dataset, symbols=['TEST']).sort_values('date').tail(3).reset_index(drop=True)
+    for col in ['close', 'daily_return', 'rolling_avg_5d_close', 'rolling_vol_5d']:
+        np.testing.assert_allclose(got[col].to_numpy(), expected[col].to_numpy(), rtol=1e-12)
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from src.storage import read_df
+
+def _write_prices(path):
+    pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=4),
+        'close': [1.0, 2.0, 3.0, 4.0],
+        'volume': [10, 20, 30, 40],
+    }).to_csv(path, index=False)
+    return path
+
+def test_read_csv_projects_columns_without_date(tmp_path):
+    df = read_df(_write_prices(tmp_path / 'prices.csv'), columns=['close'])
+    assert df.columns.tolist() == ['close']
+    assert df['close'].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+def test_read_csv_filters_on_date_it_does_not_project(tmp_path):
+    df = read_df(_write_prices(tmp_path / 'prices.csv'), columns=['close'], start='2024-01-03')
+    assert df.columns.tolist() == ['close']
+    assert df['close'].tolist() == [3.0, 4.0]
+
+def test_read_csv_parses_dates(tmp_path):
+    df = read_df(_write_prices(tmp_path / 'prices.csv'))
+    assert pd.api.types.is_datetime64_any_dtype(df['date'])